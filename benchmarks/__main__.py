@@ -0,0 +1,126 @@
+import argparse
+from datetime import datetime
+import json
+import os
+import platform
+import subprocess
+import tempfile
+from typing import Any, Dict, List, Optional, Sequence, TypedDict
+
+import numpy as np
+import torch
+
+from benchmarks import suites
+from benchmarks.suites import MODEL_SUITES, SUITES, check_suites
+from benchmarks.timing import BenchmarkResult, peak_rss_bytes
+from voiceprint.backends import BACKENDS
+from voiceprint.voiceprint import Voiceprint
+from utils import get_logger
+
+_LOGGER = get_logger("benchmarks")
+
+class BenchmarkReport(TypedDict):
+    """Everything one benchmark run writes to its JSON output."""
+    metadata: Dict[str, Any]
+    results: List[BenchmarkResult]
+    # Peak RSS of the process after each suite. It never goes down, so run a suite alone to isolate it.
+    peak_rss_bytes: Dict[str, int]
+
+def parse_arguments(argv: Optional[Sequence[str]] = None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Benchmark the voiceprint core on synthetic audio and libraries")
+    parser.add_argument(
+        "--suites",
+        help="Suites to run; encoding and enrollment load the speaker model",
+        nargs="+",
+        choices=SUITES,
+        default=list(SUITES)
+    )
+    parser.add_argument(
+        "--speakers",
+        help="Library sizes for the library_io and scoring suites",
+        nargs="+",
+        type=int,
+        default=[100, 1000, 10000]
+    )
+    parser.add_argument("--repeat", help="Timed runs per case", type=int, default=5)
+    parser.add_argument(
+        "--inference-backend",
+        help="Model runtime for the model suites",
+        choices=BACKENDS,
+        default="speechbrain"
+    )
+    parser.add_argument(
+        "--quantize-model",
+        help="Run the embedding model with int8 dynamic quantization",
+        action="store_true"
+    )
+    parser.add_argument("-o", "--output", help="JSON file to write the results to", default="benchmark.json")
+    return parser.parse_args(argv)
+
+def git_commit() -> Optional[str]:
+    """Commit of the working tree, marked when it has uncommitted changes."""
+    cwd = os.path.dirname(os.path.abspath(__file__))
+    try:
+        commit = subprocess.run(["git", "rev-parse", "HEAD"], cwd=cwd, capture_output=True, text=True, check=True)
+        status = subprocess.run(["git", "status", "--porcelain"], cwd=cwd, capture_output=True, text=True, check=True)
+    except (OSError, subprocess.CalledProcessError):
+        return None
+    return commit.stdout.strip() + ("-dirty" if status.stdout.strip() else "")
+
+def run(args: argparse.Namespace) -> BenchmarkReport:
+    selected = check_suites(args.suites)
+    report = BenchmarkReport(
+        metadata={
+            "commit": git_commit(),
+            "created_at": datetime.now().isoformat(),
+            "python": platform.python_version(),
+            "numpy": np.__version__,
+            "torch": torch.__version__,
+            "platform": platform.platform(),
+            "cpu_count": os.cpu_count(),
+            "torch_threads": torch.get_num_threads(),
+            "args": vars(args)
+        },
+        results=[],
+        peak_rss_bytes={}
+    )
+
+    with tempfile.TemporaryDirectory() as libs_path:
+        voiceprint = None
+        if any(suite in MODEL_SUITES for suite in selected):
+            # No embedding cache, every run has to go through the model
+            voiceprint = Voiceprint(
+                libs_path=libs_path,
+                inference_backend=args.inference_backend,
+                quantize_model=args.quantize_model,
+                embedding_cache_bytes=0
+            )
+
+        for suite in selected:
+            _LOGGER.info(f"Running {suite} benchmarks")
+            if suite == "library_io":
+                results = suites.library_io(args.speakers, repeat=args.repeat)
+            elif suite == "scoring":
+                results = suites.scoring(args.speakers, repeat=args.repeat)
+            elif suite == "encoding":
+                results = suites.encoding(voiceprint, repeat=args.repeat)
+            else:
+                results = suites.enrollment(voiceprint, repeat=min(args.repeat, 3))
+
+            for entry in results:
+                params = " ".join(f"{key}={value}" for key, value in entry["params"].items())
+                _LOGGER.info(f"{entry['suite']}/{entry['name']} {params}: {entry['timing']['median_ms']:.2f} ms")
+            report["results"].extend(results)
+            report["peak_rss_bytes"][suite] = peak_rss_bytes()
+
+    return report
+
+def main(argv: Optional[Sequence[str]] = None) -> None:
+    args = parse_arguments(argv)
+    report = run(args)
+    with open(args.output, "w", encoding="utf-8") as f:
+        json.dump(report, f, indent=4)
+    _LOGGER.info(f"Wrote {len(report['results'])} results to {args.output}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,81 @@
+import argparse
+import json
+import sys
+from typing import List, Optional, Sequence, TypedDict
+
+from benchmarks.timing import BenchmarkResult
+
+class Comparison(TypedDict):
+    """Median time of one case in a baseline run and in the current run."""
+    case: str
+    baseline_ms: float
+    current_ms: float
+    # Relative change of the median, positive when slower
+    change: float
+    regressed: bool
+
+def case_key(entry: BenchmarkResult) -> str:
+    """Name identifying a case across runs: suite, benchmark and parameters."""
+    params = ",".join(f"{key}={value}" for key, value in sorted(entry["params"].items()))
+    return f"{entry['suite']}/{entry['name']}[{params}]"
+
+def compare(
+        baseline: List[BenchmarkResult],
+        current: List[BenchmarkResult],
+        tolerance: float = 0.1,
+        min_delta_ms: float = 0.05
+) -> List[Comparison]:
+    """
+    Compare the cases present in both runs. A case regresses when its median
+    is more than `tolerance` slower and at least `min_delta_ms` slower, so
+    timer noise on sub-millisecond cases is not reported.
+    """
+    before = {case_key(entry): entry for entry in baseline}
+    comparisons = []
+    for entry in current:
+        key = case_key(entry)
+        if key not in before:
+            continue
+        baseline_ms = before[key]["timing"]["median_ms"]
+        current_ms = entry["timing"]["median_ms"]
+        change = current_ms / baseline_ms - 1 if baseline_ms > 0 else 0.0
+        comparisons.append(Comparison(
+            case=key,
+            baseline_ms=baseline_ms,
+            current_ms=current_ms,
+            change=change,
+            regressed=change > tolerance and current_ms - baseline_ms >= min_delta_ms
+        ))
+    return comparisons
+
+def main(argv: Optional[Sequence[str]] = None) -> None:
+    parser = argparse.ArgumentParser(description="Compare two benchmark runs, exiting with 1 on regressions")
+    parser.add_argument("baseline", help="JSON output of the reference run")
+    parser.add_argument("current", help="JSON output of the run to check")
+    parser.add_argument("--tolerance", help="Slowdown of the median allowed before a case regresses", type=float, default=0.1)
+    parser.add_argument("--min-delta-ms", help="Smallest slowdown, in milliseconds, that can count as a regression", type=float, default=0.05)
+    args = parser.parse_args(argv)
+
+    with open(args.baseline, encoding="utf-8") as f:
+        baseline = json.load(f)
+    with open(args.current, encoding="utf-8") as f:
+        current = json.load(f)
+
+    comparisons = compare(baseline["results"], current["results"], args.tolerance, args.min_delta_ms)
+    for comparison in comparisons:
+        marker = "REGRESSED" if comparison["regressed"] else ""
+        print(f"{comparison['case']:<90} {comparison['baseline_ms']:>10.2f} -> {comparison['current_ms']:>10.2f} ms "
+              f"{comparison['change']:>+8.1%} {marker}")
+
+    for suite, peak in current.get("peak_rss_bytes", {}).items():
+        before = baseline.get("peak_rss_bytes", {}).get(suite)
+        if before:
+            print(f"peak RSS after {suite}: {before / 2**20:.0f} -> {peak / 2**20:.0f} MiB")
+
+    regressions = sum(comparison["regressed"] for comparison in comparisons)
+    print(f"{len(comparisons)} cases compared, {regressions} regressed "
+          f"({baseline['metadata'].get('commit')} -> {current['metadata'].get('commit')})")
+    sys.exit(1 if regressions else 0)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,22 @@
+from typing import Optional
+
+import numpy as np
+
+from voiceprint.audio import SAMPLE_RATE
+
+def synthetic_voice(seconds: float, pitch: Optional[float] = None, seed: int = 0, sample_rate: int = SAMPLE_RATE) -> np.ndarray:
+    """
+    A voiced-like float32 test signal: harmonics of `pitch` Hz with vibrato, syllable-rate loudness and noise.
+
+    The pitch is drawn from a typical speaking range when not given. Used by
+    the benchmarks, the load test and the model quantization check.
+    """
+    rng = np.random.default_rng(seed)
+    if pitch is None:
+        pitch = rng.uniform(100, 250)
+    t = np.arange(int(seconds * sample_rate)) / sample_rate
+    f0 = pitch * (1 + 0.05 * np.sin(2 * np.pi * 5 * t + rng.uniform(0, 2 * np.pi)))
+    phase = 2 * np.pi * np.cumsum(f0) / sample_rate
+    signal = sum(np.sin(h * phase) / h for h in range(1, 8))
+    envelope = 0.6 + 0.4 * np.sin(2 * np.pi * 4 * t + rng.uniform(0, 2 * np.pi))
+    return (0.1 * envelope * signal + 0.01 * rng.standard_normal(len(t))).astype(np.float32)
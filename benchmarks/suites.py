@@ -0,0 +1,118 @@
+import os
+import tempfile
+from typing import List, Literal, Sequence, get_args
+
+import numpy as np
+import torch
+
+from benchmarks.signals import synthetic_voice
+from benchmarks.synthetic import synthetic_library, synthetic_queries
+from benchmarks.timing import BenchmarkResult, measure, result
+from voiceprint.library import SCORING_MODES
+from voiceprint.storage import LIBRARY_FORMATS, read_library, write_library
+from voiceprint.voiceprint import Voiceprint
+
+Suite = Literal["library_io", "scoring", "encoding", "enrollment"]
+SUITES = get_args(Suite)
+# Suites that load the speaker model; the others only need synthetic embeddings
+MODEL_SUITES = ("encoding", "enrollment")
+
+def library_io(speakers: Sequence[int], samples_per_speaker: int = 3, repeat: int = 5) -> List[BenchmarkResult]:
+    """Time saving and loading synthetic libraries of each size in every storage format."""
+    results = []
+    with tempfile.TemporaryDirectory() as directory:
+        for count in speakers:
+            library = synthetic_library(count, samples_per_speaker)
+            for library_format in LIBRARY_FORMATS:
+                lib_path = os.path.join(directory, f"{library.id}_{library_format}.json")
+                params = {"speakers": count, "samples_per_speaker": samples_per_speaker, "format": library_format}
+
+                timing = measure(lambda: write_library(library, lib_path, library_format), repeat)
+                results.append(result("library_io", "save", params, timing, count))
+
+                timing = measure(lambda: read_library(lib_path, trusted=True), repeat)
+                results.append(result("library_io", "load", params, timing, count))
+    return results
+
+def scoring(
+        speakers: Sequence[int],
+        batch_sizes: Sequence[int] = (1, 16),
+        samples_per_speaker: int = 3,
+        repeat: int = 5
+) -> List[BenchmarkResult]:
+    """
+    Time ranking query embeddings against synthetic libraries of each size,
+    in every scoring mode and, for centroid scoring, through an IVF index too.
+    """
+    results = []
+    for count in speakers:
+        library = synthetic_library(count, samples_per_speaker)
+        for batch_size in batch_sizes:
+            queries = synthetic_queries(count, batch_size)
+            for mode in SCORING_MODES:
+                params = {"speakers": count, "samples_per_speaker": samples_per_speaker,
+                          "batch_size": batch_size, "mode": mode}
+                timing = measure(lambda: library.score_batch(queries, limit=5, mode=mode), repeat)
+                results.append(result("scoring", "score_batch", params, timing, batch_size))
+
+        library.build_index()
+        for batch_size in batch_sizes:
+            queries = synthetic_queries(count, batch_size)
+            params = {"speakers": count, "batch_size": batch_size, "mode": "centroid", "n_probe": library.index.n_probe}
+            timing = measure(lambda: library.score_batch(queries, limit=5), repeat)
+            results.append(result("scoring", "score_batch_ivf", params, timing, batch_size))
+    return results
+
+def encoding(
+        voiceprint: Voiceprint,
+        clip_seconds: Sequence[float] = (1.0, 3.0, 10.0),
+        batch_sizes: Sequence[int] = (1, 4, 16),
+        repeat: int = 5
+) -> List[BenchmarkResult]:
+    """Time one forward pass of the inference backend for each clip length and batch size."""
+    results = []
+    for seconds in clip_seconds:
+        for batch_size in batch_sizes:
+            batch = torch.from_numpy(np.stack([synthetic_voice(seconds, seed=seed) for seed in range(batch_size)]))
+            wav_lens = torch.ones(batch_size)
+            params = {"clip_seconds": seconds, "batch_size": batch_size, "backend": voiceprint.backend.name}
+            timing = measure(lambda: voiceprint.backend.encode_batch(batch, wav_lens), repeat)
+            results.append(result("encoding", "encode_batch", params, timing, batch_size))
+    return results
+
+def enrollment(
+        voiceprint: Voiceprint,
+        speakers: int = 8,
+        samples_per_speaker: int = 5,
+        clip_seconds: float = 3.0,
+        repeat: int = 3
+) -> List[BenchmarkResult]:
+    """
+    Time enrolling speakers from in-memory clips into a fresh library, journal included.
+
+    Every run uses new audio so the embedding cache cannot serve it.
+    """
+    # Audio for the warmup and every timed run, generated outside the timings
+    clips = [
+        [synthetic_voice(clip_seconds, seed=seed) for seed in range(first, first + samples_per_speaker)]
+        for first in range(0, (repeat + 1) * speakers * samples_per_speaker, samples_per_speaker)
+    ]
+    runs = iter(range(repeat + 1))
+
+    def enroll() -> None:
+        run = next(runs)
+        library = voiceprint.create_library(f"bench_enrollment_{run}")
+        for speaker in range(speakers):
+            voiceprint.enroll_from_arrays(f"Speaker {speaker}", clips[run * speakers + speaker], library_id=library.id)
+
+    params = {"speakers": speakers, "samples_per_speaker": samples_per_speaker, "clip_seconds": clip_seconds,
+              "backend": voiceprint.backend.name}
+    timing = measure(enroll, repeat)
+    return [result("enrollment", "enroll_from_arrays", params, timing, speakers)]
+
+def check_suites(suites: Sequence[str]) -> List[Suite]:
+    """Validate suite names."""
+    for suite in suites:
+        if suite not in SUITES:
+            raise ValueError(f"Unknown benchmark suite: {suite}")
+    return list(suites)
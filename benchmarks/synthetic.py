@@ -0,0 +1,66 @@
+from typing import Tuple
+
+import numpy as np
+
+from voiceprint.library import Library, LibraryHeaderDTO, SpeakerHeaderDTO
+from voiceprint.quantization import DEFAULT_PRECISION, Precision, quantize
+from voiceprint.speaker import SpeakerId
+
+# Size of the ECAPA speaker embeddings
+EMBEDDING_DIM = 192
+
+def synthetic_embeddings(
+        speakers: int,
+        samples_per_speaker: int = 0,
+        dim: int = EMBEDDING_DIM,
+        seed: int = 0
+) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Speaker centroids (N x D) and their samples (N * samples_per_speaker x D).
+
+    Samples scatter around their speaker's centroid, so scoring sees the
+    clustered structure of real embeddings rather than pure noise.
+    """
+    rng = np.random.default_rng(seed)
+    centroids = rng.standard_normal((speakers, dim)).astype(np.float32) * 10
+    noise = rng.standard_normal((speakers, samples_per_speaker, dim)).astype(np.float32) * 5
+    samples = (centroids[:, np.newaxis, :] + noise).reshape(-1, dim)
+    if samples_per_speaker:
+        centroids = samples.reshape(speakers, samples_per_speaker, dim).mean(axis=1)
+    return centroids, samples
+
+def synthetic_library(
+        speakers: int,
+        samples_per_speaker: int = 0,
+        precision: Precision = DEFAULT_PRECISION,
+        dim: int = EMBEDDING_DIM,
+        seed: int = 0
+) -> Library:
+    """A library of `speakers` random speakers, built straight from its matrices."""
+    centroids, samples = synthetic_embeddings(speakers, samples_per_speaker, dim, seed)
+    speaker_headers = []
+    for i in range(speakers):
+        speaker = SpeakerHeaderDTO(id=SpeakerId(f"speaker_{i:06d}"), name=f"Speaker {i}")
+        if samples_per_speaker:
+            speaker["sample_count"] = samples_per_speaker
+        speaker_headers.append(speaker)
+
+    header = LibraryHeaderDTO(
+        id=f"bench_{speakers}",
+        name=f"Bench {speakers}",
+        created_at="1970-01-01T00:00:00",
+        format="npy",
+        speakers=speaker_headers,
+        precision=precision
+    )
+    embeddings, scales = quantize(centroids, precision)
+    sample_values, sample_scales = quantize(samples, precision) if samples_per_speaker else (None, None)
+    return Library.from_header(header, embeddings, trusted=True, scales=scales,
+                               samples=sample_values, sample_scales=sample_scales)
+
+def synthetic_queries(library_speakers: int, count: int, dim: int = EMBEDDING_DIM, seed: int = 0) -> np.ndarray:
+    """(count x D) query embeddings near speakers of the matching synthetic library."""
+    centroids, _ = synthetic_embeddings(library_speakers, 0, dim, seed)
+    rng = np.random.default_rng(seed + 1)
+    picks = rng.integers(0, library_speakers, count)
+    return centroids[picks] + rng.standard_normal((count, dim)).astype(np.float32) * 5
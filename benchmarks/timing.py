@@ -0,0 +1,58 @@
+import resource
+import sys
+import time
+from typing import Any, Callable, Dict, List, NotRequired, TypedDict
+
+import numpy as np
+
+class TimingStats(TypedDict):
+    """Wall-clock time of the repeated runs of a benchmark, in milliseconds."""
+    repeat: int
+    mean_ms: float
+    median_ms: float
+    min_ms: float
+    max_ms: float
+
+class BenchmarkResult(TypedDict):
+    """One measured case of a suite."""
+    suite: str
+    name: str
+    params: Dict[str, Any]
+    timing: TimingStats
+    # Work items (clips, speakers, queries) per second at the median time
+    throughput: NotRequired[float]
+
+def measure(fn: Callable[[], Any], repeat: int = 5, warmup: int = 1) -> TimingStats:
+    """Time `repeat` calls of `fn` after `warmup` untimed ones."""
+    if repeat < 1:
+        raise ValueError("Benchmarks must run at least once")
+
+    for _ in range(warmup):
+        fn()
+
+    times: List[float] = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        fn()
+        times.append((time.perf_counter() - started) * 1000)
+
+    return TimingStats(
+        repeat=repeat,
+        mean_ms=float(np.mean(times)),
+        median_ms=float(np.median(times)),
+        min_ms=float(np.min(times)),
+        max_ms=float(np.max(times))
+    )
+
+def result(suite: str, name: str, params: Dict[str, Any], timing: TimingStats, items: int = 0) -> BenchmarkResult:
+    """Build a result, with the throughput of `items` per run when given."""
+    entry = BenchmarkResult(suite=suite, name=name, params=params, timing=timing)
+    if items:
+        entry["throughput"] = items / (timing["median_ms"] / 1000) if timing["median_ms"] > 0 else float("inf")
+    return entry
+
+def peak_rss_bytes() -> int:
+    """Peak resident set size of this process so far."""
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux reports kilobytes, macOS bytes
+    return peak if sys.platform == "darwin" else peak * 1024
@@ -0,0 +1,235 @@
+import argparse
+import asyncio
+from collections import defaultdict
+from datetime import datetime
+import json
+import logging
+import os
+import random
+import shlex
+import tempfile
+import time
+from typing import Any, Awaitable, Callable, Dict, List, Optional, TypedDict
+from urllib.parse import urlparse
+import uuid
+
+import httpx
+
+from loadtest.clients import DEFAULT_MIX, ENROLL_SAMPLES, RestClient, VoicePool, WyomingClient, parse_mix
+from loadtest.servers import ServerProcess, start_rest, start_wyoming, wait_for_rest, wait_for_tcp
+from loadtest.stats import LatencyStats, summarize
+from utils import get_logger
+
+_LOGGER = get_logger("loadtest")
+
+class LevelReport(TypedDict):
+    """Results of running the request mix at one concurrency."""
+    concurrency: int
+    duration_seconds: float
+    operations: Dict[str, LatencyStats]
+    total: LatencyStats
+    # Server counters (executor, scheduler, cache) right after the level, None without the REST API
+    health: Optional[Dict[str, Any]]
+
+def parse_arguments() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Load test the voiceprint REST and Wyoming servers")
+    parser.add_argument(
+        "--concurrency",
+        help="Concurrent clients; several values run one level after the other to find saturation",
+        nargs="+",
+        type=int,
+        default=[1, 4, 16]
+    )
+    parser.add_argument("--duration", help="Measured seconds per concurrency level", type=float, default=30.0)
+    parser.add_argument("--warmup", help="Unmeasured seconds before each level", type=float, default=5.0)
+    parser.add_argument("--mix", help=f"Relative weights of the requests (default {DEFAULT_MIX})", default=DEFAULT_MIX)
+    parser.add_argument("--speakers", help="Speakers enrolled before the run and identified during it", type=int, default=4)
+    parser.add_argument("--clip-seconds", help="Length of every clip and utterance", type=float, default=3.0)
+    parser.add_argument(
+        "--repeat-audio",
+        help="Send the same clips over and over, letting the embedding cache answer",
+        action="store_true"
+    )
+    parser.add_argument("--rest-url", help="Use a running REST API instead of starting one", default=None)
+    parser.add_argument("--rest-port", help="Port of the REST API started by the tool", type=int, default=9798)
+    parser.add_argument("--wyoming-uri", help="Use a running Wyoming server (tcp://host:port) instead of starting one", default=None)
+    parser.add_argument("--wyoming-port", help="Port of the Wyoming server started by the tool", type=int, default=13041)
+    parser.add_argument("--wyoming-args", help="Extra arguments for the Wyoming server started by the tool", default="")
+    parser.add_argument("--speed", help="Wyoming streaming speed relative to real time, 0 for as fast as possible", type=float, default=1.0)
+    parser.add_argument("--chunk-ms", help="Duration of each Wyoming audio chunk", type=int, default=100)
+    parser.add_argument("--startup-timeout", help="Seconds to wait for the servers to load the model", type=float, default=300.0)
+    parser.add_argument("--workdir", help="Where started servers keep their libraries and logs (a temporary directory by default)")
+    parser.add_argument("-o", "--output", help="JSON file to write the results to", default="loadtest.json")
+    return parser.parse_args()
+
+async def run_level(
+        concurrency: int,
+        duration: float,
+        warmup: float,
+        mix: Dict[str, float],
+        operations: Dict[str, Callable[[], Awaitable[Any]]],
+        satellite_factory: Optional[Callable[[], WyomingClient]],
+        rest: Optional[RestClient]
+) -> LevelReport:
+    """
+    Run `concurrency` closed-loop clients on the request mix, measuring after the warmup.
+
+    Every client streams its Wyoming utterances over its own connection, like a satellite.
+    """
+    names = [name for name in mix if mix[name] > 0]
+    weights = [mix[name] for name in names]
+    latencies: Dict[str, List[float]] = defaultdict(list)
+    errors: Dict[str, int] = defaultdict(int)
+    warned = set()
+
+    started = time.perf_counter()
+    measured_from = started + warmup
+    stop_at = measured_from + duration
+
+    async def client(index: int) -> None:
+        call: Dict[str, Callable[[], Awaitable[Any]]] = dict(operations)
+        satellite = satellite_factory() if satellite_factory is not None else None
+        if satellite is not None:
+            call["wyoming"] = satellite.identify
+
+        while True:
+            sent = time.perf_counter()
+            if sent >= stop_at:
+                break
+            name = random.choices(names, weights)[0]
+            try:
+                result = await call[name]()
+                # Wyoming reports the latency after the transcript, not the time spent streaming
+                latency = result if name == "wyoming" else time.perf_counter() - sent
+                if sent >= measured_from:
+                    latencies[name].append(latency)
+            except Exception as e:
+                if sent >= measured_from:
+                    errors[name] += 1
+                if name not in warned:
+                    warned.add(name)
+                    _LOGGER.warning("Client %d: %s failed: %s", index, name, e)
+
+        if satellite is not None:
+            await satellite.close()
+
+    await asyncio.gather(*(client(i) for i in range(concurrency)))
+    elapsed = min(time.perf_counter(), stop_at) - measured_from
+
+    health = None
+    if rest is not None:
+        try:
+            health = await rest.health()
+        except Exception as e:
+            _LOGGER.warning("Failed to read server health: %s", e)
+
+    return LevelReport(
+        concurrency=concurrency,
+        duration_seconds=elapsed,
+        operations={name: summarize(latencies[name], errors[name], elapsed) for name in names},
+        total=summarize(
+            [latency for name in names for latency in latencies[name]],
+            sum(errors.values()),
+            elapsed
+        ),
+        health=health
+    )
+
+def print_level(report: LevelReport) -> None:
+    print(f"\nconcurrency {report['concurrency']}: {report['total']['throughput']:.1f} req/s over "
+          f"{report['duration_seconds']:.1f}s, {report['total']['errors']} errors")
+    print(f"  {'request':<10} {'count':>7} {'errors':>7} {'req/s':>8} {'p50 ms':>9} {'p95 ms':>9} {'p99 ms':>9} {'max ms':>9}")
+    for name, stats in list(report["operations"].items()) + [("total", report["total"])]:
+        print(f"  {name:<10} {stats['count']:>7} {stats['errors']:>7} {stats['throughput']:>8.1f} "
+              f"{stats['p50_ms']:>9.1f} {stats['p95_ms']:>9.1f} {stats['p99_ms']:>9.1f} {stats['max_ms']:>9.1f}")
+
+    scheduler = (report["health"] or {}).get("scheduler")
+    if scheduler:
+        print(f"  scheduler: {scheduler['mean_batch_size']:.2f} requests per batch, {scheduler['rejected']} rejected")
+
+async def main() -> None:
+    args = parse_arguments()
+    mix = parse_mix(args.mix)
+    # One line per request would drown the report
+    logging.getLogger("httpx").setLevel(logging.WARNING)
+    if args.speakers < 1:
+        raise ValueError("At least one speaker must be enrolled to identify")
+
+    workdir = args.workdir or tempfile.mkdtemp(prefix="voiceprint-loadtest-")
+    libs_path = os.path.join(workdir, "libs")
+    os.makedirs(libs_path, exist_ok=True)
+    _LOGGER.info("Working in %s", workdir)
+
+    voices = VoicePool(args.speakers, clip_seconds=args.clip_seconds, repeat_audio=args.repeat_audio)
+    servers: List[ServerProcess] = []
+    reports: List[LevelReport] = []
+
+    try:
+        rest_url = args.rest_url
+        if rest_url is None:
+            rest_url = f"http://127.0.0.1:{args.rest_port}"
+            servers.append(start_rest(args.rest_port, libs_path, os.path.join(workdir, "rest_api.log")))
+        await wait_for_rest(rest_url, servers[0] if servers else None, args.startup_timeout)
+
+        limits = httpx.Limits(max_connections=max(args.concurrency) + 8)
+        async with httpx.AsyncClient(base_url=rest_url, timeout=httpx.Timeout(120.0), limits=limits) as http:
+            # A library of its own, so running against a live server leaves its libraries alone
+            rest = RestClient(http, f"loadtest_{uuid.uuid4().hex[:8]}", voices)
+            await rest.create_library()
+            for speaker in range(args.speakers):
+                await rest.enroll(f"seed-{speaker}", [voices.wav(speaker) for _ in range(ENROLL_SAMPLES)])
+            _LOGGER.info("Enrolled %d speakers in library %s", args.speakers, rest.library_id)
+
+            operations = {
+                "identify": rest.identify,
+                "enroll": rest.enroll,
+                "list": rest.list_libraries,
+                "delete": rest.delete
+            }
+            satellite_factory = None
+
+            if mix.get("wyoming", 0) > 0:
+                wyoming_uri = args.wyoming_uri
+                if wyoming_uri is None and args.rest_url is not None:
+                    raise ValueError("Pass --wyoming-uri, or drop wyoming from the mix, when targeting a running REST API")
+                if wyoming_uri is None:
+                    wyoming_uri = f"tcp://127.0.0.1:{args.wyoming_port}"
+                    server = start_wyoming(
+                        args.wyoming_port,
+                        os.path.join(libs_path, f"{rest.library_id}.json"),
+                        os.path.join(workdir, "wyoming.log"),
+                        shlex.split(args.wyoming_args)
+                    )
+                    servers.append(server)
+                else:
+                    server = None
+
+                uri = urlparse(wyoming_uri)
+                await wait_for_tcp(uri.hostname, uri.port, server, args.startup_timeout)
+                satellite_factory = lambda: WyomingClient(
+                    uri.hostname, uri.port, voices, chunk_ms=args.chunk_ms, speed=args.speed
+                )
+
+            for concurrency in args.concurrency:
+                _LOGGER.info("Running %d clients for %.0fs (after %.0fs warmup)", concurrency, args.duration, args.warmup)
+                report = await run_level(
+                    concurrency, args.duration, args.warmup, mix, operations, satellite_factory, rest
+                )
+                for server in servers:
+                    server.check()
+                print_level(report)
+                reports.append(report)
+    finally:
+        for server in servers:
+            server.stop()
+
+    with open(args.output, "w", encoding="utf-8") as f:
+        json.dump({
+            "created_at": datetime.now().isoformat(),
+            "args": vars(args),
+            "levels": reports
+        }, f, indent=4)
+    _LOGGER.info("Wrote results to %s", args.output)
+
+if __name__ == "__main__":
+    asyncio.run(main())
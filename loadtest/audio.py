@@ -0,0 +1,36 @@
+import io
+import wave
+
+import numpy as np
+
+from voiceprint.audio import SAMPLE_RATE
+
+# Audio is sent as 16-bit PCM at the rate the model expects
+SAMPLE_WIDTH = 2
+# Size of the header the wave module writes for 16-bit PCM
+WAV_HEADER_BYTES = 44
+
+def to_pcm(signal: np.ndarray) -> bytes:
+    """16-bit little-endian mono PCM, as Wyoming satellites stream it."""
+    return (np.clip(signal, -1, 1) * 32767).astype("<i2").tobytes()
+
+def to_wav(signal: np.ndarray) -> bytes:
+    """A 16 kHz mono 16-bit WAV file, as uploaded to the REST API."""
+    buffer = io.BytesIO()
+    with wave.open(buffer, "wb") as f:
+        f.setnchannels(1)
+        f.setsampwidth(SAMPLE_WIDTH)
+        f.setframerate(SAMPLE_RATE)
+        f.writeframes(to_pcm(signal))
+    return buffer.getvalue()
+
+def stamp(data: bytes, offset: int, counter: int) -> bytes:
+    """
+    Copy of `data` with its first sample after `offset` replaced by `counter`.
+
+    The change is inaudible but makes every request's audio unique, so the
+    server's embedding cache cannot answer it.
+    """
+    stamped = bytearray(data)
+    stamped[offset:offset + SAMPLE_WIDTH] = (counter % 32768).to_bytes(SAMPLE_WIDTH, "little", signed=True)
+    return bytes(stamped)
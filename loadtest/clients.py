@@ -0,0 +1,195 @@
+import asyncio
+import itertools
+import random
+import time
+from typing import Dict, List, Literal, Optional, get_args
+import uuid
+
+import httpx
+from wyoming.asr import Transcript
+from wyoming.audio import AudioChunk, AudioStart, AudioStop
+from wyoming.client import AsyncTcpClient
+
+from benchmarks.signals import synthetic_voice
+from loadtest.audio import SAMPLE_RATE, SAMPLE_WIDTH, WAV_HEADER_BYTES, stamp, to_pcm, to_wav
+
+# Requests the load generator can send
+Operation = Literal["identify", "enroll", "list", "delete", "wyoming"]
+OPERATIONS = get_args(Operation)
+DEFAULT_MIX = "identify=8,enroll=1,list=1,delete=1,wyoming=8"
+
+# The REST API only enrolls speakers with at least this many samples
+ENROLL_SAMPLES = 5
+
+def parse_mix(text: str) -> Dict[Operation, float]:
+    """Parse a request mix such as 'identify=8,list=1' into relative weights."""
+    mix: Dict[Operation, float] = {}
+    for part in text.split(","):
+        name, _, weight = part.partition("=")
+        name = name.strip()
+        if name not in OPERATIONS:
+            raise ValueError(f"Unknown operation in request mix: {name}")
+        mix[name] = float(weight) if weight else 1.0
+        if mix[name] < 0:
+            raise ValueError(f"Operation weights cannot be negative: {part}")
+    if not any(mix.values()):
+        raise ValueError("The request mix must give some operation a positive weight")
+    return mix
+
+class VoicePool:
+    """
+    Synthetic voices of a fixed set of speakers, one pitch each.
+
+    Clips are generated once; each request gets a copy stamped with a
+    counter so the server never sees the same audio twice, unless
+    `repeat_audio` asks for exactly that.
+    """
+    clip_seconds: float
+    repeat_audio: bool
+
+    def __init__(self, speakers: int, clip_seconds: float = 3.0, clips_per_speaker: int = 8, repeat_audio: bool = False):
+        self.clip_seconds = clip_seconds
+        self.repeat_audio = repeat_audio
+        self._counter = itertools.count(1)
+        # Pitches spread over a typical speaking range
+        self.pitches = [90 + 160 * i / max(1, speakers - 1) for i in range(speakers)]
+        self._signals = [
+            [synthetic_voice(clip_seconds, pitch, seed=speaker * 1000 + i) for i in range(clips_per_speaker)]
+            for speaker, pitch in enumerate(self.pitches)
+        ]
+        self._wavs = [[to_wav(signal) for signal in signals] for signals in self._signals]
+        self._pcms = [[to_pcm(signal) for signal in signals] for signals in self._signals]
+
+    def _pick(self, clips: List[List[bytes]], speaker: Optional[int], offset: int) -> bytes:
+        speaker = random.randrange(len(clips)) if speaker is None else speaker
+        data = random.choice(clips[speaker])
+        return data if self.repeat_audio else stamp(data, offset, next(self._counter))
+
+    def wav(self, speaker: Optional[int] = None) -> bytes:
+        """A WAV clip of the given speaker, or of a random one."""
+        return self._pick(self._wavs, speaker, WAV_HEADER_BYTES)
+
+    def pcm(self, speaker: Optional[int] = None) -> bytes:
+        """Raw PCM of the given speaker, or of a random one."""
+        return self._pick(self._pcms, speaker, 0)
+
+    def new_speaker_wavs(self) -> List[bytes]:
+        """Enrollment clips of a speaker no one has heard before."""
+        pitch = random.uniform(80, 260)
+        seed = next(self._counter)
+        return [to_wav(synthetic_voice(self.clip_seconds, pitch, seed=seed * 1000 + i)) for i in range(ENROLL_SAMPLES)]
+
+class RestClient:
+    """REST API requests against one library; speakers it enrolls are the ones it deletes."""
+    library_id: str
+
+    def __init__(self, client: httpx.AsyncClient, library_id: str, voices: VoicePool):
+        self._client = client
+        self.library_id = library_id
+        self._voices = voices
+        self._enrolled: List[str] = []
+
+    async def create_library(self) -> None:
+        response = await self._client.post("/libraries", params={"name": self.library_id})
+        response.raise_for_status()
+        self.library_id = response.json()["id"]
+
+    async def enroll(self, name: Optional[str] = None, clips: Optional[List[bytes]] = None) -> str:
+        name = name or f"loadtest-{uuid.uuid4().hex[:12]}"
+        clips = clips or self._voices.new_speaker_wavs()
+        files = [("audio_files", (f"sample{i}.wav", clip, "audio/wav")) for i, clip in enumerate(clips)]
+        response = await self._client.post(f"/libraries/{self.library_id}/speakers", params={"name": name}, files=files)
+        response.raise_for_status()
+        speaker_id = response.json()["id"]
+        if name.startswith("loadtest-"):
+            self._enrolled.append(speaker_id)
+        return speaker_id
+
+    async def identify(self) -> None:
+        files = {"audio_file": ("clip.wav", self._voices.wav(), "audio/wav")}
+        response = await self._client.post(f"/libraries/{self.library_id}/identify", params={"limit": 3}, files=files)
+        response.raise_for_status()
+
+    async def list_libraries(self) -> None:
+        response = await self._client.get("/libraries")
+        response.raise_for_status()
+
+    async def delete(self) -> None:
+        """Delete a speaker enrolled during the run, enrolling one first if there is none left."""
+        if not self._enrolled:
+            await self.enroll()
+        speaker_id = self._enrolled.pop(random.randrange(len(self._enrolled)))
+        response = await self._client.delete(f"/libraries/{self.library_id}/speakers/{speaker_id}")
+        response.raise_for_status()
+
+    async def health(self) -> dict:
+        response = await self._client.get("/health")
+        response.raise_for_status()
+        return response.json()
+
+class WyomingClient:
+    """
+    A satellite streaming utterances to the Wyoming server over one connection.
+
+    Audio is sent in `chunk_ms` chunks at `speed` times real time (0 for as
+    fast as possible), followed by a transcript; the latency measured is
+    from the transcript to the server's answer, what a user waits for.
+    """
+    host: str
+    port: int
+    chunk_ms: int
+    speed: float
+
+    def __init__(self, host: str, port: int, voices: VoicePool, chunk_ms: int = 100, speed: float = 1.0):
+        self.host = host
+        self.port = port
+        self.chunk_ms = chunk_ms
+        self.speed = speed
+        self._voices = voices
+        self._client: Optional[AsyncTcpClient] = None
+
+    async def identify(self) -> float:
+        """Stream one utterance and return the seconds between transcript and answer."""
+        if self._client is None:
+            self._client = AsyncTcpClient(self.host, self.port)
+            await self._client.connect()
+
+        try:
+            return await self._utterance(self._voices.pcm())
+        except Exception:
+            # Start the next utterance on a fresh connection
+            await self.close()
+            raise
+
+    async def _utterance(self, pcm: bytes) -> float:
+        client = self._client
+        await client.write_event(AudioStart(rate=SAMPLE_RATE, width=SAMPLE_WIDTH, channels=1).event())
+
+        chunk_bytes = SAMPLE_RATE * SAMPLE_WIDTH * self.chunk_ms // 1000
+        started = time.perf_counter()
+        for i, offset in enumerate(range(0, len(pcm), chunk_bytes)):
+            chunk = AudioChunk(rate=SAMPLE_RATE, width=SAMPLE_WIDTH, channels=1, audio=pcm[offset:offset + chunk_bytes])
+            await client.write_event(chunk.event())
+            if self.speed > 0:
+                # Keep to the satellite's pace without drifting
+                delay = started + (i + 1) * self.chunk_ms / 1000 / self.speed - time.perf_counter()
+                if delay > 0:
+                    await asyncio.sleep(delay)
+        await client.write_event(AudioStop().event())
+
+        sent = time.perf_counter()
+        await client.write_event(Transcript(text="load test").event())
+        while True:
+            event = await client.read_event()
+            if event is None:
+                raise ConnectionError("Wyoming server closed the connection")
+            if Transcript.is_type(event.type):
+                return time.perf_counter() - sent
+
+    async def close(self) -> None:
+        if self._client is not None:
+            client, self._client = self._client, None
+            try:
+                await client.disconnect()
+            except Exception:
+                pass
@@ -0,0 +1,100 @@
+import asyncio
+import os
+import subprocess
+import sys
+import time
+from typing import Dict, List, Optional
+
+import httpx
+
+from utils import get_logger
+
+_LOGGER = get_logger("loadtest")
+
+# Root of the repository, where the servers are started from
+_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+class ServerProcess:
+    """A server started as a child process, logging to a file."""
+    name: str
+    log_path: str
+
+    def __init__(self, name: str, args: List[str], log_path: str, env: Optional[Dict[str, str]] = None):
+        self.name = name
+        self.log_path = log_path
+        self._log = open(log_path, "wb")
+        self._process = subprocess.Popen(
+            [sys.executable, *args],
+            cwd=_root,
+            env={**os.environ, **(env or {})},
+            stdout=self._log,
+            stderr=subprocess.STDOUT
+        )
+        _LOGGER.info("Started %s (pid %d), logging to %s", name, self._process.pid, log_path)
+
+    def check(self) -> None:
+        """Raise if the server has exited."""
+        code = self._process.poll()
+        if code is not None:
+            raise RuntimeError(f"{self.name} exited with code {code}, see {self.log_path}")
+
+    def stop(self) -> None:
+        if self._process.poll() is None:
+            self._process.terminate()
+            try:
+                self._process.wait(timeout=10)
+            except subprocess.TimeoutExpired:
+                self._process.kill()
+                self._process.wait()
+        self._log.close()
+
+def start_rest(port: int, libs_path: str, log_path: str) -> ServerProcess:
+    """Start rest_api.api:api under uvicorn, storing its libraries in `libs_path`."""
+    return ServerProcess(
+        "rest_api",
+        ["-m", "uvicorn", "rest_api.api:api", "--host", "127.0.0.1", "--port", str(port)],
+        log_path,
+        env={"LIBS_PATH": libs_path}
+    )
+
+def start_wyoming(port: int, library_path: str, log_path: str, extra_args: List[str]) -> ServerProcess:
+    """Start the Wyoming server on `library_path`, passing `extra_args` through."""
+    return ServerProcess(
+        "wyoming_voiceprint",
+        ["-m", "wyoming_voiceprint", "--uri", f"tcp://127.0.0.1:{port}", "--library-path", library_path, *extra_args],
+        log_path
+    )
+
+async def wait_for_rest(url: str, server: Optional[ServerProcess], timeout: float) -> None:
+    """Wait until the REST API answers /health; the model may take a while to load."""
+    deadline = time.monotonic() + timeout
+    async with httpx.AsyncClient(base_url=url) as client:
+        while True:
+            if server is not None:
+                server.check()
+            try:
+                # The Voiceprint instance is built on first use, /health builds it
+                if (await client.get("/health", timeout=timeout)).status_code == 200:
+                    return
+            except httpx.TransportError:
+                pass
+            if time.monotonic() > deadline:
+                raise TimeoutError(f"REST API at {url} did not come up within {timeout:.0f}s")
+            await asyncio.sleep(0.5)
+
+async def wait_for_tcp(host: str, port: int, server: Optional[ServerProcess], timeout: float) -> None:
+    """Wait until something accepts connections on host:port."""
+    deadline = time.monotonic() + timeout
+    while True:
+        if server is not None:
+            server.check()
+        try:
+            _, writer = await asyncio.open_connection(host, port)
+            writer.close()
+            await writer.wait_closed()
+            return
+        except OSError:
+            pass
+        if time.monotonic() > deadline:
+            raise TimeoutError(f"Wyoming server at {host}:{port} did not come up within {timeout:.0f}s")
+        await asyncio.sleep(0.5)
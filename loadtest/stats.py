@@ -0,0 +1,33 @@
+from typing import List, TypedDict
+
+import numpy as np
+
+class LatencyStats(TypedDict):
+    """Throughput and latency distribution of one kind of request, latencies in milliseconds."""
+    count: int
+    errors: int
+    # Successful requests per second
+    throughput: float
+    mean_ms: float
+    p50_ms: float
+    p95_ms: float
+    p99_ms: float
+    max_ms: float
+
+def summarize(latencies: List[float], errors: int, duration: float) -> LatencyStats:
+    """Summarize the latencies, in seconds, of the requests that succeeded over `duration` seconds."""
+    if not latencies:
+        return LatencyStats(count=0, errors=errors, throughput=0.0, mean_ms=0.0, p50_ms=0.0, p95_ms=0.0, p99_ms=0.0, max_ms=0.0)
+
+    values = np.asarray(latencies) * 1000
+    p50, p95, p99 = np.percentile(values, [50, 95, 99])
+    return LatencyStats(
+        count=len(values),
+        errors=errors,
+        throughput=len(values) / duration if duration > 0 else 0.0,
+        mean_ms=float(values.mean()),
+        p50_ms=float(p50),
+        p95_ms=float(p95),
+        p99_ms=float(p99),
+        max_ms=float(values.max())
+    )
@@ -1,18 +1,25 @@
+import json
 import tempfile
 import os
-from typing import List, Optional
+from typing import Any, Callable, List, Optional, Tuple, TypeVar
 
-from fastapi import FastAPI, UploadFile, File
+from fastapi import FastAPI, HTTPException, UploadFile, File
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import FileResponse
+from fastapi.responses import Response
 import numpy as np
 from pydantic import BaseModel
 
-from voiceprint.library import Library, LibraryDTO, LibraryId
+from voiceprint.ann import RecallReport
+from voiceprint.library import Library, LibraryDTO, LibraryId, ScoringMode
+from voiceprint.quantization import DEFAULT_PRECISION, Precision, PrecisionReport
+from voiceprint.embedding_cache import EmbeddingCacheStats
+from voiceprint.scheduler import EmbeddingTiming, SchedulerFullError, SchedulerStats
+from voiceprint.vad import TrimStats
 from voiceprint.speaker import SpeakerDTO, SpeakerId
-from voiceprint.voiceprint import SpeakerIdentificationResponse, Voiceprint
+from voiceprint.voiceprint import SpeakerIdentificationResponse, SpeakerTimelineResponse, Voiceprint
 
-from rest_api.errors import BadRequestError, InternalServerError, NotFoundError
+from rest_api.errors import BadRequestError, InternalServerError, NotFoundError, ServiceUnavailableError
+from rest_api.executor import BlockingExecutor, ExecutorStats, QueueFullError
 from utils import get_logger
 
 _LOGGER = get_logger("rest_api")
@@ -29,26 +36,141 @@ api.add_middleware(
 
 # Global variable to hold the Voiceprint instance
 voiceprint = None
+# Worker threads for everything that blocks: inference and library I/O
+executor = None
+
+T = TypeVar("T")
 
 def get_voiceprint() -> Voiceprint:
     """Get the Voiceprint instance, initializing it if necessary."""
     global voiceprint
     if voiceprint is None:
         libs_path = os.environ.get("LIBS_PATH", "/tmp/voiceprint_libs")
-        voiceprint = Voiceprint(libs_path=libs_path)
+        library_format = os.environ.get("LIBS_FORMAT", "json")
+        # Everything in LIBS_PATH is written by this service, imports are validated on the way in
+        trust_libraries = os.environ.get("LIBS_TRUSTED", "true").lower() in ("1", "true", "yes")
+        # speechbrain, torchscript or onnx
+        inference_backend = os.environ.get("INFERENCE_BACKEND", "speechbrain")
+        quantize_model = os.environ.get("QUANTIZE_MODEL", "false").lower() in ("1", "true", "yes")
+        # Concurrent identify requests are embedded together, waiting at most BATCH_MAX_WAIT_MS for company
+        batch_max_size = int(os.environ.get("BATCH_MAX_SIZE", "16"))
+        batch_max_wait_ms = float(os.environ.get("BATCH_MAX_WAIT_MS", "5"))
+        batch_max_pending = int(os.environ.get("BATCH_MAX_PENDING", "256"))
+        # Embeddings of audio seen before are kept in memory and, with EMBEDDING_CACHE_PATH, on disk
+        embedding_cache_bytes = int(os.environ.get("EMBEDDING_CACHE_BYTES", str(64 * 1024 * 1024)))
+        embedding_cache_path = os.environ.get("EMBEDDING_CACHE_PATH") or None
+        # Drop silence before embedding, VAD_THRESHOLD_DB below the loudest frame of each clip
+        vad = os.environ.get("VAD", "false").lower() in ("1", "true", "yes")
+        vad_threshold_db = float(os.environ.get("VAD_THRESHOLD_DB", "35"))
+        # Clips longer than LONG_AUDIO_SECONDS are embedded as overlapping segments, pooled by SEGMENT_POOLING
+        long_audio_seconds = float(os.environ.get("LONG_AUDIO_SECONDS", "30"))
+        segment_pooling = os.environ.get("SEGMENT_POOLING", "mean")
+        max_analyzed_seconds = os.environ.get("MAX_ANALYZED_SECONDS")
+        voiceprint = Voiceprint(
+            libs_path=libs_path,
+            library_format=library_format,
+            trust_libraries=trust_libraries,
+            inference_backend=inference_backend,
+            quantize_model=quantize_model,
+            batch_max_size=batch_max_size,
+            batch_max_wait_ms=batch_max_wait_ms,
+            batch_max_pending=batch_max_pending,
+            embedding_cache_bytes=embedding_cache_bytes,
+            embedding_cache_path=embedding_cache_path,
+            vad=vad,
+            vad_threshold_db=vad_threshold_db,
+            long_audio_seconds=long_audio_seconds,
+            segment_pooling=segment_pooling,
+            max_analyzed_seconds=float(max_analyzed_seconds) if max_analyzed_seconds else None
+        )
     return voiceprint
 
+def get_executor() -> BlockingExecutor:
+    """Get the executor for blocking calls, initializing it if necessary."""
+    global executor
+    if executor is None:
+        # Mutations and scoring are serialized per library, so more workers only help across libraries
+        # and with inference, which runs outside the library locks. Identify requests wait for the
+        # scheduler on a worker, so this also bounds how many of them can share a forward pass.
+        concurrency = int(os.environ.get("INFERENCE_CONCURRENCY", "1"))
+        queue_depth = int(os.environ.get("INFERENCE_QUEUE_DEPTH", "32"))
+        executor = BlockingExecutor(concurrency=concurrency, queue_depth=queue_depth)
+    return executor
+
+async def run_blocking(
+    response: Optional[Response],
+    error: str,
+    fn: Callable[..., T],
+    *args: Any,
+    **kwargs: Any
+) -> T:
+    """
+    Run a blocking call on the executor, reporting queue wait and compute time in the response headers.
+
+    HTTP errors raised by the call pass through and a ValueError becomes a 400. Other failures
+    are logged and turned into a 500 with `error` as detail.
+    """
+    try:
+        result, timing = await get_executor().run(fn, *args, **kwargs)
+    except QueueFullError:
+        raise ServiceUnavailableError("Server is busy, please retry later.")
+    except HTTPException:
+        raise
+    except ValueError as e:
+        # Invalid input, such as audio too short to embed
+        raise BadRequestError(f"{error}: {e}.")
+    except Exception as e:
+        _LOGGER.error("%s: %s", error, str(e))
+        raise InternalServerError(f"{error}.")
+
+    if response is not None:
+        add_timing(response, timing["queue_seconds"], timing["compute_seconds"])
+    return result
+
+def add_timing(response: Response, queue_seconds: float, compute_seconds: float) -> None:
+    """Add a step's queue wait and compute time to the totals reported in the response headers."""
+    queue_ms = float(response.headers.get("X-Queue-Wait-Ms", 0)) + queue_seconds * 1000
+    compute_ms = float(response.headers.get("X-Compute-Ms", 0)) + compute_seconds * 1000
+    response.headers["X-Queue-Wait-Ms"] = f"{queue_ms:.1f}"
+    response.headers["X-Compute-Ms"] = f"{compute_ms:.1f}"
+    response.headers["Server-Timing"] = f"queue;dur={queue_ms:.1f}, compute;dur={compute_ms:.1f}"
+
+class HealthOut(BaseModel):
+    executor: ExecutorStats
+    scheduler: SchedulerStats
+    embedding_cache: EmbeddingCacheStats
+    vad: Optional[TrimStats]
+
+@api.get("/health", response_model=HealthOut)
+async def health():
+    """Report that the server is up, along with its queue, batching, embedding cache and VAD counters."""
+    vp = get_voiceprint()
+    return {
+        "executor": get_executor().stats(),
+        "scheduler": vp.scheduler.stats(),
+        "embedding_cache": vp.embedding_cache.stats(),
+        "vad": vp.vad.stats() if vp.vad is not None else None
+    }
+
 
 @api.get("/files/libraries/{filename}", include_in_schema=False)
 async def download_library_file(filename: str):
-    """Serve library files with Content-Disposition: attachment."""
-    file_path = os.path.join(get_voiceprint().libs_path, filename)
-    if not os.path.exists(file_path):
+    """Serve a library as a portable JSON file with Content-Disposition: attachment."""
+    lib_id, extension = os.path.splitext(filename)
+    if extension.lower() != ".json":
+        raise NotFoundError("File not found.")
+
+    try:
+        # Export through the library so binary-format libraries download as plain JSON
+        library_dict, _ = await get_executor().run(get_voiceprint().export_library, LibraryId(lib_id))
+    except QueueFullError:
+        raise ServiceUnavailableError("Server is busy, please retry later.")
+    except Exception:
         raise NotFoundError("File not found.")
-    return FileResponse(
-        file_path,
+
+    return Response(
+        content=json.dumps(library_dict, indent=4),
         media_type="application/octet-stream",
-        filename=filename,
         headers={"Content-Disposition": f"attachment; filename={filename}"}
     )
 
@@ -86,34 +208,33 @@ class SpeakerOut(BaseModel):
     id: SpeakerId
     name: str
 
+class SpeakerSamplesOut(SpeakerOut):
+    sample_count: int
+
 class LibraryOut(BaseModel):
     id: LibraryId
     name: str
     created_at: str
     speakers: List[SpeakerOut]
+    precision: Precision = DEFAULT_PRECISION
 
 
 @api.get("/libraries", response_model=List[LibraryOut])
-async def list_libraries():
+async def list_libraries(response: Response):
     """Get a list of all available libraries."""
-    libraries = get_voiceprint().list_libraries()
-    return [lib.to_dict() for lib in libraries]
+    return await run_blocking(response, "Error listing libraries", get_voiceprint().list_libraries)
 
 @api.post("/libraries", response_model=LibraryOut)
-async def create_library(name: str):
+async def create_library(response: Response, name: str, precision: Precision = DEFAULT_PRECISION):
     """Create a new library."""
     if not name or not name.strip():
         raise BadRequestError("Please enter a valid library name.")
     
-    try:
-        library = get_voiceprint().create_library(name)
-        return library.to_dict()
-    except Exception as e:
-        _LOGGER.error("Error creating library: %s", str(e))
-        raise InternalServerError("Error creating library.")
+    library = await run_blocking(response, "Error creating library", get_voiceprint().create_library, name, precision)
+    return library.to_dict()
 
 @api.post("/libraries/import", response_model=LibraryOut)
-async def import_library(lib_file: UploadFile = File(...)):
+async def import_library(response: Response, lib_file: UploadFile = File(...)):
     """Import a library."""
     if not lib_file or not lib_file.filename:
         raise BadRequestError("Please provide a valid library file.")
@@ -136,12 +257,8 @@ async def import_library(lib_file: UploadFile = File(...)):
             temp_file.write(content)
         
         # Import the library using the temporary file path
-        library = get_voiceprint().import_library(temp_path)
+        library = await run_blocking(response, "Error importing library", get_voiceprint().import_library, temp_path)
         return library.to_dict()
-        
-    except Exception as e:
-        _LOGGER.error("Error importing library: %s", str(e))
-        raise InternalServerError("Error importing library.")
     
     finally:
         # Clean up temporary file
@@ -152,38 +269,98 @@ async def import_library(lib_file: UploadFile = File(...)):
                 _LOGGER.warning("Failed to cleanup temporary file %s: %s", temp_path, cleanup_error)
 
 
-def get_library(library_id: LibraryId) -> Library:
+async def get_library(library_id: LibraryId) -> Library:
     """Get a library by ID."""
     if not library_id:
         raise BadRequestError("Library ID cannot be empty.")
     try:
-        library = get_voiceprint().load_library(library_id)
+        library, _ = await get_executor().run(get_voiceprint().get_library, library_id)
         return library
+    except QueueFullError:
+        raise ServiceUnavailableError("Server is busy, please retry later.")
     except:
         raise NotFoundError("Library not found.")
 
 @api.delete("/libraries/{library_id}")
-async def delete_library(library_id: LibraryId) -> str:
+async def delete_library(response: Response, library_id: LibraryId) -> str:
     """Delete a library by ID."""
-    get_library(library_id)
+    await get_library(library_id)
     
     _LOGGER.info("Deleting library with ID: %s", library_id)
     
-    try:
-        get_voiceprint().delete_library(library_id)
-        return "ok"
-    except Exception as e:
-        _LOGGER.error("Error deleting library: %s", str(e))
-        raise InternalServerError("Error deleting library.")
+    await run_blocking(response, "Error deleting library", get_voiceprint().delete_library, library_id)
+    return "ok"
+
+@api.post("/libraries/{library_id}/compact")
+async def compact_library(response: Response, library_id: LibraryId) -> str:
+    """Fold the library's journal of speaker changes into a new snapshot."""
+    await get_library(library_id)
+
+    await run_blocking(response, "Error compacting library", get_voiceprint().compact_library, library_id)
+    return "ok"
+
+@api.get("/libraries/{library_id}/precision")
+async def evaluate_precision(response: Response, library_id: LibraryId) -> List[PrecisionReport]:
+    """Report how much each storage precision changes the library's scores compared with float64."""
+    library = await get_library(library_id)
+
+    if not library.speakers:
+        raise BadRequestError("No speakers enrolled yet! Please enroll speakers first.")
+
+    return await run_blocking(response, "Error evaluating precision", get_voiceprint().evaluate_precision, library_id)
+
+@api.put("/libraries/{library_id}/precision")
+async def set_precision(response: Response, library_id: LibraryId, precision: Precision) -> str:
+    """Store the library's embeddings at another precision."""
+    await get_library(library_id)
+
+    await run_blocking(response, "Error setting precision", get_voiceprint().set_precision, precision, library_id)
+    return "ok"
+
+@api.post("/libraries/{library_id}/index")
+async def build_index(
+    response: Response,
+    library_id: LibraryId,
+    n_lists: Optional[int] = None,
+    n_probe: Optional[int] = None,
+    k: int = 10
+) -> RecallReport:
+    """Build an approximate search index for the library and report its recall@k."""
+    library = await get_library(library_id)
+
+    if not library.speakers:
+        raise BadRequestError("No speakers enrolled yet! Please enroll speakers first.")
+
+    if (n_lists is not None and n_lists < 1) or (n_probe is not None and n_probe < 1) or k < 1:
+        raise BadRequestError("Index parameters must be positive.")
+
+    return await run_blocking(
+        response,
+        "Error building index",
+        get_voiceprint().build_index,
+        library_id,
+        n_lists=n_lists,
+        n_probe=n_probe,
+        k=k
+    )
+
+@api.delete("/libraries/{library_id}/index")
+async def drop_index(response: Response, library_id: LibraryId) -> str:
+    """Remove the library's approximate search index and return to exact search."""
+    await get_library(library_id)
+
+    await run_blocking(response, "Error dropping index", get_voiceprint().drop_index, library_id)
+    return "ok"
 
 @api.post("/libraries/{library_id}/speakers", response_model=SpeakerOut)
 async def enroll_speaker(
+    response: Response,
     library_id: LibraryId,
     name: str,
     audio_files: list[UploadFile] = File(...)
 ):
     """Enroll a new speaker with their audio samples."""
-    get_library(library_id)
+    await get_library(library_id)
     
     if not name or not name.strip():
         raise BadRequestError("Please enter a valid speaker name.")
@@ -191,96 +368,203 @@ async def enroll_speaker(
     if len(audio_files) < 5:
         raise BadRequestError("Please provide at least 5 audio samples for enrollment.")
     
-    temp_file_paths = []
-    try:
-        # Save uploaded files to temporary locations
-        for audio_file in audio_files:
-            if not audio_file.filename:
-                raise BadRequestError("All audio files must have valid filenames.")
-
-            # Create a temporary file
-            temp_fd, temp_path = tempfile.mkstemp(suffix=os.path.splitext(audio_file.filename)[1])
-            temp_file_paths.append(temp_path)
-            
-            # Write the uploaded file content to the temporary file
-            with os.fdopen(temp_fd, 'wb') as temp_file:
-                content = await audio_file.read()
-                temp_file.write(content)
-        
-        # Enroll the speaker using the temporary file paths
-        return get_voiceprint().enroll_speaker(name, temp_file_paths)
-
-    except Exception as e:
-        _LOGGER.error("Error enrolling speaker: %s", str(e))
-        raise InternalServerError("Error enrolling speaker.")
+    for audio_file in audio_files:
+        if not audio_file.filename:
+            raise BadRequestError("All audio files must have valid filenames.")
+
+    # Decode the uploaded samples straight from memory
+    samples = [await audio_file.read() for audio_file in audio_files]
+    return await run_blocking(
+        response,
+        "Error enrolling speaker",
+        get_voiceprint().enroll_from_arrays,
+        name,
+        samples,
+        library_id=library_id
+    )
 
-    finally:
-        # Clean up temporary files
-        for temp_path in temp_file_paths:
-            try:
-                if os.path.exists(temp_path):
-                    os.unlink(temp_path)
-            except Exception as cleanup_error:
-                _LOGGER.warning("Failed to cleanup temporary file %s: %s", temp_path, cleanup_error)
+@api.post("/libraries/{library_id}/speakers/{speaker_id}/samples", response_model=SpeakerSamplesOut)
+async def add_samples(
+    response: Response,
+    library_id: LibraryId,
+    speaker_id: SpeakerId,
+    audio_files: list[UploadFile] = File(...)
+):
+    """Add audio samples to an enrolled speaker. Only the new samples are embedded."""
+    library = await get_library(library_id)
+
+    if library.get_speaker(speaker_id) is None:
+        raise NotFoundError("Speaker not found.")
+
+    if not audio_files:
+        raise BadRequestError("Please provide at least one audio sample.")
+
+    for audio_file in audio_files:
+        if not audio_file.filename:
+            raise BadRequestError("All audio files must have valid filenames.")
+
+    # Decode the uploaded samples straight from memory
+    samples = [await audio_file.read() for audio_file in audio_files]
+    return await run_blocking(
+        response,
+        "Error adding samples",
+        get_voiceprint().add_samples,
+        speaker_id,
+        samples,
+        library_id=library_id
+    )
 
 @api.post("/libraries/{library_id}/identify")
 async def identify_speaker(
+    response: Response,
     library_id: LibraryId,
     audio_file: UploadFile = File(...),
     threshold: Optional[float] = None,
-    limit: Optional[int] = None
+    limit: Optional[int] = None,
+    mode: ScoringMode = "centroid"
 ) -> SpeakerIdentificationResponse:
     """Identify a speaker from an audio sample."""
-    library = get_library(library_id)
-    
     if not audio_file or not audio_file.filename:
         raise BadRequestError("Please provide a valid audio file for identification.")
 
+    if threshold is not None and (threshold < 0 or threshold > 1):
+        raise BadRequestError("Threshold must be between 0 and 1.")
+
+    content = await audio_file.read()
+    result, timing = await run_blocking(
+        response,
+        "Error identifying speaker",
+        identify_scheduled,
+        content,
+        library_id,
+        threshold=threshold,
+        limit=limit,
+        mode=mode
+    )
+    response.headers["X-Batch-Size"] = str(timing["batch_size"])
+    return result
+
+def identify_scheduled(
+    content: bytes,
+    library_id: LibraryId,
+    threshold: Optional[float],
+    limit: Optional[int],
+    mode: ScoringMode
+) -> Tuple[SpeakerIdentificationResponse, EmbeddingTiming]:
+    """
+    Look up the library, decode the sample, embed it and score it in one executor call.
+
+    The clip is embedded through the micro-batching scheduler, which runs requests waiting on
+    different executor workers in one forward pass.
+    """
+    vp = get_voiceprint()
+    try:
+        library = vp.get_library(library_id)
+    except Exception:
+        raise NotFoundError("Library not found.")
+
     if not library.speakers:
         raise BadRequestError("No speakers enrolled yet! Please enroll speakers first.")
-    
-    temp_path = None
+
+    # Decode the uploaded sample straight from memory
+    signal = vp.load_audio(content)
     try:
-        # Create a temporary file for the uploaded audio
-        temp_fd, temp_path = tempfile.mkstemp(suffix=os.path.splitext(audio_file.filename)[1])
-        
-        # Write the uploaded file content to the temporary file
-        with os.fdopen(temp_fd, 'wb') as temp_file:
-            content = await audio_file.read()
-            temp_file.write(content)
-        
-        # Identify the speaker using the temporary file path
-        res = get_voiceprint().identify_speaker(
-            filepath=temp_path,
-            threshold=threshold,
-            limit=limit
-        )
-        return res
+        future = vp.scheduler.submit(signal)
+    except SchedulerFullError:
+        raise ServiceUnavailableError("Server is busy, please retry later.")
 
-    except Exception as e:
-        _LOGGER.error("Error identifying speaker: %s", str(e))
-        raise InternalServerError("Error identifying speaker.")
+    embedding, timing = future.result()
+    result = vp.identify_from_embedding(embedding, threshold=threshold, limit=limit, library_id=library_id, mode=mode)
+    return result, timing
+
+@api.post("/libraries/{library_id}/identify/batch")
+async def identify_speakers_batch(
+    response: Response,
+    library_id: LibraryId,
+    audio_files: list[UploadFile] = File(...),
+    threshold: Optional[float] = None,
+    limit: Optional[int] = None,
+    mode: ScoringMode = "centroid"
+) -> List[SpeakerIdentificationResponse]:
+    """Identify the speaker of each audio sample. Results follow the order of the uploaded files."""
+    library = await get_library(library_id)
     
-    finally:
-        # Clean up temporary file
-        if temp_path and os.path.exists(temp_path):
-            try:
-                os.unlink(temp_path)
-            except Exception as cleanup_error:
-                _LOGGER.warning("Failed to cleanup temporary file %s: %s", temp_path, cleanup_error)
+    if not audio_files:
+        raise BadRequestError("Please provide at least one audio file for identification.")
+
+    if not library.speakers:
+        raise BadRequestError("No speakers enrolled yet! Please enroll speakers first.")
+    
+    for audio_file in audio_files:
+        if not audio_file.filename:
+            raise BadRequestError("All audio files must have valid filenames.")
+
+    # Decode the uploaded samples straight from memory
+    samples = [await audio_file.read() for audio_file in audio_files]
+    return await run_blocking(
+        response,
+        "Error identifying speakers",
+        get_voiceprint().identify_speakers_batch,
+        inputs=samples,
+        threshold=threshold,
+        limit=limit,
+        library_id=library_id,
+        mode=mode
+    )
+
+@api.post("/libraries/{library_id}/identify/timeline")
+async def identify_timeline(
+    response: Response,
+    library_id: LibraryId,
+    audio_file: UploadFile = File(...),
+    threshold: Optional[float] = None,
+    window_seconds: float = 1.5,
+    hop_seconds: float = 0.75,
+    mode: ScoringMode = "centroid"
+) -> SpeakerTimelineResponse:
+    """Tell who spoke when in a long recording, as segments attributed to enrolled speakers."""
+    library = await get_library(library_id)
+
+    if not audio_file or not audio_file.filename:
+        raise BadRequestError("Please provide a valid audio file for identification.")
+
+    if not library.speakers:
+        raise BadRequestError("No speakers enrolled yet! Please enroll speakers first.")
+
+    if threshold is not None and (threshold < 0 or threshold > 1):
+        raise BadRequestError("Threshold must be between 0 and 1.")
+
+    if window_seconds <= 0 or not 0 < hop_seconds <= window_seconds:
+        raise BadRequestError("Hop must be positive and no longer than the window.")
+
+    content = await audio_file.read()
+    return await run_blocking(
+        response,
+        "Error building speaker timeline",
+        get_voiceprint().identify_timeline,
+        content,
+        window_seconds=window_seconds,
+        hop_seconds=hop_seconds,
+        threshold=threshold,
+        library_id=library_id,
+        mode=mode
+    )
 
 @api.delete("/libraries/{library_id}/speakers/{speaker_id}")
-async def delete_speaker(library_id: LibraryId, speaker_id: SpeakerId) -> str:
+async def delete_speaker(response: Response, library_id: LibraryId, speaker_id: SpeakerId) -> str:
     """Delete a speaker by ID."""
-    get_library(library_id)
+    await get_library(library_id)
     
     if not speaker_id:
         raise BadRequestError("No speaker selected for deletion.")
 
-    try:
-        if not get_voiceprint().unenroll_speaker(speaker_id):
-            raise NotFoundError("Speaker not found.")
-        return "ok"
-    except Exception as e:
-        _LOGGER.error("Error deleting speaker: %s", str(e))
-        raise InternalServerError("Error deleting speaker.")
\ No newline at end of file
+    removed = await run_blocking(
+        response,
+        "Error deleting speaker",
+        get_voiceprint().unenroll_speaker,
+        speaker_id,
+        library_id=library_id
+    )
+    if not removed:
+        raise NotFoundError("Speaker not found.")
+    return "ok"
\ No newline at end of file
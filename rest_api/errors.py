@@ -14,4 +14,9 @@ class NotFoundError(HTTPException):
 class InternalServerError(HTTPException):
     """Exception raised for internal server errors."""
     def __init__(self, detail: str = "Internal Server Error"):
-        super().__init__(status_code=500, detail=detail)
\ No newline at end of file
+        super().__init__(status_code=500, detail=detail)
+
+class ServiceUnavailableError(HTTPException):
+    """Exception raised when the server is too busy to take the request."""
+    def __init__(self, detail: str = "Service Unavailable", retry_after: int = 1):
+        super().__init__(status_code=503, detail=detail, headers={"Retry-After": str(retry_after)})
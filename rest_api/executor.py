@@ -0,0 +1,94 @@
+import asyncio
+from concurrent.futures import Future, ThreadPoolExecutor
+import threading
+import time
+from typing import Any, Callable, Tuple, TypedDict, TypeVar
+
+T = TypeVar("T")
+
+class QueueFullError(Exception):
+    """Raised when the executor already holds as many calls as it may queue."""
+
+class CallTiming(TypedDict):
+    """Where the time of a call went, in seconds."""
+    queue_seconds: float
+    compute_seconds: float
+
+class ExecutorStats(TypedDict):
+    """Snapshot of the executor's load."""
+    concurrency: int
+    queue_depth: int
+    running: int
+    queued: int
+    rejected: int
+
+class BlockingExecutor:
+    """
+    Runs blocking Voiceprint calls (inference, library I/O) off the event loop.
+
+    At most `concurrency` calls run at once and at most `queue_depth` more
+    wait for a worker; further calls are rejected right away with
+    QueueFullError instead of piling up.
+    """
+    concurrency: int
+    queue_depth: int
+
+    def __init__(self, concurrency: int = 1, queue_depth: int = 32):
+        if concurrency < 1:
+            raise ValueError("Executor concurrency must be at least 1")
+        if queue_depth < 0:
+            raise ValueError("Executor queue depth cannot be negative")
+
+        self.concurrency = concurrency
+        self.queue_depth = queue_depth
+        self._executor = ThreadPoolExecutor(max_workers=concurrency, thread_name_prefix="voiceprint")
+        self._lock = threading.Lock()
+        self._pending = 0
+        self._running = 0
+        self._rejected = 0
+
+    async def run(self, fn: Callable[..., T], *args: Any, **kwargs: Any) -> Tuple[T, CallTiming]:
+        """Run `fn` on a worker thread and return its result with the call's timing."""
+        with self._lock:
+            if self._pending >= self.concurrency + self.queue_depth:
+                self._rejected += 1
+                raise QueueFullError("Too many requests are waiting for a worker")
+            self._pending += 1
+
+        submitted = time.perf_counter()
+
+        def call() -> Tuple[T, float, float]:
+            started = time.perf_counter()
+            with self._lock:
+                self._running += 1
+            try:
+                return fn(*args, **kwargs), started, time.perf_counter()
+            finally:
+                with self._lock:
+                    self._running -= 1
+
+        future = self._executor.submit(call)
+        # Release the slot when the call finishes, even if the awaiting request was cancelled
+        future.add_done_callback(self._release)
+
+        result, started, finished = await asyncio.wrap_future(future)
+        return result, CallTiming(queue_seconds=started - submitted, compute_seconds=finished - started)
+
+    def stats(self) -> ExecutorStats:
+        """Get a snapshot of the executor's load."""
+        with self._lock:
+            return ExecutorStats(
+                concurrency=self.concurrency,
+                queue_depth=self.queue_depth,
+                running=self._running,
+                queued=self._pending - self._running,
+                rejected=self._rejected
+            )
+
+    def shutdown(self) -> None:
+        """Stop accepting calls and wait for the running ones."""
+        self._executor.shutdown(wait=True)
+
+    def _release(self, _: Future) -> None:
+        with self._lock:
+            self._pending -= 1
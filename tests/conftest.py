@@ -0,0 +1,19 @@
+import pytest
+from speechbrain.inference.speaker import SpeakerRecognition
+
+from helpers import StubModel
+
+@pytest.fixture
+def stub_model(monkeypatch):
+    model = StubModel()
+    monkeypatch.setattr(SpeakerRecognition, "from_hparams", staticmethod(lambda *args, **kwargs: model))
+    return model
+
+@pytest.fixture
+def voiceprint(tmp_path, stub_model):
+    """A Voiceprint over an empty libraries directory, embedding with the stub model."""
+    from voiceprint.voiceprint import Voiceprint
+
+    voiceprint = Voiceprint(libs_path=str(tmp_path / "libs"))
+    yield voiceprint
+    voiceprint.scheduler.close()
@@ -0,0 +1,79 @@
+import io
+import wave
+
+import numpy as np
+import torch
+from speechbrain.inference.speaker import SpeakerRecognition
+from speechbrain.lobes.features import Fbank
+from speechbrain.lobes.models.ECAPA_TDNN import ECAPA_TDNN
+from speechbrain.processing.features import InputNormalization
+
+SAMPLE_RATE = 16000
+# Bands of the stub model's embeddings, log-spaced over the range of voice pitches and their first harmonics
+STUB_BANDS = np.geomspace(60, 2400, 33)
+
+def voice(seconds: float, pitch: float, seed: int = 0, sample_rate: int = SAMPLE_RATE) -> torch.Tensor:
+    """A voiced-like 1D float32 clip: harmonics of `pitch` Hz with a little noise."""
+    rng = np.random.default_rng(seed)
+    t = np.arange(int(seconds * sample_rate)) / sample_rate
+    phase = 2 * np.pi * pitch * t + rng.uniform(0, 2 * np.pi)
+    signal = sum(np.sin(h * phase) / h for h in range(1, 6))
+    return torch.from_numpy((0.1 * signal + 0.001 * rng.standard_normal(len(t))).astype(np.float32))
+
+def wav_bytes(signal: torch.Tensor, sample_rate: int = SAMPLE_RATE, channels: int = 1) -> bytes:
+    """Encode a float clip as a 16-bit PCM WAV file, the same samples on every channel."""
+    pcm = (np.clip(signal.numpy(), -1, 1) * 32767).astype("<i2")
+    buffer = io.BytesIO()
+    with wave.open(buffer, "wb") as f:
+        f.setnchannels(channels)
+        f.setsampwidth(2)
+        f.setframerate(sample_rate)
+        f.writeframes(np.repeat(pcm, channels).tobytes())
+    return buffer.getvalue()
+
+def write_wav(path, signal: torch.Tensor, sample_rate: int = SAMPLE_RATE) -> str:
+    with open(path, "wb") as f:
+        f.write(wav_bytes(signal, sample_rate))
+    return str(path)
+
+def stub_embedding(signal: torch.Tensor) -> torch.Tensor:
+    """Share of the clip's energy in each stub band: clips of the same pitch point the same way."""
+    spectrum = np.abs(np.fft.rfft(signal.double().numpy())) ** 2
+    freqs = np.fft.rfftfreq(len(signal), 1 / SAMPLE_RATE)
+    bands = np.digitize(freqs, STUB_BANDS) - 1
+    valid = (bands >= 0) & (bands < len(STUB_BANDS) - 1)
+    energy = np.bincount(bands[valid], weights=spectrum[valid], minlength=len(STUB_BANDS) - 1)
+    return torch.from_numpy(np.sqrt(energy / max(energy.sum(), 1e-12))).float()
+
+class StubModel:
+    """
+    Stands in for the SpeechBrain ECAPA model in tests.
+
+    Each clip is embedded from its unpadded samples only, so batched and
+    one-by-one embeddings are identical; the size of every batch is recorded.
+    """
+
+    def __init__(self):
+        self.mods = torch.nn.ModuleDict({"embedding_model": torch.nn.Linear(1, 1)})
+        self.batch_sizes = []
+
+    def encode_batch(self, wavs: torch.Tensor, wav_lens: torch.Tensor = None) -> torch.Tensor:
+        if wavs.dim() == 1:
+            wavs = wavs.unsqueeze(0)
+        if wav_lens is None:
+            wav_lens = torch.ones(len(wavs))
+        self.batch_sizes.append(len(wavs))
+        lengths = [int(round(float(length) * wavs.shape[-1])) for length in wav_lens]
+        return torch.stack([stub_embedding(wav[:length]) for wav, length in zip(wavs, lengths)]).unsqueeze(1)
+
+def tiny_ecapa(seed: int = 0) -> SpeakerRecognition:
+    """A small randomly initialised ECAPA model with the same structure as the pretrained one."""
+    torch.manual_seed(seed)
+    modules = torch.nn.ModuleDict({
+        "compute_features": Fbank(n_mels=40),
+        "mean_var_norm": InputNormalization(norm_type="sentence", std_norm=False),
+        "embedding_model": ECAPA_TDNN(40, channels=[32, 32, 32, 32, 96], lin_neurons=24),
+    })
+    model = SpeakerRecognition(modules=modules, hparams={}, run_opts={"device": "cpu"})
+    model.mods.eval()
+    return model
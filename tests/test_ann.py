@@ -0,0 +1,73 @@
+import numpy as np
+import pytest
+
+from voiceprint.ann import IVFIndex, measure_recall
+from voiceprint.library import Library
+from voiceprint.speaker import Speaker
+
+def clustered(n: int, dim: int = 32, clusters: int = 16, seed: int = 0) -> np.ndarray:
+    """Normalized vectors around a few directions, like speakers of similar voices."""
+    rng = np.random.default_rng(seed)
+    centers = rng.standard_normal((clusters, dim))
+    vectors = centers[rng.integers(clusters, size=n)] + 0.3 * rng.standard_normal((n, dim))
+    return (vectors / np.linalg.norm(vectors, axis=1, keepdims=True)).astype(np.float32)
+
+def test_recall_is_high_on_clustered_data():
+    matrix = clustered(2000)
+    index = IVFIndex.build(matrix, n_lists=32, n_probe=4)
+    report = measure_recall(matrix, index, clustered(100, seed=1), k=10)
+    assert report["recall"] >= 0.9
+    assert report["mean_candidates"] < len(matrix)
+
+def test_probing_every_list_is_exact():
+    matrix = clustered(500)
+    index = IVFIndex.build(matrix, n_lists=16)
+    report = measure_recall(matrix, index, clustered(50, seed=1), k=5, n_probe=16)
+    assert report["recall"] == 1.0
+    assert report["mean_candidates"] == len(matrix)
+
+def test_updates_match_a_fresh_assignment():
+    matrix = clustered(300)
+    index = IVFIndex.build(matrix[:200], n_lists=8)
+    for vector in matrix[200:]:
+        index.add(vector)
+    index.remove(10)
+    index.reassign(0, matrix[299])
+
+    rows = np.delete(matrix, 10, axis=0)
+    rows[0] = matrix[299]
+    expected = np.argmax(rows @ index.centroids.T, axis=1)
+    np.testing.assert_array_equal(index.assignments, expected)
+
+def test_save_and_load(tmp_path):
+    matrix = clustered(200)
+    index = IVFIndex.build(matrix, n_lists=8, n_probe=3)
+    path = str(tmp_path / "index.npz")
+    index.save(path)
+
+    loaded = IVFIndex.load(path)
+    assert loaded.n_probe == 3
+    np.testing.assert_array_equal(loaded.centroids, index.centroids)
+    np.testing.assert_array_equal(loaded.assignments, index.assignments)
+
+def test_library_index_stays_in_sync_with_speakers():
+    matrix = clustered(64, dim=16)
+    library = Library.create("indexed")
+    for i, vector in enumerate(matrix[:48]):
+        library.put_speaker(Speaker.create(f"speaker{i}", vector))
+    library.build_index(n_lists=4)
+
+    for i, vector in enumerate(matrix[48:]):
+        library.put_speaker(Speaker.create(f"late{i}", vector))
+    library.remove_speaker("speaker3")
+    assert len(library.index) == len(library.speakers)
+
+    # Probing every list must give the same ranking as exact search
+    library.index.n_probe = library.index.n_lists
+    approximate = library.score_batch(matrix[:8], limit=3)
+    exact = library.score_batch(matrix[:8], limit=3, exact=True)
+    assert [[s.id for s, _ in row] for row in approximate] == [[s.id for s, _ in row] for row in exact]
+
+def test_empty_matrix_is_rejected():
+    with pytest.raises(ValueError):
+        IVFIndex.build(np.empty((0, 8), dtype=np.float32))
@@ -0,0 +1,49 @@
+import numpy as np
+import pytest
+import torch
+
+from voiceprint.audio import decode_pcm, get_resampler, load_audio, resample
+
+def test_every_sample_width_decodes_to_the_same_levels():
+    levels = np.array([-1.0, -0.5, 0.0, 0.25, 0.5])
+    encoded = {
+        1: (levels * 128 + 128).astype(np.uint8).tobytes(),
+        2: (levels * 32768).astype("<i2").tobytes(),
+        3: b"".join(int(level * 8388608).to_bytes(3, "little", signed=True) for level in levels),
+        4: (levels * 2147483648).astype("<i4").tobytes(),
+    }
+    for width, data in encoded.items():
+        signal = decode_pcm(data, 16000, width, 1)
+        assert signal.dtype == torch.float32
+        np.testing.assert_array_equal(signal.numpy(), levels.astype(np.float32), err_msg=f"width {width}")
+
+    with pytest.raises(ValueError):
+        decode_pcm(b"\0" * 10, 16000, 5, 1)
+    with pytest.raises(ValueError):
+        decode_pcm(b"\0" * 10, 16000, 2, 0)
+
+def test_channels_are_averaged_and_partial_frames_dropped():
+    frames = np.array([[1000, 3000], [-2000, 2000], [500, 500]], dtype="<i2")
+    data = frames.tobytes() + b"\x01\x02\x03"
+
+    signal = decode_pcm(data, 16000, 2, 2)
+    np.testing.assert_allclose(signal.numpy(), frames.mean(axis=1) / 32768)
+
+def test_decoded_audio_matches_load_audio_and_owns_its_memory():
+    pcm = (np.sin(np.arange(4410) / 10) * 10000).astype("<i2")
+    buffer = bytearray(pcm.tobytes())
+
+    signal = decode_pcm(memoryview(buffer), 44100, 2, 1)
+    torch.testing.assert_close(signal, load_audio(pcm, sample_rate=44100))
+    assert len(signal) == 1600
+
+    buffer[:] = bytes(len(buffer))
+    torch.testing.assert_close(signal, load_audio(pcm, sample_rate=44100))
+
+def test_resamplers_are_built_once_per_rate_pair():
+    assert get_resampler(22050) is get_resampler(22050)
+    assert get_resampler(22050) is not get_resampler(22050, 8000)
+    signal = torch.randn(16000)
+    assert resample(signal, 16000) is signal
+    with pytest.raises(ValueError):
+        get_resampler(0)
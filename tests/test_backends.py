@@ -0,0 +1,51 @@
+import os
+
+import numpy as np
+import pytest
+import torch
+
+from helpers import tiny_ecapa
+from voiceprint.backends import (
+    ONNX_FILENAME, TORCHSCRIPT_FILENAME, InferenceBackend, SpeechBrainBackend, check_parity, load_backend
+)
+
+@pytest.fixture(scope="module")
+def model():
+    return tiny_ecapa()
+
+class _Perturbed(InferenceBackend):
+    name = "perturbed"
+
+    def __init__(self, backend: InferenceBackend):
+        self.backend = backend
+
+    def encode_batch(self, wavs: torch.Tensor, wav_lens: torch.Tensor) -> np.ndarray:
+        embeddings = self.backend.encode_batch(wavs, wav_lens)
+        return embeddings + np.random.default_rng(0).standard_normal(embeddings.shape).astype(np.float32)
+
+@pytest.mark.parametrize("name, filename", [("torchscript", TORCHSCRIPT_FILENAME), ("onnx", ONNX_FILENAME)])
+def test_exported_backends_match_speechbrain(model, tmp_path, name, filename):
+    if name == "onnx":
+        pytest.importorskip("onnxruntime")
+
+    backend = load_backend(name, model, str(tmp_path))
+    assert os.path.exists(tmp_path / filename)
+    report = check_parity(backend, SpeechBrainBackend(model), durations=(0.5, 1.2))
+    assert report["passed"], report
+    assert report["clips"] == 6
+
+    # The saved export is reused rather than traced again
+    mtime = os.path.getmtime(tmp_path / filename)
+    load_backend(name, model, str(tmp_path))
+    assert os.path.getmtime(tmp_path / filename) == mtime
+    assert not [f for f in os.listdir(tmp_path) if f.endswith(".tmp")]
+
+def test_parity_check_fails_for_diverging_backend(model):
+    reference = SpeechBrainBackend(model)
+    report = check_parity(_Perturbed(reference), reference, durations=(0.5,))
+    assert not report["passed"]
+    assert report["backend"] == "perturbed"
+
+def test_unknown_backend_is_rejected(model, tmp_path):
+    with pytest.raises(ValueError, match="Unsupported inference backend"):
+        load_backend("tensorrt", model, str(tmp_path))
@@ -0,0 +1,41 @@
+import numpy as np
+import pytest
+import torch
+
+from helpers import stub_embedding, voice
+from voiceprint.batching import bucket_by_length, pad_batch
+
+def test_buckets_bound_batch_size_and_length_ratio():
+    lengths = [16000, 40000, 17000, 8000, 24000, 23000, 16500, 9000, 60000, 15000]
+    buckets = bucket_by_length(lengths, max_batch_size=3, max_length_ratio=1.5)
+
+    assert sorted(i for bucket in buckets for i in bucket) == list(range(len(lengths)))
+    for bucket in buckets:
+        assert len(bucket) <= 3
+        sizes = [lengths[i] for i in bucket]
+        assert max(sizes) <= 1.5 * min(sizes)
+
+def test_pad_batch_zero_pads_and_reports_relative_lengths():
+    signals = [torch.ones(4), torch.full((8,), 2.0), torch.full((6,), 3.0)]
+    batch, wav_lens = pad_batch(signals)
+
+    assert batch.shape == (3, 8)
+    torch.testing.assert_close(wav_lens, torch.tensor([0.5, 1.0, 0.75]))
+    for signal, row in zip(signals, batch):
+        torch.testing.assert_close(row[:len(signal)], signal)
+        assert not row[len(signal):].any()
+
+    with pytest.raises(ValueError):
+        pad_batch([])
+    with pytest.raises(ValueError):
+        pad_batch([torch.zeros(0)])
+
+def test_batched_embeddings_match_unpadded_clips(voiceprint, stub_model):
+    clips = [voice(seconds, 100 + 30 * i, seed=i) for i, seconds in enumerate([0.5, 1.0, 0.6, 2.0, 1.1, 0.55])]
+
+    batched = voiceprint._encode_signals(clips)
+    alone = np.stack([stub_embedding(clip).numpy() for clip in clips])
+
+    # Clips of similar length shared forward passes, and every row still belongs to its clip
+    assert len(stub_model.batch_sizes) < len(clips)
+    np.testing.assert_allclose(batched, alone, rtol=1e-5, atol=1e-6)
@@ -0,0 +1,42 @@
+import numpy as np
+
+from wyoming_voiceprint.buffer import PcmBuffer
+
+def test_buffer_grows_by_doubling_and_keeps_its_contents():
+    buffer = PcmBuffer(initial_bytes=4)
+    buffer.extend(b"abc")
+    assert buffer.capacity == 4
+
+    buffer.extend(b"def")
+    assert buffer.capacity == 8
+    buffer.extend(b"g" * 20)
+    assert buffer.capacity == 26
+    assert len(buffer) == 26 and buffer.view().tobytes() == b"abcdef" + b"g" * 20
+    assert not buffer.truncated
+
+def test_view_is_a_window_without_copying():
+    buffer = PcmBuffer()
+    buffer.extend(bytes(range(10)))
+
+    assert buffer.view(2, 5).tobytes() == bytes([2, 3, 4])
+    assert buffer.view(8, 100).tobytes() == bytes([8, 9])
+    assert np.shares_memory(buffer.view(), buffer.view(2, 5))
+
+def test_audio_past_the_cap_is_dropped():
+    buffer = PcmBuffer(initial_bytes=4, max_bytes=10)
+    assert buffer.extend(b"a" * 6) == 6
+    assert buffer.extend(b"b" * 6) == 4
+    assert buffer.truncated
+    assert buffer.extend(b"c") == 0
+    assert buffer.capacity == 10 and buffer.view().tobytes() == b"a" * 6 + b"b" * 4
+
+def test_reset_keeps_the_allocation():
+    buffer = PcmBuffer(initial_bytes=4, max_bytes=10)
+    buffer.extend(b"a" * 12)
+    capacity = buffer.capacity
+
+    buffer.reset()
+    assert len(buffer) == 0 and not buffer.truncated
+    assert buffer.capacity == capacity
+    buffer.extend(b"xyz")
+    assert buffer.view().tobytes() == b"xyz"
@@ -0,0 +1,65 @@
+import numpy as np
+import pytest
+
+from helpers import voice, wav_bytes
+from voiceprint.embedding_cache import EmbeddingCache
+
+def test_keys_follow_the_samples_and_the_model_version():
+    cache = EmbeddingCache("model-a")
+    clip = voice(0.5, 150)
+
+    assert cache.key(clip) == cache.key(clip.clone())
+    assert cache.key(clip) != cache.key(voice(0.5, 150, seed=1))
+    assert cache.key(clip) != EmbeddingCache("model-b").key(clip)
+
+def test_hits_misses_and_byte_bounded_eviction():
+    embedding = np.ones(4, dtype=np.float32)
+    cache = EmbeddingCache("model", max_bytes=2 * embedding.nbytes)
+
+    assert cache.get("a") is None
+    cache.put("a", embedding)
+    cache.put("b", embedding)
+    assert cache.get("a") is not None
+    cache.put("c", embedding)
+
+    assert cache.get("b") is None
+    assert cache.get("a") is not None and cache.get("c") is not None
+    stats = cache.stats()
+    assert stats["hits"] == 3 and stats["misses"] == 2 and stats["evictions"] == 1
+    assert stats["entries"] == 2 and stats["bytes"] == 2 * embedding.nbytes
+    assert stats["hit_rate"] == pytest.approx(0.6)
+
+def test_cached_embeddings_are_read_only():
+    cache = EmbeddingCache("model")
+    cache.put("a", np.zeros(4, dtype=np.float32))
+    with pytest.raises(ValueError):
+        cache.get("a")[0] = 1
+
+def test_disk_store_survives_a_restart(tmp_path):
+    embedding = np.arange(4, dtype=np.float32)
+    EmbeddingCache("model", path=str(tmp_path)).put("ab12", embedding)
+
+    restarted = EmbeddingCache("model", path=str(tmp_path))
+    np.testing.assert_array_equal(restarted.get("ab12"), embedding)
+    assert restarted.get("ab12") is not None
+    stats = restarted.stats()
+    assert stats["disk_hits"] == 1 and stats["hits"] == 2 and stats["misses"] == 0
+
+def test_negative_size_is_rejected():
+    with pytest.raises(ValueError):
+        EmbeddingCache("model", max_bytes=-1)
+
+def test_repeated_audio_skips_the_model(voiceprint, stub_model):
+    clip = voice(1.0, 170)
+    first = voiceprint._encode_signals([clip, clip.clone()])
+    assert stub_model.batch_sizes == [1]
+    np.testing.assert_array_equal(first[0], first[1])
+
+    # The same recording in another container is a cache hit
+    data = wav_bytes(clip)
+    pcm = np.frombuffer(data[44:], dtype="<i2").copy()
+    second = voiceprint._encode_signals([voiceprint.load_audio(data)])
+    third = voiceprint._encode_signals([voiceprint.load_audio(pcm)])
+    assert stub_model.batch_sizes == [1, 1]
+    np.testing.assert_array_equal(second, third)
+    assert voiceprint.embedding_cache.stats()["hits"] >= 1
@@ -0,0 +1,128 @@
+import asyncio
+
+import numpy as np
+import pytest
+from wyoming.asr import Transcript
+from wyoming.audio import AudioChunk, AudioStart
+
+from helpers import stub_embedding, voice, wav_bytes
+from voiceprint.pooling import pool_embeddings
+from voiceprint.scheduler import SchedulerFullError
+from wyoming_voiceprint.handler import WyomingEventHandler
+
+RATE = 16000
+
+@pytest.fixture
+def enrolled(voiceprint):
+    voiceprint.create_library("test")
+    voiceprint.enroll_from_arrays("low", [wav_bytes(voice(1.5, 110, seed=i)) for i in range(2)])
+    voiceprint.enroll_from_arrays("high", [wav_bytes(voice(1.5, 240, seed=i)) for i in range(2)])
+    return voiceprint
+
+class RecordingScheduler:
+    """Wraps the Voiceprint scheduler, recording the length of every signal queued and failing on request."""
+
+    def __init__(self, scheduler, reject: int = 0):
+        self.scheduler = scheduler
+        self.lengths = []
+        self.reject = reject
+
+    def submit(self, signal):
+        if self.reject:
+            self.reject -= 1
+            raise SchedulerFullError("Too many requests are waiting for the model")
+        self.lengths.append(signal.shape[-1])
+        return self.scheduler.submit(signal)
+
+    def __getattr__(self, name):
+        return getattr(self.scheduler, name)
+
+def make_handler(voiceprint, **kwargs):
+    handler = WyomingEventHandler(None, None, voiceprint=voiceprint, **kwargs)
+    handler.events = []
+
+    async def write_event(event):
+        handler.events.append(event)
+
+    handler.write_event = write_event
+    return handler
+
+def pcm(signal) -> bytes:
+    return (np.clip(signal.numpy(), -1, 1) * 32767).astype("<i2").tobytes()
+
+async def send_utterance(handler, audio: bytes, chunk_bytes: int = 3200):
+    await handler.handle_event(AudioStart(rate=RATE, width=2, channels=1).event())
+    for start in range(0, len(audio), chunk_bytes):
+        await handler.handle_event(AudioChunk(rate=RATE, width=2, channels=1, audio=audio[start:start + chunk_bytes]).event())
+    await handler.handle_event(Transcript(text="hello").event())
+    return handler.events[-1].data["ext"]["speaker_id"]
+
+def test_utterances_are_embedded_whole_by_default(enrolled, monkeypatch):
+    scheduler = RecordingScheduler(enrolled.scheduler)
+    monkeypatch.setattr(enrolled, "scheduler", scheduler)
+    handler = make_handler(enrolled)
+
+    assert asyncio.run(send_utterance(handler, pcm(voice(2.2, 240, seed=7)))) == "high"
+    assert scheduler.lengths == [int(2.2 * RATE)]
+    assert not handler._windows and len(handler._audio) == 0
+
+def test_windows_are_embedded_while_audio_streams_in(enrolled, monkeypatch):
+    scheduler = RecordingScheduler(enrolled.scheduler)
+    monkeypatch.setattr(enrolled, "scheduler", scheduler)
+    handler = make_handler(enrolled, window_seconds=0.5, min_tail_seconds=0.25)
+    clip = voice(1.8, 110, seed=7)
+
+    async def run():
+        identified = await send_utterance(handler, pcm(clip[:int(1.6 * RATE)]))
+        # A 0.1s tail is dropped, a 0.3s one is embedded after the windows
+        assert scheduler.lengths == [8000, 8000, 8000]
+        scheduler.lengths.clear()
+        assert await send_utterance(handler, pcm(clip)) == identified
+        return identified
+
+    assert asyncio.run(run()) == "low"
+    assert scheduler.lengths == [8000, 8000, 8000, 4800]
+
+def test_pooled_embedding_matches_the_windows(enrolled):
+    handler = make_handler(enrolled, window_seconds=0.5)
+    clip = voice(1.5, 240, seed=7)
+    decoded = enrolled.load_audio(np.frombuffer(pcm(clip), dtype="<i2").copy())
+
+    async def run():
+        await handler.handle_event(AudioStart(rate=RATE, width=2, channels=1).event())
+        await handler.handle_event(AudioChunk(rate=RATE, width=2, channels=1, audio=pcm(clip)).event())
+        return await handler._embed_utterance()
+
+    windows = np.stack([stub_embedding(decoded[start:start + 8000]) for start in (0, 8000, 16000)])
+    np.testing.assert_allclose(asyncio.run(run()), pool_embeddings(windows), atol=1e-6)
+
+def test_rejected_windows_fall_back_to_the_whole_utterance(enrolled, monkeypatch):
+    scheduler = RecordingScheduler(enrolled.scheduler, reject=1)
+    monkeypatch.setattr(enrolled, "scheduler", scheduler)
+    handler = make_handler(enrolled, window_seconds=0.5)
+
+    assert asyncio.run(send_utterance(handler, pcm(voice(1.6, 240, seed=7)))) == "high"
+    # Windows stop once one is turned away, and the utterance is embedded whole
+    assert scheduler.lengths[-1] == int(1.6 * RATE)
+    assert not handler._streaming_failed
+
+def test_audio_start_drops_the_previous_utterance(enrolled, monkeypatch):
+    scheduler = RecordingScheduler(enrolled.scheduler)
+    monkeypatch.setattr(enrolled, "scheduler", scheduler)
+    handler = make_handler(enrolled, window_seconds=0.5)
+
+    async def run():
+        await handler.handle_event(AudioStart(rate=RATE, width=2, channels=1).event())
+        await handler.handle_event(AudioChunk(rate=RATE, width=2, channels=1, audio=pcm(voice(1.2, 110))).event())
+        assert len(handler._windows) == 2
+        return await send_utterance(handler, pcm(voice(0.4, 240, seed=7)))
+
+    assert asyncio.run(run()) == "high"
+    assert scheduler.lengths[-1] == int(0.4 * RATE)
+    assert handler.events[0].data["ext"]["speaker_id"] == "unknown"
+
+def test_transcript_without_audio_is_forwarded(enrolled):
+    handler = make_handler(enrolled)
+    event = Transcript(text="hello").event()
+    asyncio.run(handler.handle_event(event))
+    assert handler.events == [event]
@@ -0,0 +1,54 @@
+import numpy as np
+import pytest
+
+from helpers import voice, write_wav
+from voiceprint.library import Library
+
+PITCHES = {"low": 110, "mid": 170, "high": 240}
+
+@pytest.fixture
+def enrolled(voiceprint, tmp_path):
+    voiceprint.create_library("test")
+    for name, pitch in PITCHES.items():
+        paths = [write_wav(tmp_path / f"{name}{i}.wav", voice(1.0, pitch, seed=i)) for i in range(2)]
+        voiceprint.enroll_speaker(name, paths)
+    return voiceprint
+
+def test_batch_answers_each_clip_in_order(enrolled, tmp_path):
+    names = ["high", "low", "mid", "low"]
+    paths = [
+        write_wav(tmp_path / f"query{i}.wav", voice(0.8 + 0.3 * i, PITCHES[name], seed=10 + i))
+        for i, name in enumerate(names)
+    ]
+
+    batch = enrolled.identify_speakers_batch(paths, limit=2)
+    assert [response["speakers"][0]["id"] for response in batch] == names
+    for path, response in zip(paths, batch):
+        single = enrolled.identify_speaker(path, limit=2)
+        assert [s["id"] for s in single["speakers"]] == [s["id"] for s in response["speakers"]]
+        np.testing.assert_allclose(
+            [s["similarity"] for s in single["speakers"]], [s["similarity"] for s in response["speakers"]], atol=1e-5
+        )
+
+def test_batch_edge_cases(enrolled, tmp_path):
+    assert enrolled.identify_speakers_batch([]) == []
+    with pytest.raises(FileNotFoundError):
+        enrolled.identify_speakers_batch([str(tmp_path / "missing.wav")])
+
+    # A voice nobody enrolled
+    path = write_wav(tmp_path / "query.wav", voice(1.0, 140))
+    with pytest.raises(ValueError):
+        enrolled.identify_speakers_batch([path], threshold=1.5)
+    assert enrolled.identify_speakers_batch([path], threshold=0.99) == [{"speakers": []}]
+
+def test_score_batch_rows_match_single_queries():
+    library = Library.create("test")
+    rng = np.random.default_rng(0)
+    for i in range(20):
+        library.add_speaker(f"speaker{i}", rng.standard_normal(8).astype(np.float32))
+    queries = rng.standard_normal((5, 8)).astype(np.float32)
+
+    for query, ranked in zip(queries, library.score_batch(queries, threshold=0.4, limit=3)):
+        single = library.score(query, threshold=0.4, limit=3)
+        assert [speaker.id for speaker, _ in ranked] == [speaker.id for speaker, _ in single]
+        np.testing.assert_allclose([s for _, s in ranked], [s for _, s in single], atol=1e-6)
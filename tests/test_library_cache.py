@@ -0,0 +1,66 @@
+import numpy as np
+
+from voiceprint import storage
+from voiceprint.library import Library
+from voiceprint.library_cache import LibraryCache
+
+def make_library(name: str, speakers: int = 1) -> Library:
+    library = Library.create(name)
+    for i in range(speakers):
+        library.add_speaker(f"speaker{i}", np.random.default_rng(i).standard_normal(8).astype(np.float32))
+    return library
+
+def test_least_recently_used_library_is_evicted():
+    cache = LibraryCache(max_libraries=2)
+    a, b, c = make_library("a"), make_library("b"), make_library("c")
+    cache.put(a, [1])
+    cache.put(b, [1])
+    assert cache.get("a", [1]) is a
+    cache.put(c, [1])
+
+    assert cache.get("b", [1]) is None
+    assert cache.get("a", [1]) is a and cache.get("c", [1]) is c
+    stats = cache.stats()
+    assert stats["evictions"] == 1 and stats["libraries"] == 2
+    assert stats["hits"] == 3 and stats["misses"] == 1
+
+def test_byte_bound_keeps_at_least_the_newest_library():
+    big = make_library("big", speakers=20)
+    cache = LibraryCache(max_libraries=10, max_bytes=big.nbytes)
+    cache.put(make_library("small"), [1])
+    cache.put(big, [1])
+    assert cache.stats()["libraries"] == 1 and cache.get("big", [1]) is big
+
+    cache.put(make_library("bigger", speakers=40), [1])
+    assert cache.stats()["libraries"] == 1 and cache.get("bigger", [1]) is not None
+    assert cache.stats()["bytes"] > cache.max_bytes
+
+def test_changed_signature_invalidates_the_entry():
+    cache = LibraryCache()
+    library = make_library("a")
+    cache.put(library, [10, 100])
+
+    assert cache.get("a", [11, 100]) is None
+    # The stale entry is gone even for the old signature
+    assert cache.get("a", [10, 100]) is None
+    stats = cache.stats()
+    assert stats["invalidations"] == 1 and stats["misses"] == 2 and stats["bytes"] == 0
+
+def test_discard_forgets_the_library():
+    cache = LibraryCache()
+    cache.put(make_library("a"), [1])
+    cache.discard("a")
+    cache.discard("missing")
+    assert cache.get("a", [1]) is None and cache.stats()["bytes"] == 0
+
+def test_get_library_rereads_files_changed_by_another_process(voiceprint):
+    library = voiceprint.create_library("test")
+    assert voiceprint.get_library(library.id) is voiceprint.get_library(library.id)
+
+    # Another process snapshots the library with one more speaker
+    updated = make_library("test", speakers=3)
+    storage.write_library(updated, voiceprint._get_library_path(library.id))
+
+    reread = voiceprint.get_library(library.id)
+    assert [speaker.id for speaker in reread.speakers] == ["speaker0", "speaker1", "speaker2"]
+    assert voiceprint.library_cache.stats()["invalidations"] >= 1
@@ -0,0 +1,68 @@
+import io
+
+import numpy as np
+import pytest
+import torch
+
+from helpers import voice, wav_bytes, write_wav
+
+@pytest.fixture
+def clip():
+    # Round trip through 16-bit PCM so every input form carries exactly the same samples
+    pcm = (np.clip(voice(0.5, 150).numpy(), -1, 1) * 32767).astype(np.int16)
+    return torch.from_numpy(pcm.astype(np.float32) / 32768)
+
+def test_every_input_form_decodes_to_the_same_waveform(voiceprint, clip, tmp_path):
+    path = write_wav(tmp_path / "clip.wav", clip)
+    data = wav_bytes(clip)
+    pcm = (clip * 32768).numpy().astype(np.int16)
+
+    inputs = {
+        "path": path,
+        "bytes": data,
+        "bytearray": bytearray(data),
+        "stream": io.BytesIO(data),
+        "int16 array": pcm,
+        "float array": clip.numpy(),
+        "tensor": clip,
+        "stereo bytes": wav_bytes(clip, channels=2),
+        "channels-first array": np.stack([pcm, pcm]),
+    }
+    for name, audio in inputs.items():
+        signal = voiceprint.load_audio(audio)
+        assert signal.dtype == torch.float32 and signal.dim() == 1, name
+        torch.testing.assert_close(signal, clip, atol=1e-4, rtol=0, msg=name)
+
+def test_unsigned_8_bit_pcm_is_centered(voiceprint):
+    signal = voiceprint.load_audio(np.tile(np.array([0, 128, 255], dtype=np.uint8), 256))
+    torch.testing.assert_close(signal, torch.tensor([-1.0, 0.0, 127 / 128]).repeat(256))
+
+def test_empty_and_too_short_audio_are_rejected(voiceprint):
+    voiceprint.create_library("test")
+    for audio in [np.zeros(0, dtype=np.float32), wav_bytes(torch.zeros(0)), voice(0.02, 150)]:
+        with pytest.raises(ValueError):
+            voiceprint.load_audio(audio)
+    with pytest.raises(ValueError, match="too short"):
+        voiceprint.scheduler.submit(voice(0.02, 150))
+    with pytest.raises(ValueError, match="empty"):
+        voiceprint._encode_signals([voice(0.5, 150), torch.zeros(0)])
+    assert voiceprint.load_audio(voice(0.04, 150)).shape == (640,)
+
+def test_missing_file_and_bad_shape_are_rejected(voiceprint, tmp_path):
+    with pytest.raises(FileNotFoundError):
+        voiceprint.load_audio(str(tmp_path / "missing.wav"))
+    with pytest.raises(ValueError):
+        voiceprint.load_audio(np.zeros((2, 2, 2), dtype=np.float32))
+
+def test_identify_from_memory_matches_identify_from_file(voiceprint, tmp_path):
+    voiceprint.create_library("test")
+    voiceprint.enroll_from_arrays("low", [wav_bytes(voice(1.0, 110, seed=i)) for i in range(2)])
+    voiceprint.enroll_from_arrays("high", [voice(1.0, 240, seed=i).numpy() for i in range(2)])
+
+    query = voice(1.0, 240, seed=5)
+    from_file = voiceprint.identify_speaker(write_wav(tmp_path / "query.wav", query))
+    from_memory = voiceprint.identify_from_array(wav_bytes(query))
+    assert [s["id"] for s in from_memory["speakers"]] == [s["id"] for s in from_file["speakers"]] == ["high", "low"]
+    np.testing.assert_allclose(
+        [s["similarity"] for s in from_memory["speakers"]], [s["similarity"] for s in from_file["speakers"]], atol=1e-6
+    )
@@ -0,0 +1,58 @@
+import copy
+import logging
+
+import pytest
+import torch
+
+from helpers import tiny_ecapa, voice
+from voiceprint import model_quantization
+from voiceprint.model_quantization import evaluate_quantization, quantize_model
+
+def test_only_pointwise_convolutions_are_quantized():
+    float_model = tiny_ecapa()
+    quantized = quantize_model(copy.deepcopy(float_model))
+
+    convs = [m for m in float_model.mods.embedding_model.modules() if isinstance(m, torch.nn.Conv1d)]
+    remaining = [m for m in quantized.mods.embedding_model.modules() if isinstance(m, torch.nn.Conv1d)]
+    assert remaining and all(conv.kernel_size[0] > 1 for conv in remaining)
+    assert len(convs) - len(remaining) == sum(conv.kernel_size == (1,) for conv in convs)
+    assert any(isinstance(m, torch.ao.nn.quantized.dynamic.Linear) for m in quantized.mods.embedding_model.modules())
+
+def test_report_compares_embeddings_speed_and_memory():
+    float_model = tiny_ecapa()
+    quantized = quantize_model(copy.deepcopy(float_model))
+    clips = [voice(1.0 + 0.5 * i, 110 + 40 * i, seed=i) for i in range(3)]
+
+    report = evaluate_quantization(float_model, quantized, clips)
+    assert report["clips"] == 3
+    assert report["min_cosine"] > 0.95
+    assert report["quantized_bytes"] < report["float_bytes"]
+    assert report["speedup"] == pytest.approx(
+        report["float_seconds_per_clip"] / report["quantized_seconds_per_clip"]
+    )
+    for key in ("float_peak_rss_bytes", "quantized_peak_rss_bytes"):
+        assert report[key] is None or report[key] > 0
+
+    with pytest.raises(ValueError):
+        evaluate_quantization(float_model, quantized, [])
+
+def test_no_speedup_is_reported(monkeypatch, caplog):
+    model = tiny_ecapa()
+    timings = iter([0.01, 0.02])
+    real_embed = model_quantization._embed
+
+    def slow_embed(model, clips):
+        embeddings, _, peak = real_embed(model, clips)
+        return embeddings, next(timings), peak
+
+    monkeypatch.setattr(model_quantization, "_embed", slow_embed)
+    with caplog.at_level(logging.WARNING):
+        report = evaluate_quantization(model, model, [voice(1.0, 150)])
+    assert report["speedup"] == pytest.approx(0.5)
+    assert "not faster" in caplog.text
+
+def test_evaluation_needs_recordings(tmp_path):
+    with pytest.raises(SystemExit):
+        model_quantization.main([])
+    with pytest.raises(SystemExit):
+        model_quantization.main([str(tmp_path)])
@@ -0,0 +1,54 @@
+import numpy as np
+import pytest
+
+from voiceprint.library import Library
+from voiceprint.quantization import PRECISIONS, dequantize, dot_rows, measure_precision, quantize, storage_dtype
+from voiceprint.speaker import Speaker
+
+def vectors(n: int = 64, dim: int = 192, seed: int = 0) -> np.ndarray:
+    return np.random.default_rng(seed).standard_normal((n, dim)).astype(np.float32)
+
+@pytest.mark.parametrize("precision, tolerance", [("float32", 0.0), ("float16", 1e-3), ("int8", 1e-2)])
+def test_round_trip(precision, tolerance):
+    matrix = vectors()
+    values, scales = quantize(matrix, precision)
+    assert values.dtype == storage_dtype(precision)
+    assert (scales is not None) == (precision == "int8")
+
+    restored = dequantize(values, scales)
+    relative = np.abs(restored - matrix).max(axis=1) / np.abs(matrix).max(axis=1)
+    assert relative.max() <= tolerance
+
+def test_int8_zero_rows_survive():
+    values, scales = quantize(np.zeros((2, 8), dtype=np.float32), "int8")
+    np.testing.assert_array_equal(dequantize(values, scales), 0)
+
+def test_dot_rows_matches_float_product_across_blocks(monkeypatch):
+    monkeypatch.setattr("voiceprint.quantization.SCORE_BLOCK_ROWS", 7)
+    matrix, queries = vectors(50), vectors(3, seed=1)
+    for precision in PRECISIONS:
+        values, scales = quantize(matrix, precision)
+        np.testing.assert_allclose(dot_rows(queries, values, scales), queries @ dequantize(values, scales).T, rtol=1e-5, atol=1e-4)
+
+@pytest.mark.parametrize("precision", PRECISIONS)
+def test_measure_precision(precision):
+    report = measure_precision(vectors(), precision)
+    assert report["precision"] == precision
+    assert report["max_abs_error"] < 0.01
+    assert report["top1_agreement"] == 1.0
+
+@pytest.mark.parametrize("precision", ["float16", "int8"])
+def test_library_precision_round_trip(precision):
+    library = Library.create("quantized")
+    for i, vector in enumerate(vectors(16)):
+        library.put_speaker(Speaker.create(f"speaker{i}", vector))
+    queries = vectors(4, seed=1)
+    expected = [[s.id for s, _ in row] for row in library.score_batch(queries, limit=1)]
+
+    library.set_precision(precision)
+    assert library.precision == precision
+    assert [[s.id for s, _ in row] for row in library.score_batch(queries, limit=1)] == expected
+
+    restored = Library.from_dict(library.to_dict())
+    assert restored.precision == precision
+    np.testing.assert_allclose(restored.embedding_matrix, library.embedding_matrix, atol=1e-2)
@@ -0,0 +1,97 @@
+import numpy as np
+import pytest
+
+from helpers import voice, wav_bytes
+from voiceprint.library import Library
+
+DIM = 8
+
+def unit_rows(n: int, seed: int) -> np.ndarray:
+    rows = np.random.default_rng(seed).standard_normal((n, DIM)).astype(np.float32)
+    return rows / np.linalg.norm(rows, axis=1, keepdims=True)
+
+def make_library() -> Library:
+    library = Library.create("test")
+    for i in range(4):
+        samples = unit_rows(3, seed=i)
+        library.add_speaker(f"speaker{i}", samples.mean(axis=0), samples=samples)
+    # A speaker enrolled without samples is scored against their centroid in every mode
+    library.add_speaker("centroid only", unit_rows(1, seed=9)[0])
+    return library
+
+def test_added_samples_update_the_centroid():
+    library = make_library()
+    extra = unit_rows(2, seed=20)
+    speaker = library.add_samples("speaker1", extra)
+
+    expected = np.concatenate([unit_rows(3, seed=1), extra])
+    assert speaker.sample_count == 5
+    np.testing.assert_allclose(speaker.embeddings, expected.mean(axis=0), atol=1e-6)
+    np.testing.assert_array_equal(library.get_speaker("speaker1").samples, expected)
+
+    # The centroid row used for scoring follows the update
+    query = expected.mean(axis=0)
+    assert library.score(query, limit=1)[0][0].id == "speaker1"
+
+    with pytest.raises(ValueError):
+        library.add_samples("missing", extra)
+    with pytest.raises(ValueError):
+        library.add_samples("speaker1", unit_rows(1, seed=0)[:, :4])
+
+@pytest.mark.parametrize("mode", ["max", "mean"])
+def test_per_sample_modes_match_brute_force(mode):
+    library = make_library()
+    queries = unit_rows(6, seed=30)
+
+    for query, ranked in zip(queries, library.score_batch(queries, mode=mode)):
+        expected = {}
+        for speaker in library.speakers:
+            samples = speaker.samples if speaker.samples is not None else speaker.embeddings[np.newaxis, :]
+            samples = samples / np.linalg.norm(samples, axis=1, keepdims=True)
+            cosine = samples @ query
+            expected[speaker.id] = (1 + (cosine.max() if mode == "max" else cosine.mean())) / 2
+
+        assert [speaker.id for speaker, _ in ranked] == sorted(expected, key=expected.get, reverse=True)
+        np.testing.assert_allclose([score for _, score in ranked], sorted(expected.values(), reverse=True), atol=1e-5)
+
+def test_unknown_mode_is_rejected():
+    with pytest.raises(ValueError, match="Unsupported scoring mode"):
+        make_library().score(unit_rows(1, seed=0)[0], mode="median")
+
+def test_added_samples_survive_a_reload(voiceprint):
+    library = voiceprint.create_library("test")
+    voiceprint.enroll_from_arrays("mid", [wav_bytes(voice(1.0, 170, seed=i)) for i in range(2)])
+    speaker = voiceprint.add_samples("mid", [wav_bytes(voice(1.0, 170, seed=5))])
+    assert speaker.sample_count == 3
+
+    # Read the snapshot and replay the journal from disk
+    voiceprint.library_cache.discard(library.id)
+    reloaded = voiceprint.get_library(library.id).get_speaker("mid")
+    assert reloaded.sample_count == 3
+    np.testing.assert_allclose(reloaded.embeddings, speaker.embeddings, atol=1e-6)
+    np.testing.assert_allclose(reloaded.samples, speaker.samples, atol=1e-6)
+
+    with pytest.raises(ValueError):
+        voiceprint.add_samples("missing", [wav_bytes(voice(1.0, 170))])
+    with pytest.raises(ValueError):
+        voiceprint.add_samples("mid", [])
+
+@pytest.mark.parametrize("precision, atol", [("float16", 1e-3), ("int8", 1e-2)])
+def test_samples_are_stored_at_the_library_precision(precision, atol):
+    float_library = make_library()
+    library = make_library()
+    library.set_precision(precision)
+    library.add_samples("speaker1", unit_rows(2, seed=20))
+    float_library.add_samples("speaker1", unit_rows(2, seed=20))
+
+    for speaker, float_speaker in zip(library.speakers, float_library.speakers):
+        if float_speaker.samples is None:
+            assert speaker.stored_samples is None
+            continue
+        values, scales = speaker.stored_samples
+        assert values.dtype == precision and (scales is not None) == (precision == "int8")
+        np.testing.assert_allclose(speaker.samples, float_speaker.samples, atol=atol)
+    assert library.nbytes < float_library.nbytes
+
+    library.set_precision("float32")
+    assert library.get_speaker("speaker1").stored_samples[0].dtype == np.float32
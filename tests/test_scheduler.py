@@ -0,0 +1,121 @@
+import threading
+
+import numpy as np
+import pytest
+import torch
+
+from voiceprint.scheduler import EmbeddingScheduler, SchedulerFullError
+
+def encode_lengths(signals):
+    """Embed each signal as its length, so callers can check they got their own row."""
+    return np.array([[signal.shape[-1]] for signal in signals], dtype=np.float32)
+
+class GatedEncoder:
+    """Encoder that holds its first batch until released, recording the size of every batch."""
+
+    def __init__(self):
+        self.started = threading.Event()
+        self.release = threading.Event()
+        self.batch_sizes = []
+
+    def __call__(self, signals):
+        self.batch_sizes.append(len(signals))
+        self.started.set()
+        self.release.wait(timeout=5)
+        return encode_lengths(signals)
+
+def test_callers_get_their_own_rows():
+    scheduler = EmbeddingScheduler(encode_lengths, max_batch_size=4, max_wait_ms=20)
+    try:
+        futures = [scheduler.submit(torch.zeros(100 + i)) for i in range(10)]
+        assert [int(future.result(timeout=5)[0][0]) for future in futures] == [100 + i for i in range(10)]
+    finally:
+        scheduler.close()
+
+def test_waiting_requests_share_a_batch():
+    encoder = GatedEncoder()
+    scheduler = EmbeddingScheduler(encoder, max_batch_size=8, max_wait_ms=0)
+    try:
+        first = scheduler.submit(torch.zeros(10))
+        assert encoder.started.wait(timeout=5)
+        # Queued while the model is busy, so they all join the next batch
+        rest = [scheduler.submit(torch.zeros(10)) for _ in range(5)]
+        encoder.release.set()
+
+        timings = [future.result(timeout=5)[1] for future in [first, *rest]]
+        assert encoder.batch_sizes == [1, 5]
+        assert [timing["batch_size"] for timing in timings] == [1, 5, 5, 5, 5, 5]
+        stats = scheduler.stats()
+        assert stats["batches"] == 2 and stats["requests"] == 6
+    finally:
+        encoder.release.set()
+        scheduler.close()
+
+def test_batches_respect_max_batch_size():
+    encoder = GatedEncoder()
+    scheduler = EmbeddingScheduler(encoder, max_batch_size=3, max_wait_ms=0)
+    try:
+        scheduler.submit(torch.zeros(10))
+        assert encoder.started.wait(timeout=5)
+        futures = [scheduler.submit(torch.zeros(10)) for _ in range(7)]
+        encoder.release.set()
+        for future in futures:
+            future.result(timeout=5)
+        assert encoder.batch_sizes == [1, 3, 3, 1]
+    finally:
+        encoder.release.set()
+        scheduler.close()
+
+def test_rejects_beyond_max_pending():
+    encoder = GatedEncoder()
+    scheduler = EmbeddingScheduler(encoder, max_batch_size=1, max_wait_ms=0, max_pending=2)
+    try:
+        scheduler.submit(torch.zeros(10))
+        assert encoder.started.wait(timeout=5)
+        waiting = [scheduler.submit(torch.zeros(10)) for _ in range(2)]
+        with pytest.raises(SchedulerFullError):
+            scheduler.submit(torch.zeros(10))
+        assert scheduler.stats()["rejected"] == 1
+
+        encoder.release.set()
+        for future in waiting:
+            future.result(timeout=5)
+    finally:
+        encoder.release.set()
+        scheduler.close()
+
+def test_encoder_errors_reach_every_caller():
+    def fail(signals):
+        raise RuntimeError("model failed")
+
+    scheduler = EmbeddingScheduler(fail, max_batch_size=4, max_wait_ms=20)
+    try:
+        futures = [scheduler.submit(torch.zeros(10)) for _ in range(3)]
+        for future in futures:
+            with pytest.raises(RuntimeError, match="model failed"):
+                future.result(timeout=5)
+    finally:
+        scheduler.close()
+
+def test_close_runs_queued_requests_and_refuses_new_ones():
+    scheduler = EmbeddingScheduler(encode_lengths, max_batch_size=2, max_wait_ms=50)
+    futures = [scheduler.submit(torch.zeros(10)) for _ in range(5)]
+    scheduler.close()
+    assert all(future.done() for future in futures)
+    with pytest.raises(RuntimeError):
+        scheduler.submit(torch.zeros(10))
+
+def test_checked_signals_fail_only_their_caller():
+    def check(signal):
+        if not len(signal):
+            raise ValueError("Audio is empty")
+
+    scheduler = EmbeddingScheduler(encode_lengths, max_wait_ms=50, check=check)
+    try:
+        future = scheduler.submit(torch.zeros(10))
+        with pytest.raises(ValueError):
+            scheduler.submit(torch.zeros(0))
+        assert future.result(timeout=5)[0][0] == 10
+        assert scheduler.stats()["pending"] == 0
+    finally:
+        scheduler.close()
@@ -0,0 +1,92 @@
+import numpy as np
+import pytest
+
+from voiceprint.library import Library
+
+DIM = 16
+
+def make_library(speakers: int, seed: int = 0) -> Library:
+    library = Library.create("test")
+    embeddings = np.random.default_rng(seed).standard_normal((speakers, DIM)).astype(np.float32)
+    for i, embedding in enumerate(embeddings):
+        library.add_speaker(f"speaker{i}", embedding)
+    return library
+
+def brute_force(library: Library, query: np.ndarray):
+    """Similarities as the original per-speaker loop computed them, best first, ties in library order."""
+    scored = []
+    for speaker in library.speakers:
+        cosine = np.dot(query, speaker.embeddings) / (np.linalg.norm(query) * np.linalg.norm(speaker.embeddings))
+        scored.append((speaker.id, max(0.0, min(1.0, (cosine + 1) / 2))))
+    scored.sort(key=lambda item: item[1], reverse=True)
+    return scored
+
+def ids_and_scores(ranked):
+    return [speaker.id for speaker, _ in ranked], np.array([similarity for _, similarity in ranked])
+
+@pytest.mark.parametrize("limit", [None, 1, 5, 49, 50, 80])
+def test_top_k_matches_a_full_sort(limit):
+    library = make_library(50)
+    query = np.random.default_rng(1).standard_normal(DIM).astype(np.float32)
+
+    expected = brute_force(library, query)[:limit]
+    ids, scores = ids_and_scores(library.score(query, limit=limit))
+    assert ids == [speaker_id for speaker_id, _ in expected]
+    np.testing.assert_allclose(scores, [similarity for _, similarity in expected], atol=1e-6)
+
+def test_threshold_is_applied_before_the_limit():
+    library = make_library(50)
+    query = np.random.default_rng(2).standard_normal(DIM).astype(np.float32)
+    expected = [item for item in brute_force(library, query) if item[1] >= 0.55]
+
+    ids, scores = ids_and_scores(library.score(query, threshold=0.55, limit=len(expected) + 10))
+    assert ids == [speaker_id for speaker_id, _ in expected]
+    assert (scores >= 0.55).all()
+    assert library.score(query, threshold=1.0) == []
+
+def test_limit_zero_and_empty_library():
+    query = np.ones(DIM, dtype=np.float32)
+    assert make_library(5).score(query, limit=0) == []
+    assert Library.create("empty").score(query) == []
+
+def test_scores_are_mapped_to_zero_one():
+    library = Library.create("test")
+    library.add_speaker("same", np.ones(DIM, dtype=np.float32))
+    library.add_speaker("opposite", -np.ones(DIM, dtype=np.float32))
+
+    ids, scores = ids_and_scores(library.score(np.ones(DIM, dtype=np.float32) * 3))
+    assert ids == ["same", "opposite"]
+    np.testing.assert_allclose(scores, [1.0, 0.0], atol=1e-6)
+
+def test_removal_keeps_rows_aligned_with_speakers():
+    library = make_library(10)
+    assert library.remove_speaker("speaker3")
+    assert not library.remove_speaker("speaker3")
+    library.add_speaker("late", np.random.default_rng(9).standard_normal(DIM).astype(np.float32))
+
+    query = np.random.default_rng(3).standard_normal(DIM).astype(np.float32)
+    ids, scores = ids_and_scores(library.score(query))
+    expected = brute_force(library, query)
+    assert ids == [speaker_id for speaker_id, _ in expected]
+    np.testing.assert_allclose(scores, [similarity for _, similarity in expected], atol=1e-6)
+
+def test_ties_keep_library_order():
+    library = Library.create("test")
+    for name in ["b", "a", "c"]:
+        library.add_speaker(name, np.ones(DIM, dtype=np.float32))
+
+    ids, _ = ids_and_scores(library.score(np.ones(DIM, dtype=np.float32)))
+    assert ids == ["b", "a", "c"]
+
+def test_ties_at_the_limit_keep_library_order():
+    library = Library.create("test")
+    library.add_speaker("best", np.ones(DIM, dtype=np.float32))
+    rng = np.random.default_rng(0)
+    tied = rng.standard_normal(DIM).astype(np.float32)
+    for i in range(40):
+        library.add_speaker(f"tied{i}", tied if i % 2 == 0 else rng.standard_normal(DIM).astype(np.float32))
+
+    query = np.ones(DIM, dtype=np.float32) + tied
+    for limit in range(1, 12):
+        ids, _ = ids_and_scores(library.score(query, limit=limit))
+        assert ids == [speaker_id for speaker_id, _ in brute_force(library, query)][:limit]
@@ -0,0 +1,61 @@
+import numpy as np
+import pytest
+import torch
+
+from helpers import stub_embedding, voice
+from voiceprint.batching import segment_starts
+from voiceprint.pooling import pool_embeddings, quality_weights
+
+def test_segments_cover_the_whole_recording():
+    assert segment_starts(100, 40, 30) == [0, 30, 60]
+    # The last segment is aligned with the end rather than running past it
+    assert segment_starts(110, 40, 30) == [0, 30, 60, 70]
+    assert segment_starts(30, 40, 30) == [0]
+
+    starts = segment_starts(1000, 40, 30, max_segments=5)
+    assert starts == [0, 240, 480, 720, 960]
+    with pytest.raises(ValueError):
+        segment_starts(100, 0, 30)
+
+def test_pooling_averages_directions():
+    embeddings = np.array([[2.0, 0.0], [0.0, 0.5]], dtype=np.float32)
+    np.testing.assert_allclose(pool_embeddings(embeddings), [0.5, 0.5])
+    np.testing.assert_allclose(pool_embeddings(embeddings, np.array([3.0, 1.0])), [0.75, 0.25])
+
+    with pytest.raises(ValueError):
+        pool_embeddings(np.zeros((0, 2)))
+    with pytest.raises(ValueError):
+        pool_embeddings(embeddings, np.zeros(2))
+
+def test_quality_weights_discount_outliers():
+    agreeing = np.tile([1.0, 0.1, 0.0], (4, 1)) + np.random.default_rng(0).normal(0, 0.01, (4, 3))
+    weights = quality_weights(np.vstack([agreeing, [[0.0, 0.0, 1.0]]]))
+    assert weights[:4].min() > 0.5 and weights[4] < 0.1
+    # Nothing agrees with an all-zero consensus, so every segment counts the same
+    np.testing.assert_array_equal(quality_weights(np.array([[1.0, 0.0], [-1.0, 0.0]])), [1.0, 1.0])
+
+def test_long_clips_are_embedded_in_batched_segments(tmp_path, stub_model):
+    from voiceprint.voiceprint import Voiceprint
+
+    voiceprint = Voiceprint(
+        libs_path=str(tmp_path / "libs"),
+        long_audio_seconds=2.0,
+        segment_seconds=1.0,
+        segment_overlap_seconds=0.5,
+        segment_batch_size=2
+    )
+    try:
+        clip = voice(3.0, 170)
+        embedding = voiceprint._encode_signals([clip])[0]
+        assert stub_model.batch_sizes == [2, 2, 1]
+
+        segments = torch.stack([stub_embedding(clip[start:start + 16000]) for start in range(0, 40000, 8000)]).numpy()
+        expected = pool_embeddings(segments)
+        expected *= np.linalg.norm(segments, axis=1).mean() / np.linalg.norm(expected)
+        np.testing.assert_allclose(embedding, expected, atol=1e-6)
+
+        # Clips up to the limit are still embedded whole
+        short = voice(1.5, 170)
+        np.testing.assert_allclose(voiceprint._encode_signals([short])[0], stub_embedding(short), atol=1e-6)
+    finally:
+        voiceprint.scheduler.close()
@@ -0,0 +1,175 @@
+import json
+import os
+import threading
+
+import numpy as np
+import pytest
+
+from voiceprint import storage
+from voiceprint.catalog import LibraryCatalog
+from voiceprint.library import Library
+from voiceprint.quantization import quantize
+from voiceprint.speaker import Speaker
+
+DIM = 8
+
+def make_speaker(name: str, seed: int, count: int = 2) -> Speaker:
+    samples = np.random.default_rng(seed).standard_normal((count, DIM)).astype(np.float32)
+    return Speaker.create(name, samples.mean(axis=0), samples)
+
+def make_library(tmp_path, library_format: storage.LibraryFormat = "json", speakers: int = 2):
+    library = Library.create("test")
+    for i in range(speakers):
+        library.put_speaker(make_speaker(f"speaker{i}", seed=i))
+    lib_path = os.path.join(tmp_path, f"{library.id}.json")
+    storage.write_library(library, lib_path, library_format)
+    return library, lib_path
+
+def reread(lib_path: str) -> Library:
+    library = storage.read_library(lib_path)
+    storage.replay_journal(library, lib_path)
+    return library
+
+def test_replay_applies_adds_removes_and_samples(tmp_path):
+    library, lib_path = make_library(tmp_path)
+    added = make_speaker("new", seed=10)
+    new_samples = np.ones((3, DIM), dtype=np.float32)
+
+    storage.append_journal(lib_path, {"op": "add", "speaker": added.to_dict()})
+    storage.append_journal(lib_path, {"op": "remove", "speaker_id": "speaker0"})
+    storage.append_journal(lib_path, {
+        "op": "samples", "speaker_id": "speaker1", "samples": new_samples.tolist(), "sample_count": 2
+    })
+
+    replayed = reread(lib_path)
+    assert [speaker.id for speaker in replayed.speakers] == ["speaker1", "new"]
+    assert replayed.get_speaker("speaker1").sample_count == 5
+    expected = library.get_speaker("speaker1").with_samples(new_samples)
+    np.testing.assert_allclose(replayed.get_speaker("speaker1").embeddings, expected.embeddings, rtol=1e-6)
+
+def test_replay_skips_partial_lines(tmp_path):
+    _, lib_path = make_library(tmp_path)
+    storage.append_journal(lib_path, {"op": "remove", "speaker_id": "speaker0"})
+    # A crash in the middle of an append leaves an unterminated line
+    with open(storage.get_journal_path(lib_path), "ab") as f:
+        f.write(b'{"op": "remove", "speaker_')
+    storage.append_journal(lib_path, {"op": "add", "speaker": make_speaker("late", seed=20).to_dict()})
+
+    entries = storage.read_journal(lib_path)
+    assert [entry["op"] for entry in entries] == ["remove", "add"]
+    assert [speaker.id for speaker in reread(lib_path).speakers] == ["speaker1", "late"]
+
+def test_replay_ignores_samples_with_mismatched_count(tmp_path):
+    library, lib_path = make_library(tmp_path)
+    stale = {"op": "samples", "speaker_id": "speaker0", "samples": np.ones((1, DIM)).tolist(), "sample_count": 7}
+    storage.append_journal(lib_path, stale)
+
+    replayed = reread(lib_path)
+    assert replayed.get_speaker("speaker0").sample_count == 2
+    np.testing.assert_array_equal(replayed.get_speaker("speaker0").embeddings, library.get_speaker("speaker0").embeddings)
+
+def test_replay_on_snapshot_that_contains_the_entries(tmp_path):
+    library, lib_path = make_library(tmp_path)
+    speaker = library.add_samples("speaker0", np.ones((2, DIM), dtype=np.float32))
+    storage.append_journal(lib_path, {
+        "op": "samples", "speaker_id": "speaker0", "samples": np.ones((2, DIM)).tolist(), "sample_count": 2
+    })
+    storage.append_journal(lib_path, {"op": "remove", "speaker_id": "missing"})
+    storage.append_journal(lib_path, {"op": "add", "speaker": library.get_speaker("speaker1").to_dict()})
+    # The snapshot was written after the entries, as if a crash hit before the journal was cleared
+    storage.write_library(library, lib_path)
+
+    replayed = reread(lib_path)
+    assert [s.id for s in replayed.speakers] == ["speaker0", "speaker1"]
+    assert replayed.get_speaker("speaker0").sample_count == speaker.sample_count
+
+@pytest.mark.parametrize("precision", ["float32", "float16", "int8"])
+def test_npy_round_trip_with_journal(tmp_path, precision):
+    library, lib_path = make_library(tmp_path)
+    library.set_precision(precision)
+    storage.write_library(library, lib_path, "npy")
+    storage.append_journal(lib_path, {"op": "remove", "speaker_id": "speaker0"})
+
+    with open(lib_path, "r", encoding="utf-8") as f:
+        assert json.load(f)["format"] == "npy"
+    replayed = reread(lib_path)
+    assert replayed.precision == precision
+    assert [s.id for s in replayed.speakers] == ["speaker1"]
+    assert replayed.get_speaker("speaker1").sample_count == 2
+    assert np.load(storage.get_samples_path(lib_path)).dtype == precision
+    assert os.path.exists(storage.get_sample_scales_path(lib_path)) == (precision == "int8")
+    np.testing.assert_array_equal(
+        replayed.get_speaker("speaker1").samples, library.get_speaker("speaker1").samples
+    )
+
+def test_float32_samples_of_older_snapshots_are_converted(tmp_path):
+    library, lib_path = make_library(tmp_path)
+    storage.write_library(library, lib_path, "npy")
+    with open(lib_path, "r", encoding="utf-8") as f:
+        header = json.load(f)
+    header["precision"] = "int8"
+    with open(lib_path, "w", encoding="utf-8") as f:
+        json.dump(header, f)
+    embeddings, scales = quantize(library.stack_embeddings(), "int8")
+    np.save(storage.get_embeddings_path(lib_path), embeddings)
+    np.save(storage.get_scales_path(lib_path), scales)
+
+    converted = reread(lib_path)
+    values, sample_scales = converted.get_speaker("speaker0").stored_samples
+    assert values.dtype == np.int8 and len(sample_scales) == 2
+    np.testing.assert_allclose(
+        converted.get_speaker("speaker0").samples, library.get_speaker("speaker0").samples, atol=1e-2
+    )
+
+def test_unknown_operation_is_rejected(tmp_path):
+    library, lib_path = make_library(tmp_path)
+    storage.append_journal(lib_path, {"op": "rename"})
+    with pytest.raises(ValueError):
+        storage.replay_journal(library, lib_path)
+
+def test_clear_journal(tmp_path):
+    _, lib_path = make_library(tmp_path)
+    storage.append_journal(lib_path, {"op": "remove", "speaker_id": "speaker0"})
+    storage.clear_journal(lib_path)
+    assert storage.read_journal(lib_path) == []
+    assert len(reread(lib_path).speakers) == 2
+
+def test_concurrent_snapshots_never_share_a_temp_file(tmp_path):
+    library, lib_path = make_library(tmp_path)
+    errors = []
+
+    def write():
+        try:
+            for _ in range(5):
+                storage.write_library(library, lib_path, "npy")
+        except Exception as e:
+            errors.append(e)
+
+    threads = [threading.Thread(target=write) for _ in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert errors == []
+    assert not [name for name in os.listdir(tmp_path) if name.endswith(".tmp")]
+    assert len(reread(lib_path).speakers) == 2
+
+def test_catalog_counts_the_journal_and_sidecars(tmp_path):
+    library, lib_path = make_library(tmp_path)
+    library.set_precision("int8")
+    storage.write_library(library, lib_path, "npy")
+    storage.append_journal(lib_path, {"op": "remove", "speaker_id": "speaker0"})
+    os.utime(storage.get_scales_path(lib_path), ns=(0, 2 * 10**18))
+
+    files = [lib_path, storage.get_journal_path(lib_path), storage.get_embeddings_path(lib_path),
+             storage.get_scales_path(lib_path), storage.get_samples_path(lib_path),
+             storage.get_sample_scales_path(lib_path)]
+    summary = LibraryCatalog(str(tmp_path)).update(library, lib_path)
+    assert summary["size"] == sum(os.path.getsize(path) for path in files)
+    assert summary["mtime"] == 2e9
+
+    storage.write_library(library, lib_path, "json")
+    storage.clear_journal(lib_path)
+    summary = LibraryCatalog(str(tmp_path)).update(library, lib_path)
+    assert summary["size"] == os.path.getsize(lib_path)
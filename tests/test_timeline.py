@@ -0,0 +1,38 @@
+import pytest
+import torch
+
+from helpers import voice, wav_bytes
+
+@pytest.fixture
+def enrolled(voiceprint):
+    voiceprint.create_library("test")
+    voiceprint.enroll_from_arrays("low", [wav_bytes(voice(1.5, 110, seed=i)) for i in range(2)])
+    voiceprint.enroll_from_arrays("high", [wav_bytes(voice(1.5, 240, seed=i)) for i in range(2)])
+    return voiceprint
+
+def test_turns_become_contiguous_segments(enrolled):
+    audio = torch.cat([voice(3.0, 110, seed=5), voice(3.0, 240, seed=6)])
+    timeline = enrolled.identify_timeline(audio, window_seconds=1.5, hop_seconds=0.75)
+
+    assert timeline["duration"] == 6.0
+    segments = timeline["segments"]
+    assert [segment["speaker"]["id"] for segment in segments] == ["low", "high"]
+    assert segments[0]["start"] == 0.0 and segments[-1]["end"] == 6.0
+    assert segments[0]["end"] == segments[1]["start"]
+    assert abs(segments[0]["end"] - 3.0) <= 0.75
+    assert sum(segment["windows"] for segment in segments) == 7
+    assert all(0.9 < segment["speaker"]["similarity"] <= 1.0 for segment in segments)
+
+def test_windows_below_the_threshold_have_no_speaker(enrolled):
+    timeline = enrolled.identify_timeline(voice(3.0, 140), threshold=0.99)
+    assert timeline["segments"] == [{"start": 0.0, "end": 3.0, "windows": 3, "speaker": None}]
+
+def test_short_audio_and_bad_settings(enrolled):
+    timeline = enrolled.identify_timeline(voice(0.5, 110))
+    assert [segment["windows"] for segment in timeline["segments"]] == [1]
+    assert timeline["segments"][0]["end"] == 0.5
+
+    with pytest.raises(ValueError):
+        enrolled.identify_timeline(voice(3.0, 110), window_seconds=1.0, hop_seconds=2.0)
+    with pytest.raises(ValueError):
+        enrolled.identify_timeline(voice(3.0, 110), threshold=2.0)
@@ -0,0 +1,57 @@
+import numpy as np
+import pytest
+import torch
+
+from helpers import stub_embedding, voice
+from voiceprint.vad import VoiceActivityTrimmer
+
+SILENCE = torch.zeros(16000)
+
+def test_silence_and_pauses_are_removed():
+    vad = VoiceActivityTrimmer(padding_ms=100)
+    speech = voice(1.0, 170)
+    signal = torch.cat([SILENCE, speech, SILENCE, speech, SILENCE])
+
+    trimmed = vad.trim(signal)
+    # Both utterances survive with 100 ms of padding on each side
+    assert len(trimmed) == 2 * (16000 + 2 * 1600)
+    torch.testing.assert_close(trimmed[1600:17600], speech)
+
+    stats = vad.stats()
+    assert stats["clips"] == 1 and stats["untrimmed_clips"] == 0
+    assert stats["input_seconds"] == pytest.approx(5.0)
+    assert stats["kept_seconds"] == pytest.approx(2.4)
+    assert stats["removed_fraction"] == pytest.approx(2.6 / 5.0)
+
+def test_clips_with_too_little_speech_are_kept_whole():
+    vad = VoiceActivityTrimmer(min_speech_seconds=0.5)
+    signal = torch.cat([SILENCE, voice(0.1, 170), SILENCE])
+
+    assert vad.trim(signal) is signal
+    assert vad.trim(SILENCE) is SILENCE
+    assert vad.stats()["untrimmed_clips"] == 2
+
+def test_quiet_frames_below_the_floor_are_not_speech():
+    vad = VoiceActivityTrimmer(floor_dbfs=-40, padding_ms=0)
+    quiet = 0.001 * voice(1.0, 170) / voice(1.0, 170).abs().max()
+    mask = vad.speech_mask(torch.cat([quiet, voice(1.0, 170)]).numpy())
+    assert not mask[:50].any() and mask[50:].all()
+    assert len(vad.speech_mask(np.zeros(0, dtype=np.float32))) == 0
+
+def test_invalid_settings_are_rejected():
+    with pytest.raises(ValueError):
+        VoiceActivityTrimmer(frame_ms=0)
+    with pytest.raises(ValueError):
+        VoiceActivityTrimmer(threshold_db=-10)
+
+def test_voiceprint_embeds_only_the_speech(tmp_path, stub_model):
+    from voiceprint.voiceprint import Voiceprint
+
+    voiceprint = Voiceprint(libs_path=str(tmp_path / "libs"), vad=True)
+    try:
+        speech = voice(1.0, 170)
+        embedding = voiceprint._encode_signals([torch.cat([SILENCE, speech, SILENCE])])[0]
+        trimmed = torch.cat([torch.zeros(1600), speech, torch.zeros(1600)])
+        np.testing.assert_allclose(embedding, stub_embedding(trimmed), atol=1e-6)
+    finally:
+        voiceprint.scheduler.close()
@@ -0,0 +1,63 @@
+import json
+import os
+
+import numpy as np
+import pytest
+
+from voiceprint import storage
+from voiceprint.library import Library
+
+DIM = 8
+
+def make_library(speakers: int = 3) -> Library:
+    library = Library.create("test")
+    for i in range(speakers):
+        library.add_speaker(f"speaker{i}", np.random.default_rng(i).standard_normal(DIM).astype(np.float32))
+    return library
+
+def write_json(tmp_path, data: dict) -> str:
+    lib_path = os.path.join(tmp_path, f"{data['id']}.json")
+    with open(lib_path, "w", encoding="utf-8") as f:
+        json.dump(data, f)
+    return lib_path
+
+@pytest.mark.parametrize("library_format", ["json", "npy"])
+def test_trusted_and_validated_loads_agree(tmp_path, library_format):
+    library = make_library()
+    lib_path = os.path.join(tmp_path, "test.json")
+    storage.write_library(library, lib_path, library_format)
+
+    validated = storage.read_library(lib_path)
+    trusted = storage.read_library(lib_path, trusted=True)
+    for loaded in (validated, trusted):
+        assert [speaker.id for speaker in loaded.speakers] == [speaker.id for speaker in library.speakers]
+        np.testing.assert_allclose(loaded.embedding_matrix, library.embedding_matrix, rtol=1e-6)
+
+def test_schema_violations_are_only_caught_when_validating(tmp_path):
+    data = make_library().to_dict()
+    data["speakers"][0]["note"] = "not part of the schema"
+    lib_path = write_json(tmp_path, data)
+
+    with pytest.raises(ValueError, match="Invalid library data format"):
+        storage.read_library(lib_path)
+    assert len(storage.read_library(lib_path, trusted=True).speakers) == 3
+
+@pytest.mark.parametrize("trusted", [False, True])
+def test_bad_embeddings_are_rejected_even_when_trusted(tmp_path, trusted):
+    data = make_library().to_dict()
+    data["speakers"][1]["embeddings"] = [float("nan")] * DIM
+    with pytest.raises(ValueError, match="speaker1"):
+        storage.read_library(write_json(tmp_path, data), trusted=trusted)
+
+    data = make_library().to_dict()
+    data["speakers"][2]["embeddings"] = [0.0] * (DIM + 1)
+    with pytest.raises(ValueError, match="equal dimension"):
+        storage.read_library(write_json(tmp_path, data), trusted=trusted)
+
+def test_imported_files_are_validated_even_with_trusted_libraries(voiceprint, tmp_path):
+    voiceprint.trust_libraries = True
+    data = make_library().to_dict()
+    data["speakers"][0]["note"] = "not part of the schema"
+
+    with pytest.raises(ValueError):
+        voiceprint.import_library(write_json(tmp_path, data))
@@ -0,0 +1,192 @@
+import time
+from typing import Optional, TypedDict
+
+import numpy as np
+
+# Rows scored against the centroids per step while training, to bound memory
+_ASSIGN_CHUNK_ROWS = 16384
+
+def _assign(vectors: np.ndarray, centroids: np.ndarray) -> np.ndarray:
+    """Assign each normalized vector to its most similar centroid."""
+    assignments = np.empty(len(vectors), dtype=np.int32)
+    for start in range(0, len(vectors), _ASSIGN_CHUNK_ROWS):
+        chunk = vectors[start:start + _ASSIGN_CHUNK_ROWS]
+        assignments[start:start + len(chunk)] = np.argmax(chunk @ centroids.T, axis=1)
+    return assignments
+
+def _normalize(vectors: np.ndarray) -> np.ndarray:
+    norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+    norms[norms == 0] = 1.0
+    return (vectors / norms).astype(np.float32, copy=False)
+
+class RecallReport(TypedDict):
+    """How well approximate search agrees with exact search."""
+    k: int
+    queries: int
+    # Mean fraction of the exact top-k found by the index
+    recall: float
+    n_lists: int
+    n_probe: int
+    # Mean number of rows scored per query with the index
+    mean_candidates: float
+    exact_seconds: float
+    approximate_seconds: float
+
+class IVFIndex:
+    """
+    Inverted-file (IVF) index for approximate cosine search over a library.
+
+    Embeddings are clustered with spherical k-means; a query is only scored
+    against the rows assigned to its `n_probe` most similar centroids.
+    Assignments are row-aligned with the library's embedding matrix and are
+    kept in sync as speakers are added and removed, so the index never needs
+    a rebuild to stay correct, only to stay well balanced.
+    """
+    centroids: np.ndarray
+    n_probe: int
+    # Centroid of each library row; entries past _size are spare capacity
+    _assignments: np.ndarray
+    _size: int
+
+    @staticmethod
+    def build(
+            matrix: np.ndarray,
+            n_lists: Optional[int] = None,
+            n_probe: Optional[int] = None,
+            iterations: int = 10,
+            seed: int = 0
+    ) -> 'IVFIndex':
+        """Train an index on a pre-normalized (N x D) embedding matrix."""
+        if matrix.ndim != 2 or len(matrix) == 0:
+            raise ValueError("Cannot build an index over an empty library")
+
+        n = len(matrix)
+        if n_lists is None:
+            n_lists = int(np.sqrt(n))
+        n_lists = max(1, min(n_lists, n))
+
+        rng = np.random.default_rng(seed)
+        centroids = matrix[rng.choice(n, size=n_lists, replace=False)].astype(np.float32)
+
+        for _ in range(iterations):
+            assignments = _assign(matrix, centroids)
+
+            # Sum the members of each list with one pass over the sorted rows
+            order = np.argsort(assignments, kind="stable")
+            lists, starts = np.unique(assignments[order], return_index=True)
+            sums = np.add.reduceat(matrix[order], starts, axis=0)
+            centroids[lists] = _normalize(sums)
+
+            # Restart empty lists from random rows
+            empty = np.setdiff1d(np.arange(n_lists), lists)
+            if len(empty):
+                centroids[empty] = matrix[rng.choice(n, size=len(empty), replace=False)]
+
+        return IVFIndex(centroids, _assign(matrix, centroids), n_probe)
+
+    def __init__(self, centroids: np.ndarray, assignments: np.ndarray, n_probe: Optional[int] = None):
+        self.centroids = np.ascontiguousarray(centroids, dtype=np.float32)
+        self._assignments = np.array(assignments, dtype=np.int32)
+        self._size = len(assignments)
+
+        if n_probe is None:
+            n_probe = int(np.ceil(np.sqrt(len(self.centroids))))
+        self.n_probe = max(1, min(n_probe, len(self.centroids)))
+
+    def __len__(self) -> int:
+        return self._size
+
+    @property
+    def n_lists(self) -> int:
+        return len(self.centroids)
+
+    @property
+    def dimension(self) -> int:
+        return self.centroids.shape[1]
+
+    @property
+    def assignments(self) -> np.ndarray:
+        """Centroid of each library row."""
+        return self._assignments[:self._size]
+
+    @property
+    def nbytes(self) -> int:
+        return self.centroids.nbytes + self._assignments.nbytes
+
+    def add(self, vector: np.ndarray) -> None:
+        """Assign a new normalized row, appended after the existing ones."""
+        if self._size == len(self._assignments):
+            grown = np.empty(max(8, 2 * self._size), dtype=np.int32)
+            grown[:self._size] = self._assignments[:self._size]
+            self._assignments = grown
+
+        self._assignments[self._size] = np.argmax(self.centroids @ vector)
+        self._size += 1
+
+    def reassign(self, row: int, vector: np.ndarray) -> None:
+        """Move an existing row whose normalized vector changed to its new closest list."""
+        self._assignments[row] = np.argmax(self.centroids @ vector)
+
+    def remove(self, row: int) -> None:
+        """Forget a row, shifting the following rows up like the library matrix does."""
+        self._assignments[row:self._size - 1] = self._assignments[row + 1:self._size]
+        self._size -= 1
+
+    def candidates(self, query: np.ndarray, n_probe: Optional[int] = None) -> np.ndarray:
+        """Rows assigned to the lists closest to a normalized query."""
+        n_probe = min(n_probe or self.n_probe, self.n_lists)
+
+        similarities = self.centroids @ query
+        if n_probe < self.n_lists:
+            probes = np.argpartition(-similarities, n_probe - 1)[:n_probe]
+        else:
+            probes = np.arange(self.n_lists)
+
+        probed = np.zeros(self.n_lists, dtype=bool)
+        probed[probes] = True
+        return np.flatnonzero(probed[self.assignments])
+
+    def save(self, file) -> None:
+        """Write the index to a path or binary file object as .npz."""
+        np.savez(file, centroids=self.centroids, assignments=self.assignments, n_probe=self.n_probe)
+
+    @staticmethod
+    def load(path: str) -> 'IVFIndex':
+        """Read an index written by `save`."""
+        with np.load(path) as data:
+            return IVFIndex(data["centroids"], data["assignments"], int(data["n_probe"]))
+
+def measure_recall(
+        matrix: np.ndarray,
+        index: IVFIndex,
+        queries: np.ndarray,
+        k: int = 10,
+        n_probe: Optional[int] = None
+) -> RecallReport:
+    """Compare the index's top-k against exact search for normalized (Q x D) queries."""
+    k = max(1, min(k, len(matrix)))
+
+    started = time.perf_counter()
+    exact = [set(np.argpartition(-(matrix @ query), k - 1)[:k]) for query in queries]
+    exact_seconds = time.perf_counter() - started
+
+    started = time.perf_counter()
+    found = []
+    candidate_counts = []
+    for query in queries:
+        rows = index.candidates(query, n_probe)
+        candidate_counts.append(len(rows))
+        top = min(k, len(rows))
+        found.append(set(rows[np.argpartition(-(matrix[rows] @ query), top - 1)[:top]]) if top else set())
+    approximate_seconds = time.perf_counter() - started
+
+    return RecallReport(
+        k=k,
+        queries=len(queries),
+        recall=float(np.mean([len(e & f) / k for e, f in zip(exact, found)])) if len(queries) else 1.0,
+        n_lists=index.n_lists,
+        n_probe=min(n_probe or index.n_probe, index.n_lists),
+        mean_candidates=float(np.mean(candidate_counts)) if candidate_counts else 0.0,
+        exact_seconds=exact_seconds,
+        approximate_seconds=approximate_seconds
+    )
@@ -0,0 +1,146 @@
+import io
+import os
+import threading
+from typing import BinaryIO, Dict, Tuple, Union
+
+import numpy as np
+import torch
+import torchaudio
+
+from utils import get_logger
+
+_LOGGER = get_logger("audio")
+
+# Sample rate the model expects
+SAMPLE_RATE = 16000
+# Shortest waveform the model can embed: its dilated convolutions need 5 feature frames, 10 ms apart
+MIN_SAMPLES = 640
+
+# Decoded waveform, either (time,) or (channels, time). Integer dtypes are PCM samples.
+AudioArray = Union[np.ndarray, torch.Tensor]
+# Anything load_audio can turn into a waveform: a file path, encoded bytes, a binary stream or an array
+AudioInput = Union[str, bytes, BinaryIO, AudioArray]
+
+# Resampling kernels are costly to build, so one is kept per (source, target) rate pair
+_resamplers: Dict[Tuple[int, int], torchaudio.transforms.Resample] = {}
+_resamplers_lock = threading.Lock()
+
+def get_resampler(rate: int, target: int = SAMPLE_RATE) -> torchaudio.transforms.Resample:
+    """Get the shared resampler from `rate` to `target` Hz, building its kernel on first use."""
+    key = (rate, target)
+    with _resamplers_lock:
+        resampler = _resamplers.get(key)
+        if resampler is None:
+            if rate <= 0 or target <= 0:
+                raise ValueError(f"Sample rates must be positive, got {rate} and {target}")
+            resampler = torchaudio.transforms.Resample(rate, target)
+            _resamplers[key] = resampler
+            _LOGGER.debug(f"Built resampler from {rate} Hz to {target} Hz")
+    return resampler
+
+def resample(signal: torch.Tensor, rate: int, target: int = SAMPLE_RATE) -> torch.Tensor:
+    """Convert a float waveform from `rate` to `target` Hz along its last axis."""
+    if rate == target:
+        return signal
+    with torch.inference_mode():
+        return get_resampler(rate, target)(signal)
+
+def to_mono(signal: torch.Tensor) -> torch.Tensor:
+    """Downmix a (channels, time) waveform to 1D, passing 1D waveforms through."""
+    if signal.dim() == 1:
+        return signal
+    if signal.dim() != 2:
+        raise ValueError(f"Audio must be 1D or (channels, time), got shape {tuple(signal.shape)}")
+    if signal.shape[0] == 1:
+        return signal[0]
+    return signal.mean(dim=0)
+
+def pcm_to_float(signal: torch.Tensor) -> torch.Tensor:
+    """Convert integer PCM samples to float in -1..1, passing float tensors through."""
+    if signal.is_floating_point():
+        return signal.float()
+    if signal.dtype == torch.uint8:
+        # 8-bit PCM is unsigned, centered on 128
+        return (signal.float() - 128) / 128
+    return signal.float() / (torch.iinfo(signal.dtype).max + 1)
+
+def prepare_signal(signal: torch.Tensor, rate: int = SAMPLE_RATE) -> torch.Tensor:
+    """
+    Turn a decoded waveform into model input: 1D float32 at SAMPLE_RATE.
+
+    Channels are averaged before resampling, so only one channel goes
+    through the resampler. 16 kHz mono float audio is returned as-is.
+    """
+    signal = to_mono(pcm_to_float(signal))
+    return resample(signal, rate)
+
+def decode_pcm(data: Union[bytes, bytearray, memoryview, np.ndarray], rate: int, width: int, channels: int) -> torch.Tensor:
+    """
+    Decode raw little-endian PCM, as carried by Wyoming audio chunks, into model input.
+
+    Samples are scaled and downmixed in a single pass over the bytes, without
+    building a WAV container; a trailing partial frame is ignored. The result
+    is a new 1D float32 tensor at SAMPLE_RATE, so `data` may be a view of a
+    buffer that is reused afterwards.
+    """
+    if channels < 1:
+        raise ValueError(f"Audio must have at least one channel, got {channels}")
+
+    raw = np.frombuffer(data, dtype=np.uint8) if not isinstance(data, np.ndarray) else data.view(np.uint8)
+    frames = len(raw) // (width * channels)
+    raw = raw[:frames * width * channels]
+
+    if width == 1:
+        # 8-bit PCM is unsigned, centered on 128
+        samples = (raw.astype(np.float32) - 128) / 128
+    elif width == 2:
+        samples = np.multiply(raw.view("<i2"), 1 / 32768, dtype=np.float32)
+    elif width == 3:
+        # Assemble the 24-bit samples in the top of an int32 so the shift back sign-extends them
+        triplets = raw.reshape(-1, 3).astype(np.int32)
+        packed = (triplets[:, 0] << 8) | (triplets[:, 1] << 16) | (triplets[:, 2] << 24)
+        samples = np.multiply(packed >> 8, 1 / 8388608, dtype=np.float32)
+    elif width == 4:
+        samples = np.multiply(raw.view("<i4"), 1 / 2147483648, dtype=np.float32)
+    else:
+        raise ValueError(f"Unsupported sample width: {width}")
+
+    if channels > 1:
+        samples = samples.reshape(frames, channels).mean(axis=1, dtype=np.float32)
+    return resample(torch.from_numpy(samples), rate)
+
+def check_signal(signal: torch.Tensor) -> torch.Tensor:
+    """Reject a waveform that is empty or too short for the model, returning it otherwise."""
+    length = signal.shape[-1]
+    if length == 0:
+        raise ValueError("Audio is empty")
+    if length < MIN_SAMPLES:
+        raise ValueError(
+            f"Audio is too short: {length / SAMPLE_RATE * 1000:.0f} ms, "
+            f"at least {MIN_SAMPLES / SAMPLE_RATE * 1000:.0f} ms is needed"
+        )
+    return signal
+
+def load_audio(audio: AudioInput, sample_rate: int = SAMPLE_RATE) -> torch.Tensor:
+    """
+    Decode audio into model input: a 1D float32 waveform at SAMPLE_RATE.
+
+    Paths, encoded bytes and binary streams are decoded with torchaudio and
+    carry their own sample rate. Arrays are taken to be at `sample_rate`;
+    integer arrays are treated as PCM and scaled to -1..1. Raises
+    ValueError if the audio is too short to embed (see check_signal).
+    """
+    if isinstance(audio, str):
+        if not os.path.exists(audio):
+            raise FileNotFoundError(f"Audio file not found: {audio}")
+        signal, sample_rate = torchaudio.load(audio)
+    elif isinstance(audio, (bytes, bytearray, memoryview)):
+        signal, sample_rate = torchaudio.load(io.BytesIO(audio))
+    elif isinstance(audio, np.ndarray):
+        signal = torch.from_numpy(np.ascontiguousarray(audio))
+    elif isinstance(audio, torch.Tensor):
+        signal = audio
+    else:
+        signal, sample_rate = torchaudio.load(audio)
+
+    return check_signal(prepare_signal(signal, sample_rate))
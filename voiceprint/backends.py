@@ -0,0 +1,287 @@
+from contextlib import contextmanager
+import copy
+import math
+import os
+import tempfile
+from typing import List, Literal, Optional, Sequence, TypedDict, get_args
+
+import numpy as np
+import torch
+from speechbrain.inference.speaker import SpeakerRecognition
+import speechbrain.lobes.models.ECAPA_TDNN as ecapa_tdnn
+
+from utils import get_logger
+
+_LOGGER = get_logger("backends")
+
+# "speechbrain" runs the model eagerly through SpeechBrain. "torchscript" and
+# "onnx" run a traced copy of the same feature extractor and embedding model,
+# exported once next to the model files.
+BackendName = Literal["speechbrain", "torchscript", "onnx"]
+BACKENDS = get_args(BackendName)
+
+TORCHSCRIPT_FILENAME = "embedding.torchscript.pt"
+ONNX_FILENAME = "embedding.onnx"
+
+# Backends whose embeddings drift further than this from SpeechBrain's are rejected
+PARITY_MIN_COSINE = 0.9999
+
+class ParityReport(TypedDict):
+    """How closely a backend reproduces the SpeechBrain embeddings."""
+    backend: BackendName
+    clips: int
+    max_abs_error: float
+    min_cosine: float
+    passed: bool
+
+class InferenceBackend:
+    """Turns a padded batch of 16 kHz waveforms into speaker embeddings."""
+    name: BackendName
+
+    def encode_batch(self, wavs: torch.Tensor, wav_lens: torch.Tensor) -> np.ndarray:
+        """Embed a (batch, time) tensor with relative lengths, returning a (batch x D) array."""
+        raise NotImplementedError
+
+class SpeechBrainBackend(InferenceBackend):
+    """Eager PyTorch inference through SpeechBrain."""
+    name = "speechbrain"
+
+    def __init__(self, model: SpeakerRecognition):
+        self.model = model
+
+    def encode_batch(self, wavs: torch.Tensor, wav_lens: torch.Tensor) -> np.ndarray:
+        with torch.no_grad():
+            embeddings = self.model.encode_batch(wavs, wav_lens)  # (batch, 1, feat_dim)
+        return embeddings.squeeze(1).cpu().numpy()
+
+def _length_to_mask(length, max_len=None, dtype=None, device=None):
+    """speechbrain's length_to_mask without the Python-side batch size, so traces keep a dynamic batch axis."""
+    mask = torch.arange(max_len, device=length.device, dtype=length.dtype).unsqueeze(0) < length.unsqueeze(1)
+    return mask.to(dtype=dtype if dtype is not None else length.dtype, device=device)
+
+@contextmanager
+def _traceable_masks():
+    original = ecapa_tdnn.length_to_mask
+    ecapa_tdnn.length_to_mask = _length_to_mask
+    try:
+        yield
+    finally:
+        ecapa_tdnn.length_to_mask = original
+
+class _ConvSTFT(torch.nn.Module):
+    """
+    Real-valued drop-in for speechbrain's STFT on (batch, time) input.
+
+    The DFT is computed as a strided convolution with windowed cosine and sine
+    kernels, since ONNX export does not support complex tensors.
+    """
+    def __init__(self, stft: torch.nn.Module):
+        super().__init__()
+        if not stft.onesided:
+            raise ValueError("Only one-sided STFTs can be exported")
+
+        self.n_fft = stft.n_fft
+        self.hop_length = stft.hop_length
+        self.center = stft.center
+        self.pad_mode = stft.pad_mode
+
+        # torch.stft centers a shorter window inside n_fft
+        window = stft.window.double()
+        left = (self.n_fft - len(window)) // 2
+        window = torch.nn.functional.pad(window, (left, self.n_fft - len(window) - left))
+
+        frequencies = torch.arange(self.n_fft // 2 + 1, dtype=torch.float64).unsqueeze(1)
+        angles = 2 * math.pi * frequencies * torch.arange(self.n_fft, dtype=torch.float64) / self.n_fft
+        scale = self.n_fft ** -0.5 if stft.normalized_stft else 1.0
+        kernels = torch.cat([window * torch.cos(angles), -window * torch.sin(angles)]) * scale
+        self.register_buffer("kernels", kernels.float().unsqueeze(1))
+
+    def forward(self, x: torch.Tensor) -> torch.Tensor:
+        x = x.unsqueeze(1)
+        if self.center:
+            x = torch.nn.functional.pad(x, (self.n_fft // 2, self.n_fft // 2), mode=self.pad_mode)
+
+        # (batch, 2 * freqs, frames) -> (batch, frames, freqs, 2), like speechbrain's STFT
+        spectrum = torch.nn.functional.conv1d(x, self.kernels, stride=self.hop_length)
+        real, imag = spectrum.chunk(2, dim=1)
+        return torch.stack([real, imag], dim=-1).transpose(2, 1)
+
+class _EmbeddingGraph(torch.nn.Module):
+    """
+    The SpeechBrain encode_batch pipeline as a single traceable module.
+
+    Per-sentence mean normalization is computed with a mask instead of
+    a Python loop over the batch. With `real_stft`, the features use a
+    convolutional STFT that exports without complex tensors.
+    """
+    def __init__(self, model: SpeakerRecognition, real_stft: bool = False):
+        super().__init__()
+        mean_var_norm = model.mods.mean_var_norm
+        if mean_var_norm.norm_type != "sentence" or mean_var_norm.std_norm:
+            raise ValueError("Only sentence mean normalization can be exported")
+
+        self.compute_features = model.mods.compute_features
+        if real_stft:
+            # Swap the STFT on a copy so the live model is left untouched
+            self.compute_features = copy.deepcopy(self.compute_features)
+            self.compute_features.compute_STFT = _ConvSTFT(self.compute_features.compute_STFT)
+        self.embedding_model = model.mods.embedding_model
+
+    def forward(self, wavs: torch.Tensor, wav_lens: torch.Tensor) -> torch.Tensor:
+        feats = self.compute_features(wavs)
+
+        # Average only the frames that belong to each clip, like InputNormalization does
+        frames = torch.arange(feats.shape[1], dtype=wav_lens.dtype).unsqueeze(0)
+        mask = (frames < torch.round(wav_lens * feats.shape[1]).unsqueeze(1)).unsqueeze(2).to(feats.dtype)
+        mean = (feats * mask).sum(dim=1, keepdim=True) / mask.sum(dim=1, keepdim=True).clamp(min=1)
+
+        return self.embedding_model(feats - mean, wav_lens).squeeze(1)
+
+def _example_inputs() -> tuple:
+    # Different lengths so the trace sees real padding
+    return torch.randn(2, 32000), torch.tensor([1.0, 0.75])
+
+def _export_graph(model: SpeakerRecognition, real_stft: bool = False) -> _EmbeddingGraph:
+    graph = _EmbeddingGraph(model, real_stft)
+    graph.eval()
+    return graph
+
+class TorchScriptBackend(InferenceBackend):
+    """Traced TorchScript copy of the SpeechBrain pipeline, with dynamic batch and time axes."""
+    name = "torchscript"
+
+    @staticmethod
+    def export(model: SpeakerRecognition, path: str) -> None:
+        """Trace the model and save it to `path`."""
+        with torch.no_grad(), _traceable_masks():
+            traced = torch.jit.trace(_export_graph(model), _example_inputs(), check_trace=False)
+        traced = torch.jit.freeze(traced)
+        torch.jit.save(traced, path)
+
+    def __init__(self, path: str):
+        self.module = torch.jit.load(path, map_location="cpu")
+        self.module.eval()
+
+    def encode_batch(self, wavs: torch.Tensor, wav_lens: torch.Tensor) -> np.ndarray:
+        with torch.no_grad():
+            return self.module(wavs.float(), wav_lens.float()).numpy()
+
+class OnnxBackend(InferenceBackend):
+    """ONNX Runtime session over an exported copy of the SpeechBrain pipeline."""
+    name = "onnx"
+
+    @staticmethod
+    def export(model: SpeakerRecognition, path: str) -> None:
+        """Export the model to an ONNX file at `path`."""
+        with torch.no_grad(), _traceable_masks():
+            torch.onnx.export(
+                _export_graph(model, real_stft=True),
+                _example_inputs(),
+                path,
+                input_names=["wavs", "wav_lens"],
+                output_names=["embeddings"],
+                dynamic_axes={
+                    "wavs": {0: "batch", 1: "time"},
+                    "wav_lens": {0: "batch"},
+                    "embeddings": {0: "batch"},
+                },
+                opset_version=17,
+                dynamo=False
+            )
+
+    def __init__(self, path: str, threads: Optional[int] = None):
+        try:
+            import onnxruntime
+        except ImportError as e:
+            raise ImportError("The onnx backend requires the onnxruntime package") from e
+
+        options = onnxruntime.SessionOptions()
+        options.graph_optimization_level = onnxruntime.GraphOptimizationLevel.ORT_ENABLE_ALL
+        if threads:
+            options.intra_op_num_threads = threads
+        self.session = onnxruntime.InferenceSession(path, options, providers=["CPUExecutionProvider"])
+
+    def encode_batch(self, wavs: torch.Tensor, wav_lens: torch.Tensor) -> np.ndarray:
+        inputs = {
+            "wavs": wavs.float().cpu().numpy(),
+            "wav_lens": wav_lens.float().cpu().numpy(),
+        }
+        return self.session.run(["embeddings"], inputs)[0]
+
+def load_backend(
+        name: BackendName,
+        model: SpeakerRecognition,
+        model_path: str,
+        rebuild: bool = False
+) -> InferenceBackend:
+    """
+    Create an inference backend for a loaded SpeechBrain model.
+
+    Exported backends are traced on first use, or with `rebuild`, and saved in `model_path`.
+    """
+    if name == "speechbrain":
+        return SpeechBrainBackend(model)
+
+    if name == "torchscript":
+        backend_class, filename = TorchScriptBackend, TORCHSCRIPT_FILENAME
+    elif name == "onnx":
+        backend_class, filename = OnnxBackend, ONNX_FILENAME
+    else:
+        raise ValueError(f"Unsupported inference backend: {name}")
+
+    path = os.path.join(model_path, filename)
+    if rebuild or not os.path.exists(path):
+        _LOGGER.info(f"Exporting {name} model to {path}")
+        # The REST and Wyoming servers may export into the same model directory at once
+        fd, temp_path = tempfile.mkstemp(dir=model_path, prefix=f"{filename}.", suffix=".tmp")
+        os.close(fd)
+        try:
+            backend_class.export(model, temp_path)
+            os.replace(temp_path, path)
+        finally:
+            if os.path.exists(temp_path):
+                os.remove(temp_path)
+
+    return backend_class(path)
+
+def check_parity(
+        backend: InferenceBackend,
+        reference: InferenceBackend,
+        durations: Sequence[float] = (1.0, 1.5, 3.0),
+        batch_size: int = 3,
+        seed: int = 0
+) -> ParityReport:
+    """
+    Compare a backend's embeddings with a reference backend on synthetic clips.
+
+    Each duration is run as a padded batch of slightly different lengths, which
+    also checks that the batch and time axes stay dynamic.
+    """
+    generator = torch.Generator().manual_seed(seed)
+    expected: List[np.ndarray] = []
+    actual: List[np.ndarray] = []
+
+    for duration in durations:
+        length = int(duration * 16000)
+        wavs = 0.1 * torch.randn(batch_size, length, generator=generator)
+        wav_lens = torch.linspace(1.0, 0.8, batch_size)
+        for i in range(batch_size):
+            wavs[i, int(wav_lens[i] * length):] = 0
+
+        expected.append(reference.encode_batch(wavs, wav_lens))
+        actual.append(backend.encode_batch(wavs, wav_lens))
+
+    expected_matrix = np.concatenate(expected)
+    actual_matrix = np.concatenate(actual)
+    cosine = np.sum(expected_matrix * actual_matrix, axis=1) / (
+        np.linalg.norm(expected_matrix, axis=1) * np.linalg.norm(actual_matrix, axis=1)
+    )
+
+    min_cosine = float(cosine.min())
+    return ParityReport(
+        backend=backend.name,
+        clips=len(expected_matrix),
+        max_abs_error=float(np.abs(expected_matrix - actual_matrix).max()),
+        min_cosine=min_cosine,
+        passed=min_cosine >= PARITY_MIN_COSINE
+    )
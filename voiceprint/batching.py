@@ -0,0 +1,71 @@
+from typing import List, Optional, Sequence, Tuple
+
+import torch
+
+# Upper bound on clips per forward pass
+DEFAULT_MAX_BATCH_SIZE = 16
+# Longest clip in a bucket may be at most this many times the shortest one
+DEFAULT_MAX_LENGTH_RATIO = 1.5
+
+def bucket_by_length(
+        lengths: Sequence[int],
+        max_batch_size: int = DEFAULT_MAX_BATCH_SIZE,
+        max_length_ratio: float = DEFAULT_MAX_LENGTH_RATIO
+) -> List[List[int]]:
+    """Group indices of similar length together so padding inside a batch stays bounded."""
+    order = sorted(range(len(lengths)), key=lambda i: lengths[i])
+
+    buckets: List[List[int]] = []
+    current: List[int] = []
+    for i in order:
+        if current and (
+            len(current) >= max_batch_size
+            or lengths[i] > max_length_ratio * lengths[current[0]]
+        ):
+            buckets.append(current)
+            current = []
+        current.append(i)
+
+    if current:
+        buckets.append(current)
+    return buckets
+
+def pad_batch(signals: Sequence[torch.Tensor]) -> Tuple[torch.Tensor, torch.Tensor]:
+    """Right-pad 1D signals into a (batch, time) tensor with lengths relative to the longest one."""
+    if not signals:
+        raise ValueError("At least one signal must be provided")
+
+    max_len = max(signal.shape[-1] for signal in signals)
+    if max_len == 0:
+        raise ValueError("Signals cannot all be empty")
+    batch = signals[0].new_zeros((len(signals), max_len))
+    wav_lens = torch.empty(len(signals))
+
+    for i, signal in enumerate(signals):
+        batch[i, :signal.shape[-1]] = signal
+        wav_lens[i] = signal.shape[-1] / max_len
+
+    return batch, wav_lens
+
+def segment_starts(
+        length: int,
+        segment: int,
+        hop: int,
+        max_segments: Optional[int] = None
+) -> List[int]:
+    """
+    Start offsets of fixed-length segments covering `length` samples, `hop` apart.
+
+    The last segment is aligned with the end so the tail is covered. With
+    `max_segments`, that many segments are spread evenly over the whole length.
+    """
+    if segment <= 0 or hop <= 0:
+        raise ValueError("Segment length and hop must be positive")
+    if length <= segment:
+        return [0]
+
+    last = length - segment
+    starts = list(range(0, last, hop)) + [last]
+    if max_segments is not None and len(starts) > max_segments:
+        starts = [int(round(i * last / max(1, max_segments - 1))) for i in range(max_segments)]
+    return starts
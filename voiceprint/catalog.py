@@ -0,0 +1,129 @@
+import json
+import os
+import tempfile
+import threading
+from typing import Dict, Iterable, List, Optional, TypedDict
+
+from utils import get_logger
+from voiceprint.library import Library, LibraryId, SpeakerHeaderDTO
+from voiceprint.quantization import Precision
+from voiceprint import storage
+
+_LOGGER = get_logger("catalog")
+
+CATALOG_FILENAME = ".catalog.json"
+
+class LibrarySummary(TypedDict):
+    """Type definition for the metadata of a library, without embeddings."""
+    id: LibraryId
+    name: str
+    created_at: str
+    speakers: List[SpeakerHeaderDTO]
+    speaker_count: int
+    precision: Precision
+    # Newest modification time and total bytes of the library file, its journal and sidecars
+    mtime: float
+    size: int
+
+class _CatalogEntry(TypedDict):
+    summary: LibrarySummary
+    # Stat of the library file and its journal when the summary was taken
+    signature: List[int]
+
+class LibraryCatalog:
+    """
+    Lightweight index of library metadata stored next to the libraries.
+
+    Entries are keyed by library ID and carry the mtime/size of the library
+    file and its journal, so stale entries are detected without reading
+    any embedding data. Changes are kept in memory until `save`, which
+    callers run when listing or snapshotting libraries, not on every
+    journaled mutation. It is safe to use from several threads.
+    """
+    _path: str
+    _entries: Dict[str, _CatalogEntry]
+    # Whether _entries changed since the catalog was last written
+    _dirty: bool
+
+    def __init__(self, libs_path: str):
+        self._path = os.path.join(libs_path, CATALOG_FILENAME)
+        self._entries = {}
+        self._dirty = False
+        self._lock = threading.Lock()
+
+        if os.path.exists(self._path):
+            try:
+                with open(self._path, "r", encoding="utf-8") as f:
+                    self._entries = json.load(f)
+            except Exception as e:
+                _LOGGER.warning(f"Ignoring unreadable library catalog {self._path}: {e}")
+
+    def get(self, lib_id: LibraryId, lib_path: str) -> Optional[LibrarySummary]:
+        """Get the summary of a library if the catalog entry is still current."""
+        with self._lock:
+            entry = self._entries.get(lib_id)
+        if entry is None or entry["signature"] != storage.get_library_signature(lib_path):
+            return None
+        return entry["summary"]
+
+    def update(self, library: Library, lib_path: str) -> LibrarySummary:
+        """Record the current state of a library."""
+        signature = storage.get_library_signature(lib_path)
+        if signature is None:
+            raise FileNotFoundError(f"Library file not found: {lib_path}")
+        mtime_ns, size = storage.get_library_footprint(lib_path)
+
+        summary = LibrarySummary(
+            id=library.id,
+            name=library.name,
+            created_at=library.created_at,
+            speakers=library.to_header()["speakers"],
+            speaker_count=len(library.speakers),
+            precision=library.precision,
+            mtime=mtime_ns / 1e9,
+            size=size
+        )
+        with self._lock:
+            self._entries[library.id] = _CatalogEntry(summary=summary, signature=signature)
+            self._dirty = True
+        return summary
+
+    def remove(self, lib_id: LibraryId) -> None:
+        """Forget a library."""
+        with self._lock:
+            if self._entries.pop(lib_id, None) is not None:
+                self._dirty = True
+
+    def retain(self, lib_ids: Iterable[LibraryId]) -> None:
+        """Forget every library not in `lib_ids`."""
+        keep = set(lib_ids)
+        with self._lock:
+            stale = [lib_id for lib_id in self._entries if lib_id not in keep]
+            for lib_id in stale:
+                del self._entries[lib_id]
+            if stale:
+                self._dirty = True
+
+    def save(self) -> None:
+        """
+        Write the catalog, if it changed, through a temporary file so it is never left half-written.
+        """
+        with self._lock:
+            if not self._dirty:
+                return
+
+            temp_path = None
+            try:
+                # Unique per write, as other processes may share the libraries directory
+                fd, temp_path = tempfile.mkstemp(
+                    dir=os.path.dirname(self._path), prefix=f"{CATALOG_FILENAME}.", suffix=".tmp"
+                )
+                with os.fdopen(fd, "w", encoding="utf-8") as f:
+                    json.dump(self._entries, f)
+                os.replace(temp_path, self._path)
+                self._dirty = False
+            except Exception as e:
+                # The catalog is only an index; losing an update just means a slower listing
+                _LOGGER.warning(f"Failed to save library catalog {self._path}: {e}")
+                if temp_path is not None and os.path.exists(temp_path):
+                    os.remove(temp_path)
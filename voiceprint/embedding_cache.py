@@ -0,0 +1,168 @@
+from collections import OrderedDict
+import hashlib
+import os
+import threading
+from typing import Optional, TypedDict
+
+import numpy as np
+import torch
+
+from utils import get_logger
+
+_LOGGER = get_logger("embedding_cache")
+
+class EmbeddingCacheStats(TypedDict):
+    """Counters describing the embedding cache."""
+    hits: int
+    # Hits served from the disk store rather than from memory
+    disk_hits: int
+    misses: int
+    evictions: int
+    hit_rate: float
+    entries: int
+    bytes: int
+
+def model_fingerprint(module: torch.nn.Module) -> str:
+    """Digest of a module's weights, so embeddings from different weights never share a cache key."""
+    digest = hashlib.sha256()
+    for name, value in module.state_dict().items():
+        if isinstance(value, torch.Tensor):
+            digest.update(name.encode())
+            digest.update(value.detach().cpu().contiguous().view(-1).view(torch.uint8).numpy().tobytes())
+    return digest.hexdigest()[:16]
+
+class EmbeddingCache:
+    """
+    Bounded LRU cache of embeddings, keyed by the audio they were computed from.
+
+    Keys hash the decoded float32 waveform together with `model_version`,
+    so the same recording hits the cache whatever container it arrived in,
+    and changing the model, backend or quantization never serves stale
+    vectors. With `path`, embeddings are also written there as one .npy
+    file per key and survive restarts; the disk store is not bounded.
+    """
+    model_version: str
+    max_bytes: int
+    path: Optional[str]
+    _entries: "OrderedDict[str, np.ndarray]"
+
+    def __init__(self, model_version: str, max_bytes: int = 64 * 1024 * 1024, path: Optional[str] = None):
+        if max_bytes < 0:
+            raise ValueError("Embedding cache size cannot be negative")
+
+        self.model_version = model_version
+        self.max_bytes = max_bytes
+        self.path = path
+        if path:
+            os.makedirs(path, exist_ok=True)
+
+        self._entries = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+
+        self._hits = 0
+        self._disk_hits = 0
+        self._misses = 0
+        self._evictions = 0
+
+    def key(self, signal: torch.Tensor) -> str:
+        """Content address of a decoded 1D waveform under the current model."""
+        samples = signal.detach().cpu().to(torch.float32).contiguous().numpy()
+        digest = hashlib.sha256(self.model_version.encode())
+        digest.update(samples.tobytes())
+        return digest.hexdigest()
+
+    def get(self, key: str) -> Optional[np.ndarray]:
+        """Get a cached embedding, falling back to the disk store."""
+        with self._lock:
+            embedding = self._entries.get(key)
+            if embedding is not None:
+                self._entries.move_to_end(key)
+                self._hits += 1
+                return embedding
+
+        embedding = self._read(key)
+        with self._lock:
+            if embedding is None:
+                self._misses += 1
+                return None
+            self._hits += 1
+            self._disk_hits += 1
+            self._store(key, embedding)
+        return embedding
+
+    def put(self, key: str, embedding: np.ndarray) -> None:
+        """Cache an embedding, writing it to the disk store if there is one."""
+        embedding = np.array(embedding, dtype=np.float32)
+        embedding.flags.writeable = False
+        with self._lock:
+            self._store(key, embedding)
+        self._write(key, embedding)
+
+    def clear(self) -> None:
+        """Forget every embedding held in memory. The disk store is kept."""
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+
+    def stats(self) -> EmbeddingCacheStats:
+        """Get a snapshot of the cache counters."""
+        with self._lock:
+            lookups = self._hits + self._misses
+            return EmbeddingCacheStats(
+                hits=self._hits,
+                disk_hits=self._disk_hits,
+                misses=self._misses,
+                evictions=self._evictions,
+                hit_rate=self._hits / lookups if lookups else 0.0,
+                entries=len(self._entries),
+                bytes=self._bytes
+            )
+
+    def _store(self, key: str, embedding: np.ndarray) -> None:
+        if key in self._entries:
+            self._bytes -= self._entries.pop(key).nbytes
+        self._entries[key] = embedding
+        self._bytes += embedding.nbytes
+
+        while self._entries and self._bytes > self.max_bytes:
+            _, evicted = self._entries.popitem(last=False)
+            self._bytes -= evicted.nbytes
+            self._evictions += 1
+
+    def _file_path(self, key: str) -> str:
+        # Fan out over subdirectories to keep directory listings short
+        return os.path.join(self.path, key[:2], f"{key}.npy")
+
+    def _read(self, key: str) -> Optional[np.ndarray]:
+        if not self.path:
+            return None
+
+        file_path = self._file_path(key)
+        if not os.path.exists(file_path):
+            return None
+        try:
+            embedding = np.load(file_path)
+        except Exception as e:
+            _LOGGER.warning(f"Failed to read cached embedding {file_path}: {e}")
+            return None
+
+        embedding.flags.writeable = False
+        return embedding
+
+    def _write(self, key: str, embedding: np.ndarray) -> None:
+        if not self.path:
+            return
+
+        file_path = self._file_path(key)
+        if os.path.exists(file_path):
+            return
+        try:
+            os.makedirs(os.path.dirname(file_path), exist_ok=True)
+            # Processes sharing the cache directory may write the same key at once
+            temp_path = f"{file_path}.{os.getpid()}.{threading.get_ident()}.tmp"
+            with open(temp_path, "wb") as f:
+                np.save(f, embedding)
+            os.replace(temp_path, file_path)
+        except Exception as e:
+            _LOGGER.warning(f"Failed to persist cached embedding {file_path}: {e}")
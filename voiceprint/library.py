@@ -1,58 +1,282 @@
 from datetime import datetime
-from typing import List, NewType, TypedDict
+from typing import List, Literal, NewType, NotRequired, Optional, Tuple, TypedDict, get_args
 import numpy as np
 import json
 import os
-from jsonschema import validate, ValidationError
+from jsonschema import Draft202012Validator, ValidationError
 
+from voiceprint.ann import IVFIndex, RecallReport, measure_recall
 from voiceprint.helpers import sanitize_name
-from voiceprint.speaker import Speaker, SpeakerDTO, SpeakerId
+from voiceprint.quantization import DEFAULT_PRECISION, Precision, check_precision, dequantize, dot_rows, quantize, storage_dtype
+from voiceprint.speaker import Speaker, SpeakerDTO, SpeakerId, check_samples
 
 library_schema_path = os.path.join(os.path.dirname(__file__), "library_schema.json")
 with open(library_schema_path, "r", encoding="utf-8") as f:
     library_schema = json.load(f)
+
+library_header_schema_path = os.path.join(os.path.dirname(__file__), "library_header_schema.json")
+with open(library_header_schema_path, "r", encoding="utf-8") as f:
+    library_header_schema = json.load(f)
+
+# Compile the validators once instead of on every load
+library_validator = Draft202012Validator(library_schema)
+library_header_validator = Draft202012Validator(library_header_schema)
     
 LibraryId = NewType("LibraryId", str)
 
+# How a query is compared with a speaker: against the centroid of their samples,
+# or against each sample, keeping the best ("max") or the average ("mean") score.
+# Speakers without stored samples are scored against their centroid in every mode.
+ScoringMode = Literal["centroid", "max", "mean"]
+SCORING_MODES = get_args(ScoringMode)
+
+def check_scoring_mode(mode: str) -> ScoringMode:
+    """Validate a scoring mode name."""
+    if mode not in SCORING_MODES:
+        raise ValueError(f"Unsupported scoring mode: {mode}")
+    return mode
+
+def _normalize_rows(vectors: np.ndarray) -> np.ndarray:
+    """L2-normalize each row of a 2D array as float32, leaving zero rows untouched."""
+    vectors = np.asarray(vectors, dtype=np.float32)
+    norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+    norms[norms == 0] = 1.0
+    return vectors / norms
+
+def _to_similarity(cosine: np.ndarray) -> np.ndarray:
+    """Map raw cosine similarity (-1..1) to 0..1."""
+    # Normalize to 0..1, clamp for numerical noise
+    # This way, 0 means no similarity, 1 means perfect match
+    return np.clip((cosine + 1) / 2, 0.0, 1.0)
+
+def _stack_embeddings(speakers: List[SpeakerDTO]) -> np.ndarray:
+    """
+    Stack speaker embeddings into an (N x D) float32 matrix.
+
+    Checks that every embedding is numeric, finite and of the same dimension
+    in one vectorized pass instead of validating speakers one by one.
+    """
+    if not speakers:
+        return np.empty((0, 0), dtype=np.float32)
+
+    try:
+        embeddings = np.array([speaker['embeddings'] for speaker in speakers], dtype=np.float32)
+    except (ValueError, TypeError) as e:
+        raise ValueError("Invalid library data format: embeddings must be numeric vectors of equal dimension") from e
+
+    if embeddings.ndim != 2 or embeddings.shape[1] == 0:
+        raise ValueError("Invalid library data format: embeddings must be numeric vectors of equal dimension")
+
+    _check_finite(embeddings, speakers)
+    return embeddings
+
+def _check_finite(embeddings: np.ndarray, speakers: List) -> None:
+    """Reject NaN or infinite embedding values, naming the first offending speaker."""
+    finite = np.isfinite(embeddings).all(axis=1)
+    if not finite.all():
+        speaker = speakers[int(np.flatnonzero(~finite)[0])]
+        raise ValueError(f"Invalid library data format: embeddings of speaker '{speaker['id']}' are not finite")
+
 class LibraryDTO(TypedDict):
     """Type definition for a library."""
     id: LibraryId
     name: str
     created_at: str
     speakers: List[SpeakerDTO]
+    precision: NotRequired[Precision]
+
+class SpeakerHeaderDTO(TypedDict):
+    """Type definition for a speaker entry in a binary library header."""
+    id: SpeakerId
+    name: str
+    # Rows of the samples matrix that belong to the speaker, absent if they have none
+    sample_count: NotRequired[int]
+
+class LibraryHeaderDTO(TypedDict):
+    """Type definition for the JSON header of a library stored in binary format."""
+    id: LibraryId
+    name: str
+    created_at: str
+    format: str
+    speakers: List[SpeakerHeaderDTO]
+    precision: NotRequired[Precision]
 
 class Library:
     _id: LibraryId
     _name: str
     _created_at: str
     _speakers: List[Speaker]
+    _precision: Precision
+    # Pre-normalized embeddings at the library's precision, row i belongs to _speakers[i].
+    # Rows past len(_speakers) are spare capacity for cheap appends.
+    _matrix: np.ndarray
+    # Per-row scales of an int8 _matrix, None at other precisions
+    _scales: Optional[np.ndarray]
+    # Optional approximate nearest-neighbour index over _matrix
+    _index: Optional[IVFIndex]
+    # Normalized samples of every speaker at the library's precision, with their int8 scales,
+    # the speaker row each belongs to and each speaker's sample count. Built on first use
+    # by the per-sample scoring modes and dropped whenever speakers change.
+    _sample_scoring: Optional[Tuple[np.ndarray, Optional[np.ndarray], np.ndarray, np.ndarray]]
 
     @staticmethod
-    def create(name: str) -> 'Library':
+    def create(name: str, precision: Precision = DEFAULT_PRECISION) -> 'Library':
         """Create a new voice library."""
         lib = LibraryDTO(
             id=LibraryId(sanitize_name(name)),
             name=name,
             created_at=datetime.now().isoformat(),
-            speakers=[]
+            speakers=[],
+            precision=check_precision(precision)
         )
         return Library(lib)
     
     @staticmethod
-    def from_dict(data: LibraryDTO) -> 'Library':
-        """Create a Library instance from a dictionary."""
-        try:
-            validate(instance=data, schema=library_schema)
-        except ValidationError as e:
-            raise ValueError(f"Invalid library data format: {e.message}") from e
+    def from_dict(data: LibraryDTO, trusted: bool = False) -> 'Library':
+        """
+        Create a Library instance from a dictionary.
+
+        Trusted data (written by this service) skips schema validation; embeddings
+        are always checked while they are stacked.
+        """
+        if not trusted:
+            try:
+                library_validator.validate(data)
+            except ValidationError as e:
+                raise ValueError(f"Invalid library data format: {e.message}") from e
         
         return Library(data)
 
-    def __init__(self, lib: LibraryDTO):
+    @staticmethod
+    def from_header(
+            header: LibraryHeaderDTO,
+            embeddings: np.ndarray,
+            trusted: bool = False,
+            scales: Optional[np.ndarray] = None,
+            samples: Optional[np.ndarray] = None,
+            sample_scales: Optional[np.ndarray] = None
+    ) -> 'Library':
+        """
+        Create a Library instance from a binary-format header and its (N x D) embedding matrix.
+
+        Row i of `embeddings` belongs to the i-th speaker of the header. Speakers keep
+        views into the matrix, so their raw embeddings are not copied from a memory-mapped
+        one; the normalized scoring matrix is built in memory regardless. The matrix is
+        stored at the header's precision; int8 codes come with their per-row `scales`.
+        `samples` stacks the sample embeddings of the speakers that have a
+        `sample_count`, in header order, at the same precision with int8 `sample_scales`;
+        float32 samples, as older versions stored them, are converted. Trusted data
+        skips schema validation and the finiteness check.
+        """
+        if not trusted:
+            try:
+                library_header_validator.validate(header)
+            except ValidationError as e:
+                raise ValueError(f"Invalid library header format: {e.message}") from e
+
+        if embeddings.ndim != 2 or embeddings.shape[0] != len(header['speakers']):
+            raise ValueError(
+                f"Embedding matrix of shape {embeddings.shape} does not match "
+                f"{len(header['speakers'])} speakers in the library header"
+            )
+
+        precision = header.get('precision', DEFAULT_PRECISION)
+        if embeddings.dtype != storage_dtype(precision):
+            raise ValueError(f"Embedding matrix of type {embeddings.dtype} does not match precision {precision}")
+        if (precision == "int8") != (scales is not None) or (scales is not None and len(scales) != len(embeddings)):
+            raise ValueError(f"Embedding scales do not match precision {precision}")
+
+        if not trusted:
+            _check_finite(embeddings if scales is None else scales[:, np.newaxis], header['speakers'])
+
+        counts = [speaker.get('sample_count', 0) for speaker in header['speakers']]
+        if sum(counts) != (len(samples) if samples is not None else 0):
+            raise ValueError("Sample matrix does not match the sample counts in the library header")
+        if samples is not None and (
+            samples.dtype not in (storage_dtype(precision), np.float32)
+            or (samples.dtype == np.int8) != (sample_scales is not None)
+            or (sample_scales is not None and len(sample_scales) != len(samples))
+        ):
+            raise ValueError(f"Sample matrix of type {samples.dtype} does not match precision {precision}")
+
+        # Speakers keep views into the samples matrix too
+        speaker_samples: List[Optional[np.ndarray]] = []
+        speaker_sample_scales: List[Optional[np.ndarray]] = []
+        start = 0
+        for count in counts:
+            speaker_samples.append(samples[start:start + count] if count else None)
+            speaker_sample_scales.append(sample_scales[start:start + count] if count and sample_scales is not None else None)
+            start += count
+
+        return Library(header, embeddings, scales, speaker_samples, speaker_sample_scales)
+
+    def __init__(
+            self,
+            lib: LibraryDTO,
+            embeddings: Optional[np.ndarray] = None,
+            scales: Optional[np.ndarray] = None,
+            samples: Optional[List[Optional[np.ndarray]]] = None,
+            sample_scales: Optional[List[Optional[np.ndarray]]] = None
+    ):
+        """
+        Create a library from its data. `embeddings`, if given, is the already stacked
+        (N x D) matrix of the speakers' embeddings at the library's precision, with
+        int8 `scales`, and replaces their `embeddings` entries; `samples` then holds
+        each speaker's sample embeddings, or None, with their int8 `sample_scales`.
+        """
         self._id = lib['id']
         self._name = lib['name']
         self._created_at = lib['created_at']
-        self._speakers = [Speaker.from_dict(speaker) for speaker in lib['speakers']]
+        self._precision = check_precision(lib.get('precision', DEFAULT_PRECISION))
+
+        if embeddings is None:
+            centroids = _stack_embeddings(lib['speakers'])
+            samples = [
+                check_samples(speaker['samples'], centroids.shape[1], speaker['id']) if 'samples' in speaker else None
+                for speaker in lib['speakers']
+            ]
+            embeddings, scales = quantize(centroids, self._precision)
+
+        self._set_embeddings([SpeakerId(speaker['id']) for speaker in lib['speakers']],
+                             [speaker['name'] for speaker in lib['speakers']], embeddings, scales, samples, sample_scales)
+        self._index = None
+
+    def _set_embeddings(
+            self,
+            ids: List[SpeakerId],
+            names: List[str],
+            embeddings: np.ndarray,
+            scales: Optional[np.ndarray],
+            samples: Optional[List[Optional[np.ndarray]]] = None,
+            sample_scales: Optional[List[Optional[np.ndarray]]] = None
+    ) -> None:
+        """
+        Build the speakers and the scoring matrix from stacked embeddings at the library's precision.
+
+        Samples at another precision are converted to the library's.
+        """
+        if samples is None:
+            samples = [None] * len(ids)
+        if sample_scales is None:
+            sample_scales = [None] * len(ids)
+
+        # Speakers keep views into the stacked matrix
+        self._speakers = []
+        for i, (speaker_id, name) in enumerate(zip(ids, names)):
+            speaker = SpeakerDTO(id=speaker_id, name=name, embeddings=embeddings[i])
+            if samples[i] is not None:
+                speaker['samples'] = samples[i]
+            self._speakers.append(Speaker(
+                speaker,
+                scale=float(scales[i]) if scales is not None else None,
+                sample_scales=sample_scales[i]
+            ).with_sample_precision(self._precision))
+        self._sample_scoring = None
+
+        if self._speakers:
+            self._matrix, self._scales = quantize(_normalize_rows(dequantize(embeddings, scales)), self._precision)
+        else:
+            self._matrix, self._scales = quantize(np.empty((0, 0), dtype=np.float32), self._precision)
 
     @property
     def id(self) -> LibraryId:
@@ -69,30 +293,340 @@ class Library:
     @property
     def speakers(self) -> List[Speaker]:
         return self._speakers
+
+    @property
+    def precision(self) -> Precision:
+        return self._precision
+
+    @property
+    def nbytes(self) -> int:
+        """Approximate memory held by the library's embeddings."""
+        index_bytes = self._index.nbytes if self._index is not None else 0
+        scale_bytes = self._scales.nbytes if self._scales is not None else 0
+        return self._matrix.nbytes + scale_bytes + index_bytes + sum(speaker.nbytes for speaker in self._speakers)
+
+    @property
+    def embedding_matrix(self) -> np.ndarray:
+        """
+        Pre-normalized (N x D) float32 embeddings, row-aligned with `speakers`.
+
+        A view at float32 precision, a widened copy otherwise.
+        """
+        n = len(self._speakers)
+        if self._scales is None and self._matrix.dtype == np.float32:
+            return self._matrix[:n]
+        return dequantize(self._matrix[:n], self._scales[:n] if self._scales is not None else None)
+
+    def set_precision(self, precision: Precision) -> None:
+        """Convert the stored embeddings to another precision."""
+        if check_precision(precision) == self._precision:
+            return
+
+        embeddings = self.stack_embeddings()
+        self._precision = precision
+        self._set_embeddings([s.id for s in self._speakers], [s.name for s in self._speakers],
+                             *quantize(embeddings, precision), [s.samples for s in self._speakers])
+
+    @property
+    def index(self) -> Optional[IVFIndex]:
+        """Approximate nearest-neighbour index used for scoring, if any."""
+        return self._index
+
+    def build_index(self, n_lists: Optional[int] = None, n_probe: Optional[int] = None) -> IVFIndex:
+        """Train an IVF index over the current speakers and use it for scoring."""
+        self._index = IVFIndex.build(self.embedding_matrix, n_lists=n_lists, n_probe=n_probe)
+        return self._index
+
+    def evaluate_index(
+            self,
+            k: int = 10,
+            queries: Optional[np.ndarray] = None,
+            sample_size: int = 256,
+            n_probe: Optional[int] = None
+    ) -> RecallReport:
+        """
+        Measure recall@k of the index against exact search.
+
+        Without `queries`, a random sample of the library's own embeddings is used,
+        which slightly favours the index since each query is its own nearest neighbour.
+        """
+        if self._index is None:
+            raise ValueError("Library has no index")
+
+        if queries is None:
+            rng = np.random.default_rng(0)
+            n = len(self._speakers)
+            queries = self.embedding_matrix[rng.choice(n, size=min(sample_size, n), replace=False)]
+        else:
+            queries = _normalize_rows(queries)
+
+        return measure_recall(self.embedding_matrix, self._index, queries, k=k, n_probe=n_probe)
+
+    def set_index(self, index: Optional[IVFIndex]) -> None:
+        """Use a previously built index for scoring, or drop the index with None."""
+        if index is not None and (
+            len(index) != len(self._speakers) or index.dimension != self._matrix.shape[1]
+        ):
+            raise ValueError("Index does not match the library's embeddings")
+        self._index = index
     
-    def add_speaker(self, name: str, embeddings: np.ndarray) -> Speaker:
-        """Add a speaker to the library."""
-        speaker = Speaker.create(name, embeddings)
+    def get_speaker(self, speaker_id: SpeakerId) -> Optional[Speaker]:
+        """Get a speaker by ID."""
+        return next((speaker for speaker in self._speakers if speaker.id == speaker_id), None)
+
+    def add_speaker(self, name: str, embeddings: np.ndarray, samples: Optional[np.ndarray] = None) -> Speaker:
+        """Add a speaker to the library, with the sample embeddings behind their centroid if known."""
+        speaker = Speaker.create(name, embeddings, samples).with_sample_precision(self._precision)
 
         if any(s.id == speaker.id for s in self._speakers):
             raise ValueError(f"Speaker with ID {speaker.id} already exists in the library")
 
+        self._append_row(np.ravel(speaker.embeddings))
         self._speakers.append(speaker)
         return speaker
 
+    def put_speaker(self, speaker: Speaker) -> None:
+        """Insert a speaker, replacing any existing speaker with the same ID."""
+        speaker = speaker.with_sample_precision(self._precision)
+        self.remove_speaker(speaker.id)
+        self._append_row(np.ravel(speaker.embeddings))
+        self._speakers.append(speaker)
+
     def remove_speaker(self, speaker_id: SpeakerId) -> bool:
         """Remove a speaker from the library."""
         for i, speaker in enumerate(self._speakers):
             if speaker.id == speaker_id:
+                n = len(self._speakers)
+                # Shift the following rows up to keep the matrix contiguous
+                self._matrix[i:n - 1] = self._matrix[i + 1:n]
+                if self._scales is not None:
+                    self._scales[i:n - 1] = self._scales[i + 1:n]
+                if self._index is not None:
+                    self._index.remove(i)
                 del self._speakers[i]
+                self._sample_scoring = None
                 return True
         return False
 
+    def add_samples(self, speaker_id: SpeakerId, embeddings: np.ndarray) -> Speaker:
+        """
+        Add sample embeddings to an enrolled speaker and update their centroid in place.
+
+        Only the speaker's own row is rewritten; the cost depends on the number
+        of new samples, not on the size of the library.
+        """
+        for i, speaker in enumerate(self._speakers):
+            if speaker.id == speaker_id:
+                updated = speaker.with_samples(embeddings).with_sample_precision(self._precision)
+                row = _normalize_rows(updated.embeddings[np.newaxis, :])
+                values, scales = quantize(row, self._precision)
+                self._matrix[i] = values[0]
+                if self._scales is not None:
+                    self._scales[i] = scales[0]
+                if self._index is not None:
+                    self._index.reassign(i, row[0])
+                self._speakers[i] = updated
+                self._sample_scoring = None
+                return updated
+        raise ValueError(f"Speaker with ID {speaker_id} not found in the library")
+
+    def _append_row(self, embedding: np.ndarray) -> None:
+        """Append a normalized embedding row, growing the matrix geometrically."""
+        n = len(self._speakers)
+        dim = embedding.shape[0]
+
+        if n == 0 and self._matrix.shape[1] != dim:
+            self._matrix = np.empty((0, dim), dtype=self._matrix.dtype)
+            self._index = None
+        elif self._matrix.shape[1] != dim:
+            raise ValueError(f"Embedding dimension {dim} does not match library dimension {self._matrix.shape[1]}")
+
+        if n == self._matrix.shape[0]:
+            grown = np.empty((max(8, 2 * n), dim), dtype=self._matrix.dtype)
+            grown[:n] = self._matrix[:n]
+            self._matrix = grown
+            if self._scales is not None:
+                self._scales = np.resize(self._scales[:n], len(grown))
+
+        row = _normalize_rows(embedding[np.newaxis, :])
+        values, scales = quantize(row, self._precision)
+        self._matrix[n] = values[0]
+        if self._scales is not None:
+            self._scales[n] = scales[0]
+        if self._index is not None:
+            self._index.add(row[0])
+        self._sample_scoring = None
+
+    def score(
+            self,
+            embedding: np.ndarray,
+            threshold: Optional[float] = None,
+            limit: Optional[int] = None,
+            mode: ScoringMode = "centroid"
+    ) -> List[Tuple[Speaker, float]]:
+        """
+        Rank speakers by similarity to an embedding, best first.
+
+        Similarity is the cosine similarity mapped from -1..1 to 0..1.
+        Speakers below `threshold` are dropped and at most `limit` are returned.
+        """
+        return self.score_batch(np.ravel(embedding)[np.newaxis, :], threshold=threshold, limit=limit, mode=mode)[0]
+
+    def score_batch(
+            self,
+            embeddings: np.ndarray,
+            threshold: Optional[float] = None,
+            limit: Optional[int] = None,
+            exact: bool = False,
+            mode: ScoringMode = "centroid"
+    ) -> List[List[Tuple[Speaker, float]]]:
+        """
+        Rank speakers for each row of a (Q x D) embedding matrix.
+
+        Without an index (or with `exact`) all queries are scored with a single
+        matrix product. With an index each query is only scored against the
+        speakers in its probed lists. The per-sample modes always score every
+        sample, as the index only covers centroids.
+        """
+        check_scoring_mode(mode)
+        if not self._speakers:
+            return [[] for _ in range(len(embeddings))]
+
+        queries = _normalize_rows(embeddings)
+
+        if mode != "centroid":
+            similarities = _to_similarity(self._score_samples(queries, mode))
+            return [self._rank(row, threshold, limit) for row in similarities]
+
+        if self._index is None or exact:
+            similarities = _to_similarity(self._dot(queries))
+            return [self._rank(row, threshold, limit) for row in similarities]
+
+        results = []
+        for query in queries:
+            rows = self._index.candidates(query)
+            similarities = _to_similarity(self._dot(query[np.newaxis, :], rows)[0])
+            results.append(self._rank(similarities, threshold, limit, rows))
+        return results
+
+    def _dot(self, queries: np.ndarray, rows: Optional[np.ndarray] = None) -> np.ndarray:
+        """Cosine similarity of normalized queries with all speakers, or the given rows."""
+        if rows is None:
+            rows = slice(0, len(self._speakers))
+        scales = self._scales[rows] if self._scales is not None else None
+        return dot_rows(queries, self._matrix[rows], scales)
+
+    def _score_samples(self, queries: np.ndarray, mode: ScoringMode) -> np.ndarray:
+        """Cosine similarity of normalized queries with every speaker, reduced over their samples."""
+        if self._sample_scoring is None:
+            self._sample_scoring = self._build_sample_scoring()
+        values, scales, owners, counts = self._sample_scoring
+
+        cosine = dot_rows(queries, values, scales)
+        n = len(self._speakers)
+        # Give every (query, speaker) pair its own bucket so one call reduces all queries
+        buckets = (np.arange(len(queries))[:, np.newaxis] * n + owners).ravel()
+
+        if mode == "max":
+            scores = np.full(len(queries) * n, -np.inf, dtype=np.float32)
+            np.maximum.at(scores, buckets, cosine.ravel())
+        else:
+            scores = np.bincount(buckets, weights=cosine.ravel(), minlength=len(queries) * n)
+            scores = scores.astype(np.float32) / np.tile(counts, len(queries))
+        return scores.reshape(len(queries), n)
+
+    def _build_sample_scoring(self) -> Tuple[np.ndarray, Optional[np.ndarray], np.ndarray, np.ndarray]:
+        """Stack and normalize the samples of every speaker, using the centroid of speakers without any."""
+        samples = [
+            speaker.samples if speaker.samples is not None else np.ravel(speaker.embeddings)[np.newaxis, :]
+            for speaker in self._speakers
+        ]
+        counts = np.array([len(speaker_samples) for speaker_samples in samples], dtype=np.int64)
+        owners = np.repeat(np.arange(len(samples)), counts)
+        values, scales = quantize(_normalize_rows(np.concatenate(samples)), self._precision)
+        return values, scales, owners, counts.astype(np.float32)
+
+    def _rank(
+            self,
+            similarities: np.ndarray,
+            threshold: Optional[float],
+            limit: Optional[int],
+            rows: Optional[np.ndarray] = None
+    ) -> List[Tuple[Speaker, float]]:
+        """
+        Select and sort the best speakers from one row of similarities.
+
+        `rows` maps each similarity to its speaker when only a subset was scored.
+        """
+        candidates = np.arange(len(similarities))
+        if threshold is not None:
+            candidates = np.flatnonzero(similarities >= threshold)
+
+        if limit is not None and limit < len(candidates):
+            if limit <= 0:
+                return []
+            values = similarities[candidates]
+            cutoff = -np.partition(-values, limit - 1)[limit - 1]
+            # argpartition picks arbitrarily among speakers tied at the cutoff; keep the earliest, like a full sort
+            better = values > cutoff
+            tied = np.flatnonzero(values == cutoff)[:limit - int(better.sum())]
+            better[tied] = True
+            candidates = candidates[better]
+
+        # Sort by similarity (descending)
+        ranked = candidates[np.argsort(-similarities[candidates], kind="stable")]
+        speaker_rows = ranked if rows is None else rows[ranked]
+        return [(self._speakers[row], float(similarities[i])) for row, i in zip(speaker_rows, ranked)]
+
+    def to_header(self) -> LibraryHeaderDTO:
+        """Return the library metadata, without embeddings, as a binary-format header."""
+        return LibraryHeaderDTO(
+            id=self._id,
+            name=self._name,
+            created_at=self._created_at,
+            format="npy",
+            speakers=[self._speaker_header(speaker) for speaker in self._speakers],
+            precision=self._precision
+        )
+
+    @staticmethod
+    def _speaker_header(speaker: Speaker) -> SpeakerHeaderDTO:
+        header = SpeakerHeaderDTO(id=speaker.id, name=speaker.name)
+        if speaker.stored_samples is not None:
+            header['sample_count'] = speaker.sample_count
+        return header
+
+    def stack_embeddings(self) -> np.ndarray:
+        """Return the raw (un-normalized) speaker embeddings as an (N x D) float32 matrix."""
+        if not self._speakers:
+            return np.empty((0, 0), dtype=np.float32)
+        return np.stack([np.ravel(speaker.embeddings) for speaker in self._speakers]).astype(np.float32, copy=False)
+
+    def quantize_samples(self) -> Tuple[np.ndarray, Optional[np.ndarray]]:
+        """
+        Return the sample embeddings of the speakers that have them, stacked in speaker order
+        at the library's precision, with int8 scales.
+        """
+        stored = [speaker.stored_samples for speaker in self._speakers if speaker.stored_samples is not None]
+        if not stored:
+            return quantize(np.empty((0, self._matrix.shape[1]), dtype=np.float32), self._precision)
+        values = np.concatenate([samples for samples, _ in stored])
+        scales = np.concatenate([scales for _, scales in stored]) if self._precision == "int8" else None
+        return values, scales
+
+    def quantize_embeddings(self) -> Tuple[np.ndarray, Optional[np.ndarray]]:
+        """Return the raw speaker embeddings at the library's precision, with int8 scales."""
+        return quantize(self.stack_embeddings(), self._precision)
+
     def to_dict(self) -> dict:
         """Return the library as a dictionary suitable for JSON serialization."""
-        return {
+        data = {
             'id': self._id,
             'name': self._name,
             'created_at': self._created_at,
             'speakers': [speaker.to_dict() for speaker in self._speakers]
-        }
\ No newline at end of file
+        }
+        # Leave the default out so exports stay readable by older versions
+        if self._precision != DEFAULT_PRECISION:
+            data['precision'] = self._precision
+        return data
\ No newline at end of file
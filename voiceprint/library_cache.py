@@ -0,0 +1,121 @@
+from collections import OrderedDict
+import threading
+from typing import List, Optional, Tuple, TypedDict
+
+from voiceprint.library import Library, LibraryId
+
+class LibraryCacheStats(TypedDict):
+    """Counters describing the library cache."""
+    hits: int
+    misses: int
+    invalidations: int
+    evictions: int
+    libraries: int
+    bytes: int
+
+class LibraryCache:
+    """
+    Bounded LRU cache of loaded libraries.
+
+    Each entry remembers the signature (see storage.get_library_signature)
+    of the files it was loaded from; a lookup with a different signature is
+    treated as a miss and drops the stale entry. The cache is limited both
+    by number of libraries and by the bytes their embeddings take.
+    """
+    max_libraries: int
+    max_bytes: int
+    _entries: "OrderedDict[LibraryId, Tuple[Library, List[int], int]]"
+
+    def __init__(self, max_libraries: int = 16, max_bytes: int = 512 * 1024 * 1024):
+        if max_libraries < 1:
+            raise ValueError("Library cache must hold at least one library")
+
+        self.max_libraries = max_libraries
+        self.max_bytes = max_bytes
+        self._entries = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+
+        self._hits = 0
+        self._misses = 0
+        self._invalidations = 0
+        self._evictions = 0
+
+    def get(self, lib_id: LibraryId, signature: Optional[List[int]]) -> Optional[Library]:
+        """Get a cached library if it was loaded from files with the given signature."""
+        with self._lock:
+            entry = self._entries.get(lib_id)
+            if entry is None:
+                self._misses += 1
+                return None
+
+            library, cached_signature, _ = entry
+            if cached_signature != signature:
+                self._drop(lib_id)
+                self._invalidations += 1
+                self._misses += 1
+                return None
+
+            self._entries.move_to_end(lib_id)
+            self._hits += 1
+            return library
+
+    def put(self, library: Library, signature: List[int]) -> None:
+        """Cache a library as loaded from (or written to) files with the given signature."""
+        with self._lock:
+            if library.id in self._entries:
+                self._drop(library.id)
+
+            nbytes = library.nbytes
+            self._entries[library.id] = (library, signature, nbytes)
+            self._bytes += nbytes
+
+            # Evict least recently used libraries, but always keep the newest one
+            while len(self._entries) > 1 and (
+                len(self._entries) > self.max_libraries or self._bytes > self.max_bytes
+            ):
+                self._drop(next(iter(self._entries)))
+                self._evictions += 1
+
+    def refresh(self, library: Library, signature: List[int]) -> None:
+        """
+        Record that a cached library now matches files with a new signature.
+
+        Used after journaled mutations, which change the files but leave the
+        cached object current. The entry keeps the size it was cached with;
+        it is measured again on the next `put`, when the library is snapshotted.
+        """
+        with self._lock:
+            entry = self._entries.get(library.id)
+            if entry is not None and entry[0] is library:
+                self._entries[library.id] = (library, signature, entry[2])
+
+    def peek(self, lib_id: LibraryId, signature: Optional[List[int]]) -> Optional[Library]:
+        """Get a cached library matching the signature without counting a lookup or reordering the cache."""
+        with self._lock:
+            entry = self._entries.get(lib_id)
+            if entry is None or entry[1] != signature:
+                return None
+            return entry[0]
+
+    def discard(self, lib_id: LibraryId) -> None:
+        """Forget a library, if cached."""
+        with self._lock:
+            if lib_id in self._entries:
+                self._drop(lib_id)
+
+    def stats(self) -> LibraryCacheStats:
+        """Get a snapshot of the cache counters."""
+        with self._lock:
+            return LibraryCacheStats(
+                hits=self._hits,
+                misses=self._misses,
+                invalidations=self._invalidations,
+                evictions=self._evictions,
+                libraries=len(self._entries),
+                bytes=self._bytes
+            )
+
+    def _drop(self, lib_id: LibraryId) -> None:
+        _, _, nbytes = self._entries.pop(lib_id)
+        self._bytes -= nbytes
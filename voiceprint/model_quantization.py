@@ -0,0 +1,247 @@
+import argparse
+import copy
+import json
+import os
+import sys
+import time
+from typing import List, Optional, Sequence, TypedDict
+
+import numpy as np
+import torch
+import torchaudio
+from speechbrain.inference.speaker import SpeakerRecognition
+
+from utils import get_logger
+from voiceprint import audio
+
+_LOGGER = get_logger("model_quantization")
+
+AUDIO_EXTENSIONS = (".wav", ".flac", ".mp3", ".ogg")
+
+class QuantizationReport(TypedDict):
+    """Cosine-similarity drift, size, speed and memory of the int8 model against the float model."""
+    clips: int
+    mean_cosine: float
+    min_cosine: float
+    float_bytes: int
+    quantized_bytes: int
+    float_seconds_per_clip: float
+    quantized_seconds_per_clip: float
+    # Float time over int8 time; below 1 the int8 model is slower
+    speedup: float
+    # Peak resident memory of the process while each model ran, None where it cannot be measured
+    float_peak_rss_bytes: Optional[int]
+    quantized_peak_rss_bytes: Optional[int]
+
+class _PointwiseConvAsLinear(torch.nn.Module):
+    """
+    A 1x1 Conv1d computed as a Linear layer over frames.
+
+    PyTorch's dynamic quantization only covers Linear layers. A pointwise
+    convolution is the same product applied to every frame, so it runs as an
+    int8 GEMM on a transposed view of its input, without copying it.
+    """
+    def __init__(self, conv: torch.nn.Conv1d):
+        super().__init__()
+        self.linear = torch.nn.Linear(conv.in_channels, conv.out_channels, bias=conv.bias is not None)
+        with torch.no_grad():
+            self.linear.weight.copy_(conv.weight[:, :, 0])
+            if conv.bias is not None:
+                self.linear.bias.copy_(conv.bias)
+
+    def forward(self, x: torch.Tensor) -> torch.Tensor:
+        return self.linear(x.transpose(1, 2)).transpose(1, 2)
+
+def _is_pointwise(conv: torch.nn.Module) -> bool:
+    return (
+        isinstance(conv, torch.nn.Conv1d)
+        and conv.kernel_size == (1,)
+        and conv.stride == (1,)
+        and conv.padding in ((0,), "valid")
+        and conv.groups == 1
+    )
+
+def _convert_convs(module: torch.nn.Module) -> int:
+    """
+    Replace 1x1 Conv1d layers with Linear equivalents, returning how many were replaced.
+
+    Wider kernels stay float: running them as Linear layers would mean
+    unfolding their input, multiplying activation memory by the kernel size.
+    """
+    replaced = 0
+    for name, child in module.named_children():
+        if _is_pointwise(child):
+            setattr(module, name, _PointwiseConvAsLinear(child))
+            replaced += 1
+        else:
+            replaced += _convert_convs(child)
+    return replaced
+
+def quantize_model(model: SpeakerRecognition) -> SpeakerRecognition:
+    """
+    Apply int8 dynamic quantization to the ECAPA embedding model, in place.
+
+    Linear layers, and 1x1 Conv1d layers rewritten as Linear layers, are
+    quantized with per-channel int8 weights; activations are quantized on
+    the fly. Wider convolutions and feature extraction stay in float.
+    """
+    embedding_model = model.mods.embedding_model
+    embedding_model.eval()
+    replaced = _convert_convs(embedding_model)
+    linear = sum(isinstance(module, torch.nn.Linear) for module in embedding_model.modules())
+
+    quantized = torch.ao.quantization.quantize_dynamic(
+        embedding_model,
+        {torch.nn.Linear: torch.ao.quantization.per_channel_dynamic_qconfig},
+        dtype=torch.qint8
+    )
+    model.mods.embedding_model = quantized
+    _LOGGER.info(f"Quantized {linear} linear layers of the embedding model to int8, {replaced} of them 1x1 convolutions")
+    return model
+
+def model_bytes(module: torch.nn.Module) -> int:
+    """Size of a module's serialized weights."""
+    return sum(tensor.numel() * tensor.element_size() for tensor in _state_tensors(module))
+
+def _state_tensors(module: torch.nn.Module) -> List[torch.Tensor]:
+    tensors = []
+    for value in module.state_dict().values():
+        if isinstance(value, torch.Tensor):
+            tensors.append(value)
+        elif isinstance(value, tuple):
+            # Packed quantized Linear parameters are stored as (weight, bias)
+            tensors.extend(item for item in value if isinstance(item, torch.Tensor))
+    return tensors
+
+def _reset_peak_rss() -> bool:
+    """Reset the process's peak resident memory (Linux only)."""
+    try:
+        with open("/proc/self/clear_refs", "w") as f:
+            f.write("5")
+        return True
+    except OSError:
+        return False
+
+def _peak_rss() -> Optional[int]:
+    try:
+        with open("/proc/self/status") as f:
+            for line in f:
+                if line.startswith("VmHWM:"):
+                    return int(line.split()[1]) * 1024
+    except OSError:
+        pass
+    return None
+
+def _embed(model: SpeakerRecognition, clips: Sequence[torch.Tensor]) -> tuple:
+    embeddings = []
+    measured = _reset_peak_rss()
+    started = time.perf_counter()
+    with torch.no_grad():
+        for clip in clips:
+            embeddings.append(model.encode_batch(clip.unsqueeze(0)).squeeze().numpy())
+    seconds = (time.perf_counter() - started) / max(1, len(clips))
+    return np.stack(embeddings), seconds, _peak_rss() if measured else None
+
+def evaluate_quantization(
+        float_model: SpeakerRecognition,
+        quantized_model: SpeakerRecognition,
+        clips: Sequence[torch.Tensor]
+) -> QuantizationReport:
+    """
+    Embed 16 kHz mono clips with both models and compare the embeddings.
+
+    A warning is logged when the int8 model is not faster than the float one.
+    """
+    if not clips:
+        raise ValueError("At least one clip is required")
+
+    expected, float_seconds, float_peak = _embed(float_model, clips)
+    actual, quantized_seconds, quantized_peak = _embed(quantized_model, clips)
+
+    cosine = np.sum(expected * actual, axis=1) / (
+        np.linalg.norm(expected, axis=1) * np.linalg.norm(actual, axis=1)
+    )
+    speedup = float_seconds / max(quantized_seconds, 1e-12)
+    if speedup <= 1.0:
+        _LOGGER.warning(
+            f"The int8 model is not faster than the float model on these clips "
+            f"({quantized_seconds:.4f}s vs {float_seconds:.4f}s per clip)"
+        )
+
+    return QuantizationReport(
+        clips=len(clips),
+        mean_cosine=float(cosine.mean()),
+        min_cosine=float(cosine.min()),
+        float_bytes=model_bytes(float_model.mods.embedding_model),
+        quantized_bytes=model_bytes(quantized_model.mods.embedding_model),
+        float_seconds_per_clip=float_seconds,
+        quantized_seconds_per_clip=quantized_seconds,
+        speedup=speedup,
+        float_peak_rss_bytes=float_peak,
+        quantized_peak_rss_bytes=quantized_peak
+    )
+
+def load_clips(paths: Sequence[str], sample_rate: int = 16000) -> List[torch.Tensor]:
+    """Load audio files, and audio files inside directories, as 16 kHz mono clips."""
+    files = []
+    for path in paths:
+        if os.path.isdir(path):
+            files.extend(
+                os.path.join(path, name)
+                for name in sorted(os.listdir(path))
+                if name.lower().endswith(AUDIO_EXTENSIONS)
+            )
+        else:
+            files.append(path)
+
+    clips = []
+    for file in files:
+        signal, rate = torchaudio.load(file)
+        clips.append(audio.resample(audio.to_mono(signal), rate, sample_rate))
+    return clips
+
+def synthetic_clips(count: int = 8, seed: int = 0, sample_rate: int = audio.SAMPLE_RATE) -> List[torch.Tensor]:
+    """Voiced-like test signals of 1 to 3 seconds, each at its own pitch."""
+    from benchmarks.signals import synthetic_voice
+
+    return [
+        torch.from_numpy(synthetic_voice(1.0 + 2.0 * i / max(1, count - 1), seed=seed + i, sample_rate=sample_rate))
+        for i in range(count)
+    ]
+
+def main(argv: Optional[Sequence[str]] = None) -> None:
+    from voiceprint.voiceprint import model_path
+
+    parser = argparse.ArgumentParser(description="Compare the int8 ECAPA model with the float model")
+    parser.add_argument("clips", nargs="*", help="Reference speech recordings: audio files or directories")
+    parser.add_argument(
+        "--synthetic",
+        help="Use synthetic voiced signals instead of recordings; they say little about accuracy on real speech",
+        action="store_true"
+    )
+    parser.add_argument(
+        "--require-speedup",
+        help="Exit with an error if the int8 model is not faster than the float model",
+        action="store_true"
+    )
+    args = parser.parse_args(argv)
+
+    if args.clips:
+        clips = load_clips(args.clips)
+        if not clips:
+            parser.error("No audio files found in the given paths")
+    elif args.synthetic:
+        clips = synthetic_clips()
+    else:
+        parser.error("Pass reference recordings to compare the models on, or --synthetic")
+
+    float_model = SpeakerRecognition.from_hparams(source=model_path, savedir=model_path, run_opts={"device": "cpu"})
+    quantized = quantize_model(copy.deepcopy(float_model))
+
+    report = evaluate_quantization(float_model, quantized, clips)
+    print(json.dumps(report, indent=4))
+    if args.require_speedup and report["speedup"] <= 1.0:
+        sys.exit(1)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,50 @@
+from typing import Literal, Optional, get_args
+
+import numpy as np
+
+# How the embeddings of the segments of a long recording are combined: a plain
+# average, or an average weighted by how well each segment agrees with the rest
+Pooling = Literal["mean", "quality"]
+POOLINGS = get_args(Pooling)
+
+def pool_embeddings(embeddings: np.ndarray, weights: Optional[np.ndarray] = None) -> np.ndarray:
+    """
+    Pool the (W x D) embeddings of windows of one recording into a single embedding.
+
+    Windows are L2-normalized before averaging, so a loud window does not
+    outweigh a quiet one; `weights` (for instance window durations) scale
+    each window's contribution.
+    """
+    embeddings = np.asarray(embeddings, dtype=np.float32)
+    if embeddings.ndim != 2 or len(embeddings) == 0:
+        raise ValueError("At least one window embedding is required")
+
+    norms = np.linalg.norm(embeddings, axis=1, keepdims=True)
+    norms[norms == 0] = 1.0
+    directions = embeddings / norms
+
+    if weights is None:
+        return directions.mean(axis=0)
+
+    weights = np.asarray(weights, dtype=np.float32)
+    if weights.shape != (len(embeddings),) or (weights < 0).any() or weights.sum() <= 0:
+        raise ValueError("Window weights must be one non-negative value per window, not all zero")
+    return (weights @ directions) / weights.sum()
+
+def quality_weights(embeddings: np.ndarray, power: float = 4.0) -> np.ndarray:
+    """
+    Weight each segment by its cosine similarity to the mean of all segments.
+
+    Segments dominated by noise, music or another voice point away from the
+    consensus and get little weight; `power` sharpens the contrast.
+    """
+    embeddings = np.asarray(embeddings, dtype=np.float32)
+    norms = np.linalg.norm(embeddings, axis=1, keepdims=True)
+    norms[norms == 0] = 1.0
+    directions = embeddings / norms
+
+    consensus = directions.mean(axis=0)
+    consensus /= max(float(np.linalg.norm(consensus)), 1e-12)
+    weights = np.clip(directions @ consensus, 0.0, None) ** power
+    # Fall back to a plain average if nothing agrees with the consensus
+    return weights if weights.sum() > 0 else np.ones(len(embeddings), dtype=np.float32)
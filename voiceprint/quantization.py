@@ -0,0 +1,121 @@
+from typing import Literal, Optional, Tuple, TypedDict, get_args
+
+import numpy as np
+
+# Storage precision of a library's embeddings. "int8" stores symmetric
+# int8 codes with one float32 scale per vector.
+Precision = Literal["float32", "float16", "int8"]
+PRECISIONS = get_args(Precision)
+DEFAULT_PRECISION: Precision = "float32"
+
+_DTYPES = {
+    "float32": np.float32,
+    "float16": np.float16,
+    "int8": np.int8,
+}
+
+# Quantized rows converted to float32 per step while scoring, to bound memory
+SCORE_BLOCK_ROWS = 8192
+
+class PrecisionReport(TypedDict):
+    """Accuracy of scoring at a given precision, compared with float64."""
+    precision: Precision
+    bytes_per_vector: int
+    queries: int
+    # Absolute error of cosine similarity against float64 scoring
+    max_abs_error: float
+    mean_abs_error: float
+    # Fraction of queries whose best match is unchanged
+    top1_agreement: float
+
+def check_precision(precision: str) -> Precision:
+    """Validate a precision name."""
+    if precision not in PRECISIONS:
+        raise ValueError(f"Unsupported precision: {precision}")
+    return precision
+
+def storage_dtype(precision: Precision) -> np.dtype:
+    """Type of the stored values at a precision."""
+    return np.dtype(_DTYPES[check_precision(precision)])
+
+def quantize(matrix: np.ndarray, precision: Precision) -> Tuple[np.ndarray, Optional[np.ndarray]]:
+    """
+    Convert an (N x D) matrix to a precision.
+
+    Returns the stored values and, for int8, the per-row scale that maps codes back to values.
+    """
+    matrix = np.asarray(matrix, dtype=np.float32)
+    if precision != "int8":
+        return matrix.astype(storage_dtype(precision), copy=False), None
+
+    scales = np.abs(matrix).max(axis=1) / 127 if matrix.shape[1] else np.ones(len(matrix), dtype=np.float32)
+    scales[scales == 0] = 1.0
+    codes = np.clip(np.rint(matrix / scales[:, np.newaxis]), -127, 127).astype(np.int8)
+    return codes, scales.astype(np.float32)
+
+def dequantize(values: np.ndarray, scales: Optional[np.ndarray] = None) -> np.ndarray:
+    """Convert stored values back to a float32 matrix."""
+    matrix = np.asarray(values).astype(np.float32)
+    if scales is not None:
+        matrix *= scales[:, np.newaxis]
+    return matrix
+
+def dot_rows(queries: np.ndarray, values: np.ndarray, scales: Optional[np.ndarray] = None) -> np.ndarray:
+    """
+    Compute float32 queries (Q x D) times stored rows (R x D) transposed.
+
+    Reduced-precision rows are widened block by block, so scoring never
+    materializes a full float32 copy of the matrix.
+    """
+    if values.dtype == np.float32:
+        products = queries @ values.T
+    else:
+        products = np.empty((len(queries), len(values)), dtype=np.float32)
+        for start in range(0, len(values), SCORE_BLOCK_ROWS):
+            block = values[start:start + SCORE_BLOCK_ROWS].astype(np.float32)
+            products[:, start:start + len(block)] = queries @ block.T
+
+    if scales is not None:
+        products *= scales
+    return products
+
+def measure_precision(
+        embeddings: np.ndarray,
+        precision: Precision,
+        queries: Optional[np.ndarray] = None,
+        sample_size: int = 256,
+        seed: int = 0
+) -> PrecisionReport:
+    """
+    Score queries against embeddings stored at a precision and compare with float64 scoring.
+
+    Without `queries`, a random sample of the embeddings themselves is used,
+    and each query's own row is left out when comparing best matches.
+    """
+    reference = np.asarray(embeddings, dtype=np.float64)
+    reference = reference / np.maximum(np.linalg.norm(reference, axis=1, keepdims=True), 1e-12)
+
+    sampled = None
+    if queries is None:
+        rng = np.random.default_rng(seed)
+        sampled = rng.choice(len(reference), size=min(sample_size, len(reference)), replace=False)
+        queries = reference[sampled]
+    queries = np.asarray(queries, dtype=np.float64)
+    queries = queries / np.maximum(np.linalg.norm(queries, axis=1, keepdims=True), 1e-12)
+
+    expected = queries @ reference.T
+    values, scales = quantize(reference, precision)
+    actual = dot_rows(queries.astype(np.float32), values, scales).astype(np.float64)
+
+    errors = np.abs(actual - expected)
+    if sampled is not None and len(reference) > 1:
+        expected[np.arange(len(sampled)), sampled] = -np.inf
+        actual[np.arange(len(sampled)), sampled] = -np.inf
+    return PrecisionReport(
+        precision=precision,
+        bytes_per_vector=values.itemsize * reference.shape[1] + (scales.itemsize if scales is not None else 0),
+        queries=len(queries),
+        max_abs_error=float(errors.max()) if errors.size else 0.0,
+        mean_abs_error=float(errors.mean()) if errors.size else 0.0,
+        top1_agreement=float(np.mean(actual.argmax(axis=1) == expected.argmax(axis=1))) if errors.size else 1.0
+    )
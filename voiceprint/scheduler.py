@@ -0,0 +1,190 @@
+from concurrent.futures import Future
+import queue
+import threading
+import time
+from typing import Any, Callable, List, Optional, Tuple, TypedDict
+
+import numpy as np
+import torch
+
+from utils import get_logger
+from voiceprint.batching import DEFAULT_MAX_BATCH_SIZE
+
+_LOGGER = get_logger("scheduler")
+
+# How long the first request of a batch may wait for others to join it
+DEFAULT_MAX_WAIT_MS = 5.0
+
+class SchedulerFullError(Exception):
+    """Raised when the scheduler already holds as many requests as it may queue."""
+
+class EmbeddingTiming(TypedDict):
+    """Where the time of a scheduled embedding went, in seconds."""
+    queue_seconds: float
+    compute_seconds: float
+    # Number of requests that shared the forward pass
+    batch_size: int
+
+class SchedulerStats(TypedDict):
+    """Running totals of the scheduler."""
+    max_batch_size: int
+    max_wait_ms: float
+    pending: int
+    batches: int
+    requests: int
+    mean_batch_size: float
+    rejected: int
+
+class _Request:
+    __slots__ = ("signal", "future", "submitted")
+
+    def __init__(self, signal: torch.Tensor):
+        self.signal = signal
+        self.future: Future = Future()
+        self.submitted = time.perf_counter()
+
+class EmbeddingScheduler:
+    """
+    Collects embedding requests from concurrent callers into micro-batches.
+
+    A single worker thread takes the oldest request, waits at most
+    `max_wait_ms` for up to `max_batch_size - 1` more, embeds them together
+    with `encode` and hands each caller its own row. Callers get a Future,
+    so both threads and event loops (through asyncio.wrap_future) can wait
+    on it. At most `max_pending` requests may wait; further ones are
+    rejected right away with SchedulerFullError. Signals are passed to
+    `check` before they are queued, so a bad one fails its own caller
+    rather than the whole batch it would have joined.
+    """
+    max_batch_size: int
+    max_wait_ms: float
+    max_pending: int
+
+    def __init__(
+            self,
+            encode: Callable[[List[torch.Tensor]], np.ndarray],
+            max_batch_size: int = DEFAULT_MAX_BATCH_SIZE,
+            max_wait_ms: float = DEFAULT_MAX_WAIT_MS,
+            max_pending: int = 256,
+            check: Optional[Callable[[torch.Tensor], Any]] = None
+    ):
+        if max_batch_size < 1:
+            raise ValueError("Scheduler batch size must be at least 1")
+        if max_wait_ms < 0:
+            raise ValueError("Scheduler wait cannot be negative")
+        if max_pending < 1:
+            raise ValueError("Scheduler must accept at least one pending request")
+
+        self.max_batch_size = max_batch_size
+        self.max_wait_ms = max_wait_ms
+        self.max_pending = max_pending
+        self._encode = encode
+        self._check = check
+
+        self._queue: "queue.Queue[Optional[_Request]]" = queue.Queue()
+        self._lock = threading.Lock()
+        self._pending = 0
+        self._batches = 0
+        self._requests = 0
+        self._rejected = 0
+        self._closed = False
+
+        self._worker = threading.Thread(target=self._run, name="voiceprint-scheduler", daemon=True)
+        self._worker.start()
+
+    def submit(self, signal: torch.Tensor) -> "Future[Tuple[np.ndarray, EmbeddingTiming]]":
+        """Queue a 1D waveform, returning a Future of its embedding and timing."""
+        if self._check is not None:
+            self._check(signal)
+        with self._lock:
+            if self._closed:
+                raise RuntimeError("Scheduler is closed")
+            if self._pending >= self.max_pending:
+                self._rejected += 1
+                raise SchedulerFullError("Too many requests are waiting for the model")
+            self._pending += 1
+            # Queued under the lock so nothing lands behind close()'s stop marker
+            request = _Request(signal)
+            self._queue.put(request)
+        return request.future
+
+    def embed(self, signal: torch.Tensor) -> np.ndarray:
+        """Embed a 1D waveform through the scheduler, blocking until its batch has run."""
+        embedding, _ = self.submit(signal).result()
+        return embedding
+
+    def stats(self) -> SchedulerStats:
+        """Get the scheduler's running totals."""
+        with self._lock:
+            return SchedulerStats(
+                max_batch_size=self.max_batch_size,
+                max_wait_ms=self.max_wait_ms,
+                pending=self._pending,
+                batches=self._batches,
+                requests=self._requests,
+                mean_batch_size=self._requests / self._batches if self._batches else 0.0,
+                rejected=self._rejected
+            )
+
+    def close(self) -> None:
+        """Run the requests already queued, then stop the worker."""
+        with self._lock:
+            if self._closed:
+                return
+            self._closed = True
+            self._queue.put(None)
+        self._worker.join()
+
+    def _collect(self, first: _Request) -> Tuple[List[_Request], bool]:
+        """Gather requests joining `first` until the batch is full or its wait is over."""
+        batch = [first]
+        deadline = first.submitted + self.max_wait_ms / 1000
+        while len(batch) < self.max_batch_size:
+            try:
+                # Requests already queued join without waiting
+                remaining = deadline - time.perf_counter()
+                request = self._queue.get(timeout=remaining) if remaining > 0 else self._queue.get_nowait()
+            except queue.Empty:
+                break
+            if request is None:
+                return batch, True
+            batch.append(request)
+        return batch, False
+
+    def _run(self) -> None:
+        stopping = False
+        while not stopping:
+            first = self._queue.get()
+            if first is None:
+                break
+
+            batch, stopping = self._collect(first)
+            with self._lock:
+                self._pending -= len(batch)
+
+            # Callers that gave up are left out of the forward pass
+            batch = [request for request in batch if request.future.set_running_or_notify_cancel()]
+            if batch:
+                self._run_batch(batch)
+
+    def _run_batch(self, batch: List[_Request]) -> None:
+        started = time.perf_counter()
+        try:
+            embeddings = self._encode([request.signal for request in batch])
+        except Exception as e:
+            _LOGGER.error(f"Failed to embed a batch of {len(batch)} requests: {e}")
+            for request in batch:
+                request.future.set_exception(e)
+            return
+        finished = time.perf_counter()
+
+        with self._lock:
+            self._batches += 1
+            self._requests += len(batch)
+
+        for request, embedding in zip(batch, embeddings):
+            request.future.set_result((embedding, EmbeddingTiming(
+                queue_seconds=started - request.submitted,
+                compute_seconds=finished - started,
+                batch_size=len(batch)
+            )))
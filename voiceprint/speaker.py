@@ -1,34 +1,45 @@
-
 import json
 import os
-from typing import NewType, TypedDict
+from typing import NewType, NotRequired, Optional, Tuple, TypedDict
 
-from jsonschema import ValidationError, validate
+from jsonschema import Draft202012Validator, ValidationError
 import numpy as np
 
 from voiceprint.helpers import sanitize_name
+from voiceprint.quantization import Precision, dequantize, quantize, storage_dtype
 
 
 speaker_schema_path = os.path.join(os.path.dirname(__file__), "speaker_schema.json")
 with open(speaker_schema_path, "r", encoding="utf-8") as f:
     speaker_schema = json.load(f)
 
+# Compile the validator once instead of on every load
+speaker_validator = Draft202012Validator(speaker_schema)
+
 SpeakerId = NewType("SpeakerId", str)
 
 class SpeakerDTO(TypedDict):
     """Type definition for a speaker in the library."""
     id: SpeakerId
     name: str
+    # Centroid of the speaker's samples
     embeddings: np.ndarray
+    # Per-sample (S x D) embeddings, absent for speakers enrolled before they were kept
+    samples: NotRequired[np.ndarray]
 
 class Speaker:
     _id: SpeakerId
     _name: str
     _embeddings: np.ndarray
+    # Per-vector scale of int8 embeddings
+    _scale: Optional[float]
+    _samples: Optional[np.ndarray]
+    # Per-row scales of int8 samples
+    _sample_scales: Optional[np.ndarray]
 
     @staticmethod
-    def create(name: str, embeddings: np.ndarray) -> 'Speaker':
-        """Create a new speaker."""
+    def create(name: str, embeddings: np.ndarray, samples: Optional[np.ndarray] = None) -> 'Speaker':
+        """Create a new speaker from its centroid and, optionally, the sample embeddings it was computed from."""
         if not name:
             raise ValueError("Speaker name cannot be empty")
         
@@ -37,26 +48,39 @@ class Speaker:
             name=name,
             embeddings=embeddings
         )
+        if samples is not None:
+            speaker["samples"] = samples
         return Speaker(speaker)
 
     @staticmethod
-    def from_dict(data: SpeakerDTO) -> 'Speaker':
-        """Create a Speaker instance from a dictionary."""
-        try:
-            # We expect a dict with a list of numbers for embeddings, not a full SpeakerDTO
-            validate(instance=data, schema=speaker_schema)
-        except ValidationError as e:
-            raise ValueError(f"Invalid speaker data format: {e.message}") from e
+    def from_dict(data: SpeakerDTO, trusted: bool = False) -> 'Speaker':
+        """Create a Speaker instance from a dictionary. Trusted data skips schema validation."""
+        if not trusted:
+            try:
+                # We expect a dict with a list of numbers for embeddings, not a full SpeakerDTO
+                speaker_validator.validate(data)
+            except ValidationError as e:
+                raise ValueError(f"Invalid speaker data format: {e.message}") from e
 
         # Convert embeddings from list to numpy array after validation
-        data["embeddings"] = np.array(data["embeddings"])
+        data["embeddings"] = np.array(data["embeddings"], dtype=np.float32)
+        if "samples" in data:
+            data["samples"] = check_samples(data["samples"], data["embeddings"].shape[-1], data["id"])
         
         return Speaker(data)
     
-    def __init__(self, speaker: SpeakerDTO):
+    def __init__(self, speaker: SpeakerDTO, scale: Optional[float] = None, sample_scales: Optional[np.ndarray] = None):
+        """
+        Create a speaker from its data. Embeddings may be stored at reduced precision
+        (float16, or int8 codes with their `scale`); they are widened on access.
+        Samples may be reduced the same way, int8 ones with one of `sample_scales` per row.
+        """
         self._id = speaker['id']
         self._name = speaker['name']
         self._embeddings = speaker['embeddings']
+        self._scale = scale
+        self._samples = speaker.get('samples')
+        self._sample_scales = sample_scales
 
     @property
     def id(self) -> SpeakerId:
@@ -68,18 +92,96 @@ class Speaker:
 
     @property
     def embeddings(self) -> np.ndarray:
+        if self._scale is not None:
+            return self._embeddings.astype(np.float32) * np.float32(self._scale)
+        if isinstance(self._embeddings, np.ndarray) and self._embeddings.dtype == np.float16:
+            return self._embeddings.astype(np.float32)
         return self._embeddings
+
+    @property
+    def samples(self) -> Optional[np.ndarray]:
+        """Per-sample (S x D) float32 embeddings, None if only the centroid is known."""
+        if self._samples is None or (self._sample_scales is None and self._samples.dtype == np.float32):
+            return self._samples
+        return dequantize(self._samples, self._sample_scales)
+
+    @property
+    def stored_samples(self) -> Optional[Tuple[np.ndarray, Optional[np.ndarray]]]:
+        """Samples as stored, with their int8 scales, None if only the centroid is known."""
+        if self._samples is None:
+            return None
+        return self._samples, self._sample_scales
+
+    @property
+    def sample_count(self) -> int:
+        """Number of samples behind the centroid. A speaker without samples counts as one."""
+        return len(self._samples) if self._samples is not None else 1
+
+    @property
+    def nbytes(self) -> int:
+        """Memory held by the stored embeddings."""
+        sample_bytes = self._samples.nbytes if self._samples is not None else 0
+        scale_bytes = self._sample_scales.nbytes if self._sample_scales is not None else 0
+        return self._embeddings.nbytes + sample_bytes + scale_bytes
+
+    def with_samples(self, embeddings: np.ndarray) -> 'Speaker':
+        """
+        Return a copy of the speaker with more sample embeddings.
+
+        The centroid is updated from its running sum, so the cost depends
+        only on the number of new samples.
+        """
+        embeddings = check_samples(embeddings, np.ravel(self._embeddings).shape[0], self._id)
+        if not len(embeddings):
+            raise ValueError("At least one sample embedding must be provided")
+
+        count = self.sample_count
+        centroid = (np.ravel(self.embeddings) * count + embeddings.sum(axis=0)) / (count + len(embeddings))
+
+        previous = self.samples if self._samples is not None else np.ravel(self.embeddings)[np.newaxis, :]
+        return Speaker(SpeakerDTO(
+            id=self._id,
+            name=self._name,
+            embeddings=centroid.astype(np.float32),
+            samples=np.concatenate([previous, embeddings]).astype(np.float32, copy=False)
+        ))
+
+    def with_sample_precision(self, precision: Precision) -> 'Speaker':
+        """Return the speaker with its samples stored at `precision`, or the speaker itself if they already are."""
+        if self._samples is None or (
+            self._samples.dtype == storage_dtype(precision) and (precision == "int8") == (self._sample_scales is not None)
+        ):
+            return self
+
+        speaker = SpeakerDTO(id=self._id, name=self._name, embeddings=self._embeddings)
+        speaker['samples'], sample_scales = quantize(self.samples, precision)
+        return Speaker(speaker, scale=self._scale, sample_scales=sample_scales)
     
     def to_dict(self) -> dict:
         """Return the speaker as a dictionary suitable for JSON serialization."""
         speaker_dict = {
             'id': self._id,
             'name': self._name,
-            'embeddings': self._embeddings
+            'embeddings': self.embeddings
         }
         
         # Convert numpy array to list for JSON serialization
         if isinstance(speaker_dict['embeddings'], np.ndarray):
             speaker_dict['embeddings'] = speaker_dict['embeddings'].tolist()
+        if self._samples is not None:
+            speaker_dict['samples'] = self.samples.tolist()
             
-        return speaker_dict
\ No newline at end of file
+        return speaker_dict
+
+def check_samples(samples, dim: int, speaker_id: str) -> np.ndarray:
+    """Convert sample embeddings to an (S x D) float32 matrix, checking their shape and values."""
+    try:
+        matrix = np.array(samples, dtype=np.float32)
+    except (ValueError, TypeError) as e:
+        raise ValueError(f"Samples of speaker '{speaker_id}' must be numeric vectors of equal dimension") from e
+
+    if matrix.ndim != 2 or matrix.shape[1] != dim:
+        raise ValueError(f"Samples of speaker '{speaker_id}' do not match the embedding dimension {dim}")
+    if not np.isfinite(matrix).all():
+        raise ValueError(f"Samples of speaker '{speaker_id}' are not finite")
+    return matrix
\ No newline at end of file
@@ -0,0 +1,297 @@
+import json
+import os
+import tempfile
+from typing import List, Literal, Optional, Tuple, TypedDict, get_args
+
+import numpy as np
+
+from utils import get_logger
+from voiceprint.ann import IVFIndex
+from voiceprint.library import Library
+from voiceprint.speaker import Speaker, SpeakerId
+
+_LOGGER = get_logger("storage")
+
+# "json" keeps everything in <lib_id>.json, embeddings included.
+# "npy" writes a small JSON header to <lib_id>.json and the embedding
+# matrix, at the library's precision, to <lib_id>.npy, which loads
+# without parsing any JSON numbers. int8 libraries keep their per-vector
+# scales in <lib_id>.scales.npy. The sample embeddings of the speakers
+# are stacked in <lib_id>.samples.npy at the same precision, int8 ones
+# with their scales in <lib_id>.sample_scales.npy. The matrices are
+# memory-mapped and speakers keep views into them, but the normalized
+# scoring matrix is always built in memory on load.
+LibraryFormat = Literal["json", "npy"]
+LIBRARY_FORMATS = get_args(LibraryFormat)
+
+class JournalEntry(TypedDict, total=False):
+    """
+    A single library mutation. "add" entries carry a speaker, "remove" entries a speaker ID,
+    and "samples" entries a speaker ID with new sample embeddings and the speaker's sample
+    count before they were added.
+    """
+    op: Literal["add", "remove", "samples"]
+    speaker: dict
+    speaker_id: SpeakerId
+    samples: List[List[float]]
+    sample_count: int
+
+def get_embeddings_path(lib_path: str) -> str:
+    """Get the path of the embedding matrix that belongs to a library file."""
+    return os.path.splitext(lib_path)[0] + ".npy"
+
+def get_scales_path(lib_path: str) -> str:
+    """Get the path of the int8 embedding scales that belong to a library file."""
+    return os.path.splitext(lib_path)[0] + ".scales.npy"
+
+def get_samples_path(lib_path: str) -> str:
+    """Get the path of the sample embeddings that belong to a library file."""
+    return os.path.splitext(lib_path)[0] + ".samples.npy"
+
+def get_sample_scales_path(lib_path: str) -> str:
+    """Get the path of the int8 sample scales that belong to a library file."""
+    return os.path.splitext(lib_path)[0] + ".sample_scales.npy"
+
+def get_journal_path(lib_path: str) -> str:
+    """Get the path of the mutation journal that belongs to a library file."""
+    return os.path.splitext(lib_path)[0] + ".journal"
+
+def get_index_path(lib_path: str) -> str:
+    """Get the path of the approximate search index that belongs to a library file."""
+    return os.path.splitext(lib_path)[0] + ".ivf.npz"
+
+def get_library_signature(lib_path: str) -> Optional[List[int]]:
+    """
+    Stat a library file and its journal as [mtime_ns, size, journal_mtime_ns, journal_size].
+
+    Any write to the library changes the signature. Returns None if the library file is gone.
+    """
+    try:
+        lib_stat = os.stat(lib_path)
+    except FileNotFoundError:
+        return None
+
+    signature = [lib_stat.st_mtime_ns, lib_stat.st_size, 0, 0]
+    try:
+        journal_stat = os.stat(get_journal_path(lib_path))
+        signature[2:] = [journal_stat.st_mtime_ns, journal_stat.st_size]
+    except FileNotFoundError:
+        pass
+    return signature
+
+def get_library_footprint(lib_path: str) -> Tuple[int, int]:
+    """
+    Newest mtime_ns and total size of a library file, its journal and its binary sidecars.
+
+    Raises FileNotFoundError if the library file is gone.
+    """
+    lib_stat = os.stat(lib_path)
+    mtime, size = lib_stat.st_mtime_ns, lib_stat.st_size
+    for path in (
+        get_journal_path(lib_path),
+        get_embeddings_path(lib_path),
+        get_scales_path(lib_path),
+        get_samples_path(lib_path),
+        get_sample_scales_path(lib_path)
+    ):
+        try:
+            stat = os.stat(path)
+        except FileNotFoundError:
+            continue
+        mtime = max(mtime, stat.st_mtime_ns)
+        size += stat.st_size
+    return mtime, size
+
+def read_library(lib_path: str, trusted: bool = False) -> Library:
+    """
+    Read a library in any supported format. Raises exceptions on failure.
+
+    Pass `trusted` only for files this service wrote itself; it skips schema validation.
+    """
+    if not os.path.exists(lib_path):
+        raise FileNotFoundError(f"Library file not found: {lib_path}")
+
+    with open(lib_path, "r", encoding="utf-8") as f:
+        library_data = json.load(f)
+
+    if isinstance(library_data, dict) and library_data.get("format") == "npy":
+        embeddings_path = get_embeddings_path(lib_path)
+        if not os.path.exists(embeddings_path):
+            raise FileNotFoundError(f"Library embeddings file not found: {embeddings_path}")
+        embeddings = np.load(embeddings_path, mmap_mode="r")
+
+        scales = None
+        scales_path = get_scales_path(lib_path)
+        if library_data.get("precision") == "int8":
+            if not os.path.exists(scales_path):
+                raise FileNotFoundError(f"Library scales file not found: {scales_path}")
+            scales = np.load(scales_path)
+
+        samples = None
+        samples_path = get_samples_path(lib_path)
+        if any("sample_count" in speaker for speaker in library_data.get("speakers", [])):
+            if not os.path.exists(samples_path):
+                raise FileNotFoundError(f"Library samples file not found: {samples_path}")
+            samples = np.load(samples_path, mmap_mode="r")
+
+        sample_scales = None
+        sample_scales_path = get_sample_scales_path(lib_path)
+        if samples is not None and samples.dtype == np.int8:
+            if not os.path.exists(sample_scales_path):
+                raise FileNotFoundError(f"Library sample scales file not found: {sample_scales_path}")
+            sample_scales = np.load(sample_scales_path)
+
+        library = Library.from_header(
+            library_data, embeddings, trusted=trusted, scales=scales, samples=samples, sample_scales=sample_scales
+        )
+    else:
+        library = Library.from_dict(library_data, trusted=trusted)
+
+    _read_index(library, lib_path)
+    return library
+
+def _read_index(library: Library, lib_path: str) -> None:
+    """Attach the persisted index of a library snapshot, if there is a usable one."""
+    index_path = get_index_path(lib_path)
+    if not os.path.exists(index_path):
+        return
+
+    try:
+        library.set_index(IVFIndex.load(index_path))
+    except Exception as e:
+        # The index is derived data; exact search still works without it
+        _LOGGER.warning(f"Ignoring unusable library index {index_path}: {e}")
+
+def write_library(library: Library, lib_path: str, library_format: LibraryFormat = "json") -> None:
+    """
+    Write a library in the given format.
+
+    Files are written next to their destination and renamed into place, so
+    readers never see a partial file and existing memory maps stay valid.
+    """
+    if library_format not in LIBRARY_FORMATS:
+        raise ValueError(f"Unsupported library format: {library_format}")
+
+    embeddings_path = get_embeddings_path(lib_path)
+    scales_path = get_scales_path(lib_path)
+    samples_path = get_samples_path(lib_path)
+    sample_scales_path = get_sample_scales_path(lib_path)
+    index_path = get_index_path(lib_path)
+
+    if library.index is not None:
+        _replace_file(index_path, library.index.save)
+    elif os.path.exists(index_path):
+        os.remove(index_path)
+
+    if library_format == "npy":
+        embeddings, scales = library.quantize_embeddings()
+        samples, sample_scales = library.quantize_samples()
+        # Write the matrices first so the header never points at a missing file
+        _replace_file(embeddings_path, lambda f: np.save(f, embeddings))
+        if scales is not None:
+            _replace_file(scales_path, lambda f: np.save(f, scales))
+        if len(samples):
+            if sample_scales is not None:
+                _replace_file(sample_scales_path, lambda f: np.save(f, sample_scales))
+            _replace_file(samples_path, lambda f: np.save(f, samples))
+        _replace_file(lib_path, lambda f: f.write(json.dumps(library.to_header(), indent=4).encode("utf-8")))
+        if scales is None and os.path.exists(scales_path):
+            os.remove(scales_path)
+        if not len(samples) and os.path.exists(samples_path):
+            os.remove(samples_path)
+        if (sample_scales is None or not len(samples)) and os.path.exists(sample_scales_path):
+            os.remove(sample_scales_path)
+    else:
+        _replace_file(lib_path, lambda f: f.write(json.dumps(library.to_dict(), indent=4).encode("utf-8")))
+        # Drop the matrix left behind by a previous binary save
+        for path in (embeddings_path, scales_path, samples_path, sample_scales_path):
+            if os.path.exists(path):
+                os.remove(path)
+
+def delete_library(lib_path: str) -> None:
+    """Delete a library file along with its embedding matrix, index and journal, if any."""
+    os.remove(lib_path)
+
+    for path in (
+        get_embeddings_path(lib_path),
+        get_scales_path(lib_path),
+        get_samples_path(lib_path),
+        get_sample_scales_path(lib_path),
+        get_index_path(lib_path),
+        get_journal_path(lib_path)
+    ):
+        if os.path.exists(path):
+            os.remove(path)
+
+def append_journal(lib_path: str, entry: JournalEntry) -> None:
+    """Durably append a mutation to the library journal."""
+    with open(get_journal_path(lib_path), "a+b") as f:
+        if f.seek(0, os.SEEK_END) > 0:
+            f.seek(-1, os.SEEK_END)
+            if f.read(1) != b"\n":
+                # Keep a partial entry left by a crash on its own line
+                f.write(b"\n")
+        f.write(json.dumps(entry).encode("utf-8") + b"\n")
+        f.flush()
+        os.fsync(f.fileno())
+
+def read_journal(lib_path: str) -> List[JournalEntry]:
+    """Read the mutations journaled since the last snapshot of a library."""
+    journal_path = get_journal_path(lib_path)
+    if not os.path.exists(journal_path):
+        return []
+
+    entries: List[JournalEntry] = []
+    with open(journal_path, "r", encoding="utf-8") as f:
+        for line_number, line in enumerate(f, start=1):
+            if not line.strip():
+                continue
+            try:
+                entries.append(json.loads(line))
+            except json.JSONDecodeError:
+                # A crash mid-append can leave a partial line behind
+                _LOGGER.warning(f"Ignoring unreadable journal entry at {journal_path}:{line_number}")
+    return entries
+
+def replay_journal(library: Library, lib_path: str, trusted: bool = False) -> int:
+    """
+    Apply journaled mutations on top of a library snapshot and return how many were applied.
+
+    Adds replace any speaker with the same ID, removes of unknown speakers are ignored and
+    samples are only added to a speaker whose sample count still matches the entry, so
+    replaying on a snapshot that already contains some of the entries is harmless.
+    """
+    entries = read_journal(lib_path)
+    for entry in entries:
+        if entry["op"] == "add":
+            library.put_speaker(Speaker.from_dict(entry["speaker"], trusted=trusted))
+        elif entry["op"] == "remove":
+            library.remove_speaker(entry["speaker_id"])
+        elif entry["op"] == "samples":
+            speaker = library.get_speaker(entry["speaker_id"])
+            if speaker is not None and speaker.sample_count == entry["sample_count"]:
+                library.add_samples(speaker.id, np.array(entry["samples"], dtype=np.float32))
+        else:
+            raise ValueError(f"Unknown journal operation: {entry['op']}")
+    return len(entries)
+
+def clear_journal(lib_path: str) -> None:
+    """Drop the journal of a library once its mutations are part of a snapshot."""
+    journal_path = get_journal_path(lib_path)
+    if os.path.exists(journal_path):
+        os.remove(journal_path)
+
+def _replace_file(path: str, write) -> None:
+    """
+    Write a file through a temporary sibling and atomically rename it into place.
+
+    Every call gets its own temporary file, so concurrent writers never clobber each other's.
+    """
+    fd, temp_path = tempfile.mkstemp(dir=os.path.dirname(path), prefix=f"{os.path.basename(path)}.", suffix=".tmp")
+    try:
+        with os.fdopen(fd, "wb") as f:
+            write(f)
+        os.replace(temp_path, path)
+    finally:
+        if os.path.exists(temp_path):
+            os.remove(temp_path)
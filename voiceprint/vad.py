@@ -0,0 +1,121 @@
+import threading
+from typing import TypedDict
+
+import numpy as np
+import torch
+
+from utils import get_logger
+
+_LOGGER = get_logger("vad")
+
+class TrimStats(TypedDict):
+    """Running totals of the audio seen and dropped by the trimmer."""
+    clips: int
+    # Clips left untouched because too little of them looked like speech
+    untrimmed_clips: int
+    input_seconds: float
+    kept_seconds: float
+    removed_seconds: float
+    removed_fraction: float
+
+class VoiceActivityTrimmer:
+    """
+    Energy-based voice activity detection that drops non-speech frames.
+
+    A frame counts as speech when its energy is within `threshold_db` of the
+    loudest frame of the clip and above `floor_dbfs`. Speech is padded by
+    `padding_ms` on both sides to keep onsets and decays, then every other
+    frame (leading and trailing silence as well as pauses) is removed. Clips
+    where less than `min_speech_seconds` is left are kept whole, since an
+    embedding of almost nothing is worse than one with silence in it.
+    """
+    sample_rate: int
+    frame_ms: float
+    threshold_db: float
+    floor_dbfs: float
+    padding_ms: float
+    min_speech_seconds: float
+
+    def __init__(
+            self,
+            sample_rate: int = 16000,
+            frame_ms: float = 20.0,
+            threshold_db: float = 35.0,
+            floor_dbfs: float = -55.0,
+            padding_ms: float = 100.0,
+            min_speech_seconds: float = 0.5
+    ):
+        if frame_ms <= 0:
+            raise ValueError("VAD frame length must be positive")
+        if threshold_db <= 0:
+            raise ValueError("VAD threshold must be a positive number of decibels below the loudest frame")
+
+        self.sample_rate = sample_rate
+        self.frame_ms = frame_ms
+        self.threshold_db = threshold_db
+        self.floor_dbfs = floor_dbfs
+        self.padding_ms = padding_ms
+        self.min_speech_seconds = min_speech_seconds
+
+        self._lock = threading.Lock()
+        self._clips = 0
+        self._untrimmed_clips = 0
+        self._input_samples = 0
+        self._kept_samples = 0
+
+    def speech_mask(self, signal: np.ndarray) -> np.ndarray:
+        """Per-frame speech decision for a 1D float signal, padding included."""
+        frame = max(1, int(self.sample_rate * self.frame_ms / 1000))
+        n_frames = -(-len(signal) // frame)
+        if n_frames == 0:
+            return np.zeros(0, dtype=bool)
+
+        frames = np.zeros(n_frames * frame, dtype=np.float32)
+        frames[:len(signal)] = signal
+        energy = np.mean(frames.reshape(n_frames, frame) ** 2, axis=1)
+        energy_db = 10 * np.log10(np.maximum(energy, 1e-12))
+
+        speech = (energy_db >= energy_db.max() - self.threshold_db) & (energy_db >= self.floor_dbfs)
+
+        # Dilate the decision so speech keeps its onsets and tails
+        pad = int(round(self.padding_ms / self.frame_ms))
+        if pad > 0 and speech.any():
+            counts = np.convolve(speech.astype(np.int32), np.ones(2 * pad + 1, dtype=np.int32), mode="same")
+            speech = counts > 0
+        return speech
+
+    def trim(self, signal: torch.Tensor) -> torch.Tensor:
+        """Drop the non-speech frames of a 1D waveform."""
+        samples = signal.detach().cpu().numpy()
+        frame = max(1, int(self.sample_rate * self.frame_ms / 1000))
+        keep = np.repeat(self.speech_mask(samples), frame)[:len(samples)]
+
+        kept = int(keep.sum())
+        untrimmed = kept < self.min_speech_seconds * self.sample_rate
+        if untrimmed:
+            keep = np.ones(len(samples), dtype=bool)
+            kept = len(samples)
+
+        with self._lock:
+            self._clips += 1
+            self._untrimmed_clips += int(untrimmed)
+            self._input_samples += len(samples)
+            self._kept_samples += kept
+
+        if kept == len(samples):
+            return signal
+        _LOGGER.debug(f"Trimmed {(len(samples) - kept) / self.sample_rate:.2f}s of {len(samples) / self.sample_rate:.2f}s")
+        return signal[torch.from_numpy(keep)]
+
+    def stats(self) -> TrimStats:
+        """Get the running totals of the trimmer."""
+        with self._lock:
+            removed = self._input_samples - self._kept_samples
+            return TrimStats(
+                clips=self._clips,
+                untrimmed_clips=self._untrimmed_clips,
+                input_seconds=self._input_samples / self.sample_rate,
+                kept_seconds=self._kept_samples / self.sample_rate,
+                removed_seconds=removed / self.sample_rate,
+                removed_fraction=removed / self._input_samples if self._input_samples else 0.0
+            )
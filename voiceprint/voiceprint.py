@@ -1,16 +1,29 @@
-import json
+import itertools
 import os
-from typing import List, Optional, TypedDict
+import threading
+from typing import Dict, List, Optional, Tuple, TypedDict
 
-import torchaudio
 import torch
 import numpy as np
 from speechbrain.inference.speaker import SpeakerRecognition
 from speechbrain.utils.logger import setup_logging
 
 from utils import get_logger
-from voiceprint.library import Library, LibraryId
+from voiceprint.ann import RecallReport
+from voiceprint.audio import SAMPLE_RATE, AudioInput
+from voiceprint.backends import BackendName, InferenceBackend, ParityReport, SpeechBrainBackend, check_parity, load_backend
+from voiceprint.batching import DEFAULT_MAX_BATCH_SIZE, bucket_by_length, pad_batch, segment_starts
+from voiceprint.catalog import LibraryCatalog, LibrarySummary
+from voiceprint.embedding_cache import EmbeddingCache, model_fingerprint
+from voiceprint.library import Library, LibraryId, ScoringMode, check_scoring_mode
+from voiceprint.library_cache import LibraryCache
+from voiceprint.pooling import Pooling, POOLINGS, pool_embeddings, quality_weights
+from voiceprint.quantization import DEFAULT_PRECISION, PRECISIONS, Precision, PrecisionReport, measure_precision
+from voiceprint.scheduler import DEFAULT_MAX_WAIT_MS, EmbeddingScheduler
 from voiceprint.speaker import Speaker, SpeakerId
+from voiceprint import audio as audio_frontend, model_quantization, storage
+from voiceprint.storage import JournalEntry, LibraryFormat
+from voiceprint.vad import VoiceActivityTrimmer
 
 _LOGGER = get_logger("voiceprint")
 setup_logging(default_level="INFO")
@@ -27,12 +40,71 @@ class IdentifiedSpeaker(TypedDict):
 
 class SpeakerIdentificationResponse(TypedDict):
     speakers: List[IdentifiedSpeaker]
+
+class TimelineSegment(TypedDict):
+    """A stretch of a recording attributed to one speaker, in seconds."""
+    start: float
+    end: float
+    # Number of analysis windows merged into the segment
+    windows: int
+    # Top speaker with its mean similarity over the windows, None when nobody matched
+    speaker: Optional[IdentifiedSpeaker]
+
+class SpeakerTimelineResponse(TypedDict):
+    duration: float
+    segments: List[TimelineSegment]
+
 class Voiceprint:
     model: SpeakerRecognition
+    backend: InferenceBackend
+    # Parity of the requested backend with SpeechBrain, None for the SpeechBrain backend itself
+    backend_parity: Optional[ParityReport]
     library: Optional[Library]
     libs_path: str
+    library_format: LibraryFormat
+    journal_compact_threshold: int
+    catalog: LibraryCatalog
+    library_cache: LibraryCache
+    trust_libraries: bool
+    # Micro-batches single-clip embedding requests from concurrent callers
+    scheduler: EmbeddingScheduler
+    # Embeddings of audio seen before, in front of the model
+    embedding_cache: EmbeddingCache
+    # Drops non-speech frames before embedding, None when disabled
+    vad: Optional[VoiceActivityTrimmer]
+    # Clips longer than long_audio_seconds are embedded as overlapping segments and pooled
+    long_audio_seconds: float
+    segment_seconds: float
+    segment_overlap_seconds: float
+    segment_batch_size: int
+    segment_pooling: Pooling
+    # Most audio analyzed per long clip, spread over its whole length; None for all of it
+    max_analyzed_seconds: Optional[float]
 
-    def __init__(self, libs_path: str = default_libs_path):
+    def __init__(
+            self,
+            libs_path: str = default_libs_path,
+            library_format: LibraryFormat = "json",
+            journal_compact_threshold: int = 64,
+            library_cache_size: int = 16,
+            library_cache_bytes: int = 512 * 1024 * 1024,
+            trust_libraries: bool = False,
+            inference_backend: BackendName = "speechbrain",
+            quantize_model: bool = False,
+            batch_max_size: int = DEFAULT_MAX_BATCH_SIZE,
+            batch_max_wait_ms: float = DEFAULT_MAX_WAIT_MS,
+            batch_max_pending: int = 256,
+            embedding_cache_bytes: int = 64 * 1024 * 1024,
+            embedding_cache_path: Optional[str] = None,
+            vad: bool = False,
+            vad_threshold_db: float = 35.0,
+            long_audio_seconds: float = 30.0,
+            segment_seconds: float = 6.0,
+            segment_overlap_seconds: float = 1.5,
+            segment_batch_size: int = 8,
+            segment_pooling: Pooling = "mean",
+            max_analyzed_seconds: Optional[float] = None
+    ):
         model = SpeakerRecognition.from_hparams(
             source=model_path,
             savedir=model_path,
@@ -40,30 +112,112 @@ class Voiceprint:
         )
         if model is None:
             raise RuntimeError("Failed to load the speaker recognition model")
+
+        # Fingerprint the float weights, quantized modules don't expose plain tensors
+        fingerprint = model_fingerprint(model.mods)
+
+        if quantize_model:
+            # Exported backends are traced from the float model
+            if inference_backend != "speechbrain":
+                raise ValueError("int8 model quantization is only available with the speechbrain backend")
+            model_quantization.quantize_model(model)
         
         self.model = model
+        self.backend, self.backend_parity = self._load_backend(inference_backend)
+        self.vad = VoiceActivityTrimmer(threshold_db=vad_threshold_db) if vad else None
+
+        if segment_seconds <= 0 or not 0 <= segment_overlap_seconds < segment_seconds:
+            raise ValueError("Segments must be longer than their overlap")
+        if segment_batch_size < 1:
+            raise ValueError("Segment batch size must be at least 1")
+        if segment_pooling not in POOLINGS:
+            raise ValueError(f"Unsupported segment pooling: {segment_pooling}")
+        if max_analyzed_seconds is not None and max_analyzed_seconds < segment_seconds:
+            raise ValueError("The analyzed duration cap must fit at least one segment")
+        self.long_audio_seconds = max(long_audio_seconds, segment_seconds)
+        self.segment_seconds = segment_seconds
+        self.segment_overlap_seconds = segment_overlap_seconds
+        self.segment_batch_size = segment_batch_size
+        self.segment_pooling = segment_pooling
+        self.max_analyzed_seconds = max_analyzed_seconds
+
+        # Whatever changes the embeddings is part of the cache key
+        model_version = ":".join([
+            self.backend.name,
+            "int8" if quantize_model else "float32",
+            fingerprint,
+            f"{self.long_audio_seconds}/{segment_seconds}/{segment_overlap_seconds}/{segment_pooling}/{max_analyzed_seconds}"
+        ])
+        self.embedding_cache = EmbeddingCache(model_version, max_bytes=embedding_cache_bytes, path=embedding_cache_path)
+        self.scheduler = EmbeddingScheduler(
+            self._encode_signals,
+            max_batch_size=batch_max_size,
+            max_wait_ms=batch_max_wait_ms,
+            max_pending=batch_max_pending,
+            check=audio_frontend.check_signal
+        )
         self.libs_path = libs_path
         self.library: Optional[Library] = None
+
+        if library_format not in storage.LIBRARY_FORMATS:
+            raise ValueError(f"Unsupported library format: {library_format}")
+        self.library_format = library_format
+
+        # Skip schema validation when reading libraries from libs_path, which only this service writes.
+        # Imported files are always validated.
+        self.trust_libraries = trust_libraries
+
+        # Mutations are journaled and folded into a fresh snapshot once this many pile up
+        self.journal_compact_threshold = journal_compact_threshold
+        self._journal_lengths: Dict[LibraryId, int] = {}
+
+        # One lock per library serializes its mutations, journal appends, snapshots and scoring,
+        # so callers on several threads never see rows shifting under them
+        self._library_locks: Dict[LibraryId, threading.RLock] = {}
+        self._library_locks_guard = threading.Lock()
         
         # Ensure the libraries directory exists
         os.makedirs(self.libs_path, exist_ok=True)
+
+        self.catalog = LibraryCatalog(self.libs_path)
+        self.library_cache = LibraryCache(max_libraries=library_cache_size, max_bytes=library_cache_bytes)
     
+    def _load_backend(self, name: BackendName) -> Tuple[InferenceBackend, Optional[ParityReport]]:
+        """Load an inference backend, falling back to SpeechBrain if it fails or does not match it."""
+        reference = SpeechBrainBackend(self.model)
+        if name == "speechbrain":
+            return reference, None
+
+        try:
+            backend = load_backend(name, self.model, model_path)
+            parity = check_parity(backend, reference)
+            if not parity["passed"]:
+                # The export may predate the current model weights
+                backend = load_backend(name, self.model, model_path, rebuild=True)
+                parity = check_parity(backend, reference)
+        except Exception as e:
+            _LOGGER.warning(f"Failed to load {name} inference backend, using speechbrain: {e}")
+            return reference, None
+
+        if not parity["passed"]:
+            _LOGGER.warning(f"{name} inference backend does not match speechbrain, using speechbrain: {parity}")
+            return reference, parity
+
+        _LOGGER.info(f"Using {name} inference backend: {parity}")
+        return backend, parity
+
     def _get_library_path(self, lib_id: LibraryId) -> str:
         """Get the file path for a library by its ID."""
         return os.path.join(self.libs_path, f"{lib_id}.json")
 
-    def _read_library_from_path(self, lib_path: str) -> Library:
+    def _read_library_from_path(self, lib_path: str, trusted: bool = False) -> Library:
         """Read a library from a specific file path. Raises exceptions on failure."""
-        if not os.path.exists(lib_path):
-            raise FileNotFoundError(f"Library file not found: {lib_path}")
-        
-        with open(lib_path, "r", encoding="utf-8") as f:
-            library_data = json.load(f)
-
-        library = Library.from_dict(library_data)
+        library = storage.read_library(lib_path, trusted=trusted)
         if not isinstance(library, Library):
             raise ValueError("Read data is not a valid Library instance")
 
+        self._journal_lengths[library.id] = storage.replay_journal(library, lib_path, trusted=trusted)
+
         _LOGGER.info(f"Read library: {library.name} (ID: {library.id})")
         return library
 
@@ -73,7 +227,7 @@ class Voiceprint:
             raise ValueError("Library ID cannot be empty")
         
         lib_path = self._get_library_path(lib_id)
-        return self._read_library_from_path(lib_path)
+        return self._read_library_from_path(lib_path, trusted=self.trust_libraries)
     
     def _validate_library_loaded(self, expected_id: Optional[LibraryId] = None) -> Library:
         """Ensure a library is loaded before performing operations."""
@@ -84,35 +238,229 @@ class Voiceprint:
             raise ValueError(f"Expected library '{expected_id}' but '{self.library.id}' is loaded")
         
         return self.library
+
+    def _resolve_library_id(self, lib_id: Optional[LibraryId] = None) -> LibraryId:
+        """Get the ID of the library to operate on: the given one, or the loaded library's."""
+        if lib_id is None:
+            lib_id = self._validate_library_loaded().id
+        return lib_id
+
+    def _resolve_library(self, lib_id: Optional[LibraryId] = None) -> Library:
+        """Get the library to operate on: the given one, or the loaded library if no ID is given."""
+        return self.get_library(self._resolve_library_id(lib_id))
+
+    def _library_lock(self, lib_id: LibraryId) -> threading.RLock:
+        """Get the lock that serializes mutations, snapshots and scoring of a library."""
+        with self._library_locks_guard:
+            lock = self._library_locks.get(lib_id)
+            if lock is None:
+                lock = self._library_locks[lib_id] = threading.RLock()
+            return lock
     
-    def _write_library(self) -> None:
-        """Save the library to file."""
-        library = self._validate_library_loaded()
+    def _write_library(self, library: Library) -> None:
+        """Save a full snapshot of the library to file and drop its journal."""
+        lib_path = self._get_library_path(library.id)
+
+        with self._library_lock(library.id):
+            try:
+                storage.write_library(library, lib_path, self.library_format)
+                storage.clear_journal(lib_path)
+                self._journal_lengths[library.id] = 0
+                _LOGGER.info(f"Saved library to: {lib_path}")
+            except Exception as e:
+                raise ValueError(f"Failed to save library: {e}")
 
+            self.catalog.update(library, lib_path)
+            self.catalog.save()
+            self.library_cache.put(library, storage.get_library_signature(lib_path))
+
+    def _journal_mutation(self, library: Library, entry: JournalEntry) -> None:
+        """Record a library mutation without rewriting the library, compacting when the journal grows."""
         lib_path = self._get_library_path(library.id)
-        library_dict = library.to_dict()
 
-        try:
-            with open(lib_path, "w", encoding="utf-8") as f:
-                json.dump(library_dict, f, indent=4)
-            _LOGGER.info(f"Saved library to: {lib_path}")
-        except Exception as e:
-            raise ValueError(f"Failed to save library: {e}")
+        with self._library_lock(library.id):
+            if not os.path.exists(lib_path):
+                # Nothing to replay the journal onto
+                self._write_library(library)
+                return
+
+            try:
+                storage.append_journal(lib_path, entry)
+            except Exception as e:
+                raise ValueError(f"Failed to save library: {e}")
+
+            self._journal_lengths[library.id] = self._journal_lengths.get(library.id, 0) + 1
+            if self._journal_lengths[library.id] >= self.journal_compact_threshold:
+                self._write_library(library)
+            else:
+                # The catalog notices the new signature on the next listing; keep this O(1)
+                self.library_cache.refresh(library, storage.get_library_signature(lib_path))
+
+    def compact_library(self, library_id: Optional[LibraryId] = None) -> None:
+        """Fold the journal of a library (the loaded one by default) into a new snapshot."""
+        library_id = self._resolve_library_id(library_id)
+        with self._library_lock(library_id):
+            self._write_library(self.get_library(library_id))
+
+    def build_index(
+            self,
+            library_id: Optional[LibraryId] = None,
+            n_lists: Optional[int] = None,
+            n_probe: Optional[int] = None,
+            k: int = 10
+    ) -> RecallReport:
+        """
+        Build an approximate search index for a library (the loaded one by default),
+        persist it next to the library and report its recall@k against exact search.
+        """
+        library_id = self._resolve_library_id(library_id)
+        with self._library_lock(library_id):
+            library = self.get_library(library_id)
+            if not library.speakers:
+                raise ValueError("Cannot build an index over an empty library")
+
+            library.build_index(n_lists=n_lists, n_probe=n_probe)
+            # Snapshot the library so the index and the embeddings on disk stay row-aligned
+            self._write_library(library)
+
+            report = library.evaluate_index(k=k)
+        _LOGGER.info(f"Built index for library {library.id}: {report}")
+        return report
+
+    def evaluate_precision(self, library_id: Optional[LibraryId] = None) -> List[PrecisionReport]:
+        """Report the scoring error of every supported precision against float64 for a library."""
+        library_id = self._resolve_library_id(library_id)
+        with self._library_lock(library_id):
+            library = self.get_library(library_id)
+            if not library.speakers:
+                raise ValueError("Cannot evaluate an empty library")
+
+            embeddings = library.stack_embeddings()
+        return [measure_precision(embeddings, precision) for precision in PRECISIONS]
+
+    def set_precision(self, precision: Precision, library_id: Optional[LibraryId] = None) -> None:
+        """Convert a library (the loaded one by default) to another precision and save it."""
+        library_id = self._resolve_library_id(library_id)
+        with self._library_lock(library_id):
+            library = self.get_library(library_id)
+            library.set_precision(precision)
+            self._write_library(library)
+        _LOGGER.info(f"Stored library {library.id} at {precision} precision")
+
+    def drop_index(self, library_id: Optional[LibraryId] = None) -> None:
+        """Remove the approximate search index of a library, returning to exact search."""
+        library_id = self._resolve_library_id(library_id)
+        with self._library_lock(library_id):
+            library = self.get_library(library_id)
+            library.set_index(None)
+            self._write_library(library)
         
-    def create_library(self, lib_name: str) -> Library:
-        """Create a new library."""
+    def load_audio(self, audio: AudioInput, sample_rate: int = SAMPLE_RATE) -> torch.Tensor:
+        """
+        Decode audio into a 1D float waveform at the model's sample rate (16 kHz).
+
+        Paths, encoded bytes and binary streams are decoded with torchaudio.
+        Arrays are taken to be at `sample_rate`; integer arrays are treated as
+        PCM and scaled to -1..1. Channels are downmixed and other sample
+        rates resampled (see voiceprint.audio).
+        """
+        return audio_frontend.load_audio(audio, sample_rate)
+
+    def _encode_signals(self, signals: List[torch.Tensor]) -> np.ndarray:
+        """
+        Embed 1D waveforms, returning an (N x D) array in input order.
+
+        With VAD enabled, non-speech frames are dropped first. Audio seen
+        before is served from the embedding cache. The remaining signals are
+        bucketed by length and each bucket is padded and run through the
+        model in a single forward pass; clips longer than `long_audio_seconds`
+        are embedded in segments instead (see _encode_segments). Raises
+        ValueError for a signal too short to embed.
+        """
+        signals = [audio_frontend.check_signal(signal) for signal in signals]
+        if self.vad is not None:
+            signals = [self.vad.trim(signal) for signal in signals]
+
+        embeddings: List[Optional[np.ndarray]] = [None] * len(signals)
+        # Identical clips in one call are embedded once
+        missing: Dict[str, List[int]] = {}
+        for i, signal in enumerate(signals):
+            key = self.embedding_cache.key(signal)
+            if key in missing:
+                missing[key].append(i)
+                continue
+            embeddings[i] = self.embedding_cache.get(key)
+            if embeddings[i] is None:
+                missing[key] = [i]
+
+        def store(key: str, embedding: np.ndarray) -> None:
+            self.embedding_cache.put(key, embedding)
+            for i in missing[key]:
+                embeddings[i] = embedding
+
+        long_length = self.long_audio_seconds * SAMPLE_RATE
+        keys = [key for key in missing if signals[missing[key][0]].shape[-1] <= long_length]
+        for key in missing:
+            if signals[missing[key][0]].shape[-1] > long_length:
+                store(key, self._encode_segments(signals[missing[key][0]]))
+
+        lengths = [signals[missing[key][0]].shape[-1] for key in keys]
+        for bucket in bucket_by_length(lengths):
+            batch, wav_lens = pad_batch([signals[missing[keys[j]][0]] for j in bucket])
+            emb = self.backend.encode_batch(batch, wav_lens)
+            for row, j in enumerate(bucket):
+                store(keys[j], emb[row])
+
+        return np.stack(embeddings)
+
+    def _encode_segments(self, signal: torch.Tensor) -> np.ndarray:
+        """
+        Embed a long 1D waveform as overlapping fixed-length segments and pool them.
+
+        Segments run through the model `segment_batch_size` at a time, so peak
+        memory depends on the segment length, not on the recording's. With
+        `max_analyzed_seconds`, only that much audio is analyzed, spread
+        evenly over the recording.
+        """
+        segment = int(self.segment_seconds * SAMPLE_RATE)
+        hop = segment - int(self.segment_overlap_seconds * SAMPLE_RATE)
+        max_segments = None
+        if self.max_analyzed_seconds is not None:
+            max_segments = int(self.max_analyzed_seconds // self.segment_seconds)
+        starts = segment_starts(signal.shape[-1], segment, hop, max_segments)
+
+        segment_embeddings = self._encode_windows(signal, starts, segment)
+
+        weights = quality_weights(segment_embeddings) if self.segment_pooling == "quality" else None
+        pooled = pool_embeddings(segment_embeddings, weights)
+        # Keep the magnitude of a raw embedding, so enrollment can average it with embeddings of short clips
+        scale = np.linalg.norm(segment_embeddings, axis=1).mean() / max(float(np.linalg.norm(pooled)), 1e-12)
+        return (pooled * scale).astype(np.float32)
+
+    def _encode_windows(self, signal: torch.Tensor, starts: List[int], length: int) -> np.ndarray:
+        """Embed the `length`-sample windows of a 1D waveform at `starts`, `segment_batch_size` at a time."""
+        batches = []
+        for i in range(0, len(starts), self.segment_batch_size):
+            batch = torch.stack([signal[start:start + length] for start in starts[i:i + self.segment_batch_size]])
+            batches.append(self.backend.encode_batch(batch, torch.ones(len(batch))))
+        return np.concatenate(batches)
+
+    def create_library(self, lib_name: str, precision: Precision = DEFAULT_PRECISION) -> Library:
+        """Create a new library storing its embeddings at the given precision."""
         if not lib_name:
             raise ValueError("Library name cannot be empty")
         
-        self.library = Library.create(lib_name)
-        try:
-            self._read_library_by_id(self.library.id)
-            # If no exception, library exists, so forbid import
-            raise ValueError(f"A library with ID '{self.library.id}' already exists. Creation forbidden.")
-        except FileNotFoundError:
-            # Not found, safe to import
-            pass
-        self._write_library()
+        library = Library.create(lib_name, precision)
+        with self._library_lock(library.id):
+            try:
+                self._read_library_by_id(library.id)
+                # If no exception, library exists, so forbid import
+                raise ValueError(f"A library with ID '{library.id}' already exists. Creation forbidden.")
+            except FileNotFoundError:
+                # Not found, safe to import
+                pass
+            self._write_library(library)
+        self.library = library
 
         _LOGGER.info(f"Created new library: {lib_name} (ID: {self.library.id})")
 
@@ -130,17 +478,19 @@ class Voiceprint:
             raise ValueError("Library file must be a JSON (.json) file")
 
         try:
-            self.library = self._read_library_from_path(lib_file_path)
-            # Check if a library with this ID already exists in storage
-            try:
-                self._read_library_by_id(self.library.id)
-                # If no exception, library exists, so forbid import
-                raise ValueError(f"A library with ID '{self.library.id}' already exists. Import forbidden.")
-            except FileNotFoundError:
-                # Not found, safe to import
-                pass
+            library = self._read_library_from_path(lib_file_path)
+            with self._library_lock(library.id):
+                # Check if a library with this ID already exists in storage
+                try:
+                    self._read_library_by_id(library.id)
+                    # If no exception, library exists, so forbid import
+                    raise ValueError(f"A library with ID '{library.id}' already exists. Import forbidden.")
+                except FileNotFoundError:
+                    # Not found, safe to import
+                    pass
 
-            self._write_library()
+                self._write_library(library)
+            self.library = library
 
             _LOGGER.info(f"Imported library: {self.library.name} (ID: {self.library.id})")
 
@@ -149,35 +499,84 @@ class Voiceprint:
             _LOGGER.error(f"Failed to import library from {lib_file_path}: {e}")
             raise ValueError(f"Failed to import library: {e}")
 
-    def list_libraries(self) -> List[Library]:
-        """List all available libraries."""
+    def list_libraries(self) -> List[LibrarySummary]:
+        """
+        List all available libraries.
+
+        Summaries come from the library catalog; libraries whose files
+        changed since they were last cataloged are summarized from the
+        library cache, or read from disk if they are not cached.
+        """
         if not os.path.exists(self.libs_path):
             return []
         
-        libraries: List[Library] = []
+        summaries: List[LibrarySummary] = []
         for filename in os.listdir(self.libs_path):
             _LOGGER.debug(f"Checking file: {filename}")
-            if filename.lower().endswith(".json"):
+            if filename.lower().endswith(".json") and not filename.startswith("."):
                 lib_id = LibraryId(filename[:-5])  # Remove .json extension
-                try:
-                    library = self._read_library_by_id(lib_id)
-                    libraries.append(library)
-                except Exception as e:
-                    _LOGGER.warning(f"Failed to read library {lib_id}: {e}")
-                    continue
+                lib_path = self._get_library_path(lib_id)
 
-        return libraries
+                summary = self.catalog.get(lib_id, lib_path)
+                if summary is None:
+                    try:
+                        # Summarize a state that matches the signature the catalog records
+                        with self._library_lock(lib_id):
+                            library = self.library_cache.peek(lib_id, storage.get_library_signature(lib_path))
+                            if library is None:
+                                library = self._read_library_by_id(lib_id)
+                            summary = self.catalog.update(library, lib_path)
+                    except Exception as e:
+                        _LOGGER.warning(f"Failed to read library {lib_id}: {e}")
+                        continue
+                summaries.append(summary)
+
+        # Forget libraries whose files were removed behind our back
+        self.catalog.retain(summary["id"] for summary in summaries)
+        self.catalog.save()
+
+        return summaries
+
+    def get_library(self, lib_id: LibraryId) -> Library:
+        """
+        Get a library by ID without changing the loaded library.
+
+        Libraries are served from the cache and only read from file when they
+        are not cached or their files changed since they were cached.
+        """
+        if not lib_id:
+            raise ValueError("Library ID cannot be empty")
+
+        lib_path = self._get_library_path(lib_id)
+        # Stat before reading so a concurrent write shows up as a stale entry next time
+        signature = storage.get_library_signature(lib_path)
+
+        library = self.library_cache.get(lib_id, signature)
+        if library is None:
+            with self._library_lock(lib_id):
+                # Another thread may have read it, or finished mutating it, while we waited
+                signature = storage.get_library_signature(lib_path)
+                library = self.library_cache.peek(lib_id, signature)
+                if library is None:
+                    library = self._read_library_from_path(lib_path, trusted=self.trust_libraries)
+                    self.library_cache.put(library, signature)
+
+        if self.library is not None and self.library.id == lib_id:
+            # Keep the loaded library pointing at the freshest copy
+            self.library = library
+        return library
 
     def load_library(self, lib_id: LibraryId) -> Library:
-        """Load a library from file using library ID."""
-        if self.library and self.library.id == lib_id:
-            _LOGGER.info(f"Library {lib_id} is already loaded")
-            return self.library
-        
-        self.library = self._read_library_by_id(lib_id)
+        """Load a library using library ID, making it the default for operations without a library ID."""
+        self.library = self.get_library(lib_id)
         _LOGGER.info(f"Loaded voices library: {self.library.name} (ID: {self.library.id})")
         return self.library
     
+    def export_library(self, lib_id: LibraryId) -> dict:
+        """Export a library as a portable JSON-serializable dictionary, whatever its storage format."""
+        with self._library_lock(lib_id):
+            return self.get_library(lib_id).to_dict()
+
     def get_loaded_library(self) -> Optional[Library]:
         """Get the current voices library."""
         return self.library
@@ -194,7 +593,10 @@ class Voiceprint:
             return False
         
         try:
-            os.remove(lib_path)
+            with self._library_lock(lib_id):
+                storage.delete_library(lib_path)
+                self.catalog.remove(lib_id)
+                self.library_cache.discard(lib_id)
             _LOGGER.info(f"Deleted library: {lib_id}")
             if self.library and self.library.id == lib_id:
                 self.library = None  # Clear current library if it was deleted
@@ -203,97 +605,301 @@ class Voiceprint:
             _LOGGER.error(f"Failed to delete library {lib_id}: {e}")
             return False
 
-    def enroll_speaker(self, name: str, filepaths: list[str]) -> Speaker:
+    def enroll_speaker(
+            self,
+            name: str,
+            filepaths: list[str],
+            library_id: Optional[LibraryId] = None
+    ) -> Speaker:
         """Enroll a speaker in the voices library."""
-        library = self._validate_library_loaded()
-        
-        if not name:
-            raise ValueError("Speaker name cannot be empty")
-        
         if not filepaths:
             raise ValueError("At least one audio file must be provided")
         
-        # Process audio files to extract embeddings
-        embeddings = []
         for filepath in filepaths:
             if not os.path.exists(filepath):
                 raise FileNotFoundError(f"Audio file not found: {filepath}")
-            
-            signal, fs = torchaudio.load(filepath)
-            # Resample & mono normalization done inside encode_batch if needed
-            with torch.no_grad():
-                emb = self.model.encode_batch(signal)  # (1, feat_dim, 1)
-            # Convert to 1D numpy array
-            emb = emb.squeeze().cpu().numpy()
-            embeddings.append(emb)
-
-        # Store mean embedding
-        mean_embedding = np.mean(embeddings, axis=0)
+
+        return self.enroll_from_arrays(name, filepaths, library_id=library_id)
+
+    def enroll_from_arrays(
+            self,
+            name: str,
+            audios: List[AudioInput],
+            library_id: Optional[LibraryId] = None
+    ) -> Speaker:
+        """Enroll a speaker from in-memory audio (arrays, tensors or encoded byte buffers)."""
+        library_id = self._resolve_library_id(library_id)
+        self.get_library(library_id)
+        
+        if not name:
+            raise ValueError("Speaker name cannot be empty")
+        
+        if not audios:
+            raise ValueError("At least one audio sample must be provided")
+        
+        # Decode every sample up front so they can share forward passes
+        embeddings = self._encode_signals([self.load_audio(audio) for audio in audios])
+
+        # Store mean embedding, keeping the per-sample embeddings for incremental enrollment
+        mean_embedding = embeddings.mean(axis=0)
         
         # Create a speaker in library
-        speaker = library.add_speaker(name, mean_embedding)
-        self._write_library()
+        with self._library_lock(library_id):
+            library = self.get_library(library_id)
+            speaker = library.add_speaker(name, mean_embedding, samples=embeddings)
+            self._journal_mutation(library, {"op": "add", "speaker": speaker.to_dict()})
         
         _LOGGER.info(f"Enrolled speaker '{name}' with ID: {speaker.id}")
         return speaker
 
-    def unenroll_speaker(self, speaker_id: SpeakerId) -> bool:
+    def add_samples(
+            self,
+            speaker_id: SpeakerId,
+            audios: List[AudioInput],
+            library_id: Optional[LibraryId] = None
+    ) -> Speaker:
+        """
+        Add audio samples to an enrolled speaker.
+
+        Only the new samples are embedded; the speaker's centroid is updated
+        from its running sum and the change is journaled like any other.
+        """
+        library_id = self._resolve_library_id(library_id)
+        if self.get_library(library_id).get_speaker(speaker_id) is None:
+            raise ValueError(f"Speaker with ID {speaker_id} not found in the library")
+
+        if not audios:
+            raise ValueError("At least one audio sample must be provided")
+
+        for audio in audios:
+            if isinstance(audio, str) and not os.path.exists(audio):
+                raise FileNotFoundError(f"Audio file not found: {audio}")
+
+        embeddings = self._encode_signals([self.load_audio(audio) for audio in audios])
+
+        with self._library_lock(library_id):
+            # The speaker may have changed while the samples were embedded
+            library = self.get_library(library_id)
+            speaker = library.get_speaker(speaker_id)
+            if speaker is None:
+                raise ValueError(f"Speaker with ID {speaker_id} not found in the library")
+            sample_count = speaker.sample_count
+
+            speaker = library.add_samples(speaker_id, embeddings)
+            self._journal_mutation(library, {
+                "op": "samples",
+                "speaker_id": speaker_id,
+                "samples": embeddings.tolist(),
+                "sample_count": sample_count
+            })
+
+        _LOGGER.info(f"Added {len(embeddings)} samples to speaker '{speaker.name}', now {speaker.sample_count}")
+        return speaker
+
+    def unenroll_speaker(self, speaker_id: SpeakerId, library_id: Optional[LibraryId] = None) -> bool:
         """Remove a speaker from the voices library."""
-        library = self._validate_library_loaded()
-        
-        if library.remove_speaker(speaker_id):
-            _LOGGER.info(f"Unenrolled speaker by ID: {speaker_id}")
-            self._write_library()
-            return True
-        return False
+        library_id = self._resolve_library_id(library_id)
+
+        with self._library_lock(library_id):
+            library = self.get_library(library_id)
+            if not library.remove_speaker(speaker_id):
+                return False
+            self._journal_mutation(library, {"op": "remove", "speaker_id": speaker_id})
+
+        _LOGGER.info(f"Unenrolled speaker by ID: {speaker_id}")
+        return True
 
     def identify_speaker(
             self,
             filepath: str,
             threshold: Optional[float] = None,
-            limit: Optional[int] = None
+            limit: Optional[int] = None,
+            library_id: Optional[LibraryId] = None,
+            mode: ScoringMode = "centroid"
     ) -> SpeakerIdentificationResponse:
         """Identify a speaker from an audio file."""
         if not os.path.exists(filepath):
             raise FileNotFoundError(f"Audio file not found: {filepath}")
         
-        library = self._validate_library_loaded()
-        
+        return self.identify_speakers_batch(
+            [filepath], threshold=threshold, limit=limit, library_id=library_id, mode=mode
+        )[0]
+
+    def identify_from_array(
+            self,
+            audio: AudioInput,
+            threshold: Optional[float] = None,
+            limit: Optional[int] = None,
+            library_id: Optional[LibraryId] = None,
+            mode: ScoringMode = "centroid"
+    ) -> SpeakerIdentificationResponse:
+        """
+        Identify a speaker from in-memory audio (an array, tensor or encoded byte buffer).
+
+        The clip is embedded through the scheduler, so concurrent callers share forward passes.
+        """
+        library = self._resolve_library(library_id)
+
+        if threshold is not None and (threshold < 0 or threshold > 1):
+            raise ValueError("Threshold must be between 0 and 1")
+        check_scoring_mode(mode)
+
+        signal = self.load_audio(audio)
         if not library.speakers:
             return {"speakers": []}
+
+        return self.identify_from_embedding(self.scheduler.embed(signal), threshold, limit, library.id, mode)
+
+    def identify_from_embedding(
+            self,
+            embedding: np.ndarray,
+            threshold: Optional[float] = None,
+            limit: Optional[int] = None,
+            library_id: Optional[LibraryId] = None,
+            mode: ScoringMode = "centroid"
+    ) -> SpeakerIdentificationResponse:
+        """Identify a speaker from an embedding computed by the model."""
+        return self._identify_embeddings(np.asarray(embedding)[np.newaxis], threshold, limit, library_id, mode)[0]
+
+    def _identify_embeddings(
+            self,
+            embeddings: np.ndarray,
+            threshold: Optional[float],
+            limit: Optional[int],
+            library_id: Optional[LibraryId],
+            mode: ScoringMode
+    ) -> List[SpeakerIdentificationResponse]:
+        library_id = self._resolve_library_id(library_id)
+
+        if threshold is not None and (threshold < 0 or threshold > 1):
+            raise ValueError("Threshold must be between 0 and 1")
+
+        # Score all clips against the library's pre-normalized embedding matrix at once,
+        # with no mutation moving its rows meanwhile
+        with self._library_lock(library_id):
+            library = self.get_library(library_id)
+            if not library.speakers or not len(embeddings):
+                return [{"speakers": []} for _ in embeddings]
+            ranked_batch = library.score_batch(embeddings, threshold=threshold, limit=limit, mode=mode)
+
+        return [
+            {
+                "speakers": [
+                    {
+                        "id": speaker.id,
+                        "name": speaker.name,
+                        "similarity": similarity
+                    }
+                    for speaker, similarity in ranked
+                ]
+            }
+            for ranked in ranked_batch
+        ]
+
+    def identify_speakers_batch(
+            self,
+            inputs: List[AudioInput],
+            threshold: Optional[float] = None,
+            limit: Optional[int] = None,
+            library_id: Optional[LibraryId] = None,
+            mode: ScoringMode = "centroid"
+    ) -> List[SpeakerIdentificationResponse]:
+        """Identify the speaker of each audio input, returning one response per input in input order."""
+        for audio in inputs:
+            if isinstance(audio, str) and not os.path.exists(audio):
+                raise FileNotFoundError(f"Audio file not found: {audio}")
         
-        signal, fs = torchaudio.load(filepath)
-        with torch.no_grad():
-            emb = self.model.encode_batch(signal).squeeze().cpu().numpy()
-
-        # Compute cosine similarities
-        speakers: List[IdentifiedSpeaker] = []
-        for speaker in library.speakers:
-            # Raw cosine similarity is -1..1
-            similarity = np.dot(emb, speaker.embeddings) / (
-                np.linalg.norm(emb) * np.linalg.norm(speaker.embeddings)
-            )
-            # Normalize to 0..1, clamp for numerical noise
-            # This way, 0 means no similarity, 1 means perfect match
-            similarity = max(0.0, min(1.0, (similarity + 1) / 2))
-            speakers.append({
-                "id": speaker.id,
-                "name": speaker.name,
-                "similarity": float(similarity)
-            })
-        
-        # Sort by similarity (descending)
-        speakers.sort(key=lambda x: x["similarity"], reverse=True)
+        library = self._resolve_library(library_id)
         
-        # Apply threshold if provided
-        if threshold is not None:
-            if threshold < 0 or threshold > 1:
-                raise ValueError("Threshold must be between 0 and 1")
-            # Filter speakers below threshold
-            speakers = [s for s in speakers if s["similarity"] >= threshold]
+        if threshold is not None and (threshold < 0 or threshold > 1):
+            raise ValueError("Threshold must be between 0 and 1")
+        check_scoring_mode(mode)
         
-        # Limit results if specified
-        if limit is not None:
-            speakers = speakers[:limit]
+        if not library.speakers or not inputs:
+            return [{"speakers": []} for _ in inputs]
         
-        return {"speakers": speakers}
+        # Clips of similar length share a forward pass
+        embeddings = self._encode_signals([self.load_audio(audio) for audio in inputs])
+        return self._identify_embeddings(embeddings, threshold, limit, library.id, mode)
+
+    def identify_timeline(
+            self,
+            audio: AudioInput,
+            window_seconds: float = 1.5,
+            hop_seconds: float = 0.75,
+            threshold: Optional[float] = None,
+            library_id: Optional[LibraryId] = None,
+            mode: ScoringMode = "centroid"
+    ) -> SpeakerTimelineResponse:
+        """
+        Tell who spoke when in a recording.
+
+        A `window_seconds` window slides over the audio `hop_seconds` at a time;
+        windows are embedded in batches and all of them are scored against the
+        library with a single matrix product. Each window stands for the audio
+        closest to its center, and consecutive windows with the same top
+        speaker are merged into one segment. Windows whose best match is below
+        `threshold`, or that the VAD finds silent, have no speaker.
+        """
+        library = self._resolve_library(library_id)
+
+        if threshold is not None and (threshold < 0 or threshold > 1):
+            raise ValueError("Threshold must be between 0 and 1")
+        if window_seconds <= 0 or not 0 < hop_seconds <= window_seconds:
+            raise ValueError("Timeline hop must be positive and no longer than the window")
+        check_scoring_mode(mode)
+
+        signal = self.load_audio(audio)
+        length = signal.shape[-1]
+        if length == 0:
+            return {"duration": 0.0, "segments": []}
+
+        window = int(window_seconds * SAMPLE_RATE)
+        starts = segment_starts(length, window, int(hop_seconds * SAMPLE_RATE))
+
+        active = np.ones(len(starts), dtype=bool)
+        if self.vad is not None:
+            # Windows that are mostly silence are not worth a forward pass
+            frame = max(1, int(SAMPLE_RATE * self.vad.frame_ms / 1000))
+            speech = np.repeat(self.vad.speech_mask(signal.detach().cpu().numpy()), frame)[:length]
+            active = np.array([speech[start:start + window].mean() >= 0.5 for start in starts])
+        if not library.speakers:
+            active[:] = False
+
+        speaker_ids: List[Optional[SpeakerId]] = [None] * len(starts)
+        similarities = np.zeros(len(starts), dtype=np.float32)
+        names: Dict[SpeakerId, str] = {}
+        rows = np.flatnonzero(active)
+        if len(rows):
+            embeddings = self._encode_windows(signal, [starts[row] for row in rows], window)
+            with self._library_lock(library.id):
+                ranked = self.get_library(library.id).score_batch(
+                    embeddings, threshold=threshold, limit=1, exact=True, mode=mode
+                )
+            for row, matches in zip(rows, ranked):
+                if matches:
+                    speaker, similarity = matches[0]
+                    speaker_ids[row] = speaker.id
+                    similarities[row] = similarity
+                    names[speaker.id] = speaker.name
+
+        # Split the recording halfway between the centers of consecutive windows
+        centers = np.array([start + min(window, length - start) / 2 for start in starts]) / SAMPLE_RATE
+        bounds = np.concatenate([[0.0], (centers[:-1] + centers[1:]) / 2, [length / SAMPLE_RATE]])
+
+        segments: List[TimelineSegment] = []
+        for speaker_id, group in itertools.groupby(range(len(starts)), key=lambda i: speaker_ids[i]):
+            indices = list(group)
+            segments.append({
+                "start": round(float(bounds[indices[0]]), 3),
+                "end": round(float(bounds[indices[-1] + 1]), 3),
+                "windows": len(indices),
+                "speaker": None if speaker_id is None else {
+                    "id": speaker_id,
+                    "name": names[speaker_id],
+                    "similarity": float(similarities[indices].mean())
+                }
+            })
+
+        _LOGGER.info(f"Built a timeline of {len(segments)} segments from {len(rows)} of {len(starts)} windows")
+        return {"duration": round(length / SAMPLE_RATE, 3), "segments": segments}
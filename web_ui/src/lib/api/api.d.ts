@@ -4,6 +4,26 @@
  */
 
 export interface paths {
+    "/health": {
+        parameters: {
+            query?: never;
+            header?: never;
+            path?: never;
+            cookie?: never;
+        };
+        /**
+         * Health
+         * @description Report that the server is up, along with its queue, batching, embedding cache and VAD counters.
+         */
+        get: operations["health_health_get"];
+        put?: never;
+        post?: never;
+        delete?: never;
+        options?: never;
+        head?: never;
+        patch?: never;
+        trace?: never;
+    };
     "/libraries": {
         parameters: {
             query?: never;
@@ -68,6 +88,26 @@ export interface paths {
         patch?: never;
         trace?: never;
     };
+    "/libraries/{library_id}/compact": {
+        parameters: {
+            query?: never;
+            header?: never;
+            path?: never;
+            cookie?: never;
+        };
+        get?: never;
+        put?: never;
+        /**
+         * Compact Library
+         * @description Fold the library's journal of speaker changes into a new snapshot.
+         */
+        post: operations["compact_library_libraries__library_id__compact_post"];
+        delete?: never;
+        options?: never;
+        head?: never;
+        patch?: never;
+        trace?: never;
+    };
     "/libraries/{library_id}/identify": {
         parameters: {
             query?: never;
@@ -88,6 +128,94 @@ export interface paths {
         patch?: never;
         trace?: never;
     };
+    "/libraries/{library_id}/identify/batch": {
+        parameters: {
+            query?: never;
+            header?: never;
+            path?: never;
+            cookie?: never;
+        };
+        get?: never;
+        put?: never;
+        /**
+         * Identify Speakers Batch
+         * @description Identify the speaker of each audio sample. Results follow the order of the uploaded files.
+         */
+        post: operations["identify_speakers_batch_libraries__library_id__identify_batch_post"];
+        delete?: never;
+        options?: never;
+        head?: never;
+        patch?: never;
+        trace?: never;
+    };
+    "/libraries/{library_id}/identify/timeline": {
+        parameters: {
+            query?: never;
+            header?: never;
+            path?: never;
+            cookie?: never;
+        };
+        get?: never;
+        put?: never;
+        /**
+         * Identify Timeline
+         * @description Tell who spoke when in a long recording, as segments attributed to enrolled speakers.
+         */
+        post: operations["identify_timeline_libraries__library_id__identify_timeline_post"];
+        delete?: never;
+        options?: never;
+        head?: never;
+        patch?: never;
+        trace?: never;
+    };
+    "/libraries/{library_id}/index": {
+        parameters: {
+            query?: never;
+            header?: never;
+            path?: never;
+            cookie?: never;
+        };
+        get?: never;
+        put?: never;
+        /**
+         * Build Index
+         * @description Build an approximate search index for the library and report its recall@k.
+         */
+        post: operations["build_index_libraries__library_id__index_post"];
+        /**
+         * Drop Index
+         * @description Remove the library's approximate search index and return to exact search.
+         */
+        delete: operations["drop_index_libraries__library_id__index_delete"];
+        options?: never;
+        head?: never;
+        patch?: never;
+        trace?: never;
+    };
+    "/libraries/{library_id}/precision": {
+        parameters: {
+            query?: never;
+            header?: never;
+            path?: never;
+            cookie?: never;
+        };
+        /**
+         * Evaluate Precision
+         * @description Report how much each storage precision changes the library's scores compared with float64.
+         */
+        get: operations["evaluate_precision_libraries__library_id__precision_get"];
+        /**
+         * Set Precision
+         * @description Store the library's embeddings at another precision.
+         */
+        put: operations["set_precision_libraries__library_id__precision_put"];
+        post?: never;
+        delete?: never;
+        options?: never;
+        head?: never;
+        patch?: never;
+        trace?: never;
+    };
     "/libraries/{library_id}/speakers": {
         parameters: {
             query?: never;
@@ -128,10 +256,35 @@ export interface paths {
         patch?: never;
         trace?: never;
     };
+    "/libraries/{library_id}/speakers/{speaker_id}/samples": {
+        parameters: {
+            query?: never;
+            header?: never;
+            path?: never;
+            cookie?: never;
+        };
+        get?: never;
+        put?: never;
+        /**
+         * Add Samples
+         * @description Add audio samples to an enrolled speaker. Only the new samples are embedded.
+         */
+        post: operations["add_samples_libraries__library_id__speakers__speaker_id__samples_post"];
+        delete?: never;
+        options?: never;
+        head?: never;
+        patch?: never;
+        trace?: never;
+    };
 }
 export type webhooks = Record<string, never>;
 export interface components {
     schemas: {
+        /** Body_add_samples_libraries__library_id__speakers__speaker_id__samples_post */
+        Body_add_samples_libraries__library_id__speakers__speaker_id__samples_post: {
+            /** Audio Files */
+            audio_files: string[];
+        };
         /** Body_enroll_speaker_libraries__library_id__speakers_post */
         Body_enroll_speaker_libraries__library_id__speakers_post: {
             /** Audio Files */
@@ -145,6 +298,19 @@ export interface components {
              */
             audio_file: string;
         };
+        /** Body_identify_speakers_batch_libraries__library_id__identify_batch_post */
+        Body_identify_speakers_batch_libraries__library_id__identify_batch_post: {
+            /** Audio Files */
+            audio_files: string[];
+        };
+        /** Body_identify_timeline_libraries__library_id__identify_timeline_post */
+        Body_identify_timeline_libraries__library_id__identify_timeline_post: {
+            /**
+             * Audio File
+             * Format: binary
+             */
+            audio_file: string;
+        };
         /** Body_import_library_libraries_import_post */
         Body_import_library_libraries_import_post: {
             /**
@@ -153,11 +319,54 @@ export interface components {
              */
             lib_file: string;
         };
+        /**
+         * EmbeddingCacheStats
+         * @description Counters describing the embedding cache.
+         */
+        EmbeddingCacheStats: {
+            /** Bytes */
+            bytes: number;
+            /** Disk Hits */
+            disk_hits: number;
+            /** Entries */
+            entries: number;
+            /** Evictions */
+            evictions: number;
+            /** Hit Rate */
+            hit_rate: number;
+            /** Hits */
+            hits: number;
+            /** Misses */
+            misses: number;
+        };
+        /**
+         * ExecutorStats
+         * @description Snapshot of the executor's load.
+         */
+        ExecutorStats: {
+            /** Concurrency */
+            concurrency: number;
+            /** Queue Depth */
+            queue_depth: number;
+            /** Queued */
+            queued: number;
+            /** Rejected */
+            rejected: number;
+            /** Running */
+            running: number;
+        };
         /** HTTPValidationError */
         HTTPValidationError: {
             /** Detail */
             detail?: components["schemas"]["ValidationError"][];
         };
+        /** HealthOut */
+        HealthOut: {
+            embedding_cache: components["schemas"]["EmbeddingCacheStats"];
+            executor: components["schemas"]["ExecutorStats"];
+            scheduler: components["schemas"]["SchedulerStats"];
+            vad: components["schemas"]["TrimStats"] | null;
+        };
         /** IdentifiedSpeaker */
         IdentifiedSpeaker: {
             /** Id */
@@ -175,9 +384,78 @@ export interface components {
             id: string;
             /** Name */
             name: string;
+            /**
+             * Precision
+             * @default float32
+             * @enum {string}
+             */
+            precision: "float32" | "float16" | "int8";
             /** Speakers */
             speakers: components["schemas"]["SpeakerOut"][];
         };
+        /**
+         * PrecisionReport
+         * @description Accuracy of scoring at a given precision, compared with float64.
+         */
+        PrecisionReport: {
+            /** Bytes Per Vector */
+            bytes_per_vector: number;
+            /** Max Abs Error */
+            max_abs_error: number;
+            /** Mean Abs Error */
+            mean_abs_error: number;
+            /**
+             * Precision
+             * @enum {string}
+             */
+            precision: "float32" | "float16" | "int8";
+            /** Queries */
+            queries: number;
+            /** Top1 Agreement */
+            top1_agreement: number;
+        };
+        /**
+         * RecallReport
+         * @description How well approximate search agrees with exact search.
+         */
+        RecallReport: {
+            /** Approximate Seconds */
+            approximate_seconds: number;
+            /** Exact Seconds */
+            exact_seconds: number;
+            /** K */
+            k: number;
+            /** Mean Candidates */
+            mean_candidates: number;
+            /** N Lists */
+            n_lists: number;
+            /** N Probe */
+            n_probe: number;
+            /** Queries */
+            queries: number;
+            /** Recall */
+            recall: number;
+        };
+        /**
+         * SchedulerStats
+         * @description Running totals of the scheduler.
+         */
+        SchedulerStats: {
+            /** Batches */
+            batches: number;
+            /** Max Batch Size */
+            max_batch_size: number;
+            /** Max Wait Ms */
+            max_wait_ms: number;
+            /** Mean Batch Size */
+            mean_batch_size: number;
+            /** Pending */
+            pending: number;
+            /** Rejected */
+            rejected: number;
+            /** Requests */
+            requests: number;
+        };
         /** SpeakerIdentificationResponse */
         SpeakerIdentificationResponse: {
             /** Speakers */
@@ -190,6 +468,53 @@ export interface components {
             /** Name */
             name: string;
         };
+        /** SpeakerSamplesOut */
+        SpeakerSamplesOut: {
+            /** Id */
+            id: string;
+            /** Name */
+            name: string;
+            /** Sample Count */
+            sample_count: number;
+        };
+        /** SpeakerTimelineResponse */
+        SpeakerTimelineResponse: {
+            /** Duration */
+            duration: number;
+            /** Segments */
+            segments: components["schemas"]["TimelineSegment"][];
+        };
+        /**
+         * TimelineSegment
+         * @description A stretch of a recording attributed to one speaker, in seconds.
+         */
+        TimelineSegment: {
+            /** End */
+            end: number;
+            speaker: components["schemas"]["IdentifiedSpeaker"] | null;
+            /** Start */
+            start: number;
+            /** Windows */
+            windows: number;
+        };
+        /**
+         * TrimStats
+         * @description Running totals of the audio seen and dropped by the trimmer.
+         */
+        TrimStats: {
+            /** Clips */
+            clips: number;
+            /** Input Seconds */
+            input_seconds: number;
+            /** Kept Seconds */
+            kept_seconds: number;
+            /** Removed Fraction */
+            removed_fraction: number;
+            /** Removed Seconds */
+            removed_seconds: number;
+            /** Untrimmed Clips */
+            untrimmed_clips: number;
+        };
         /** ValidationError */
         ValidationError: {
             /** Location */
@@ -208,6 +533,26 @@ export interface components {
 }
 export type $defs = Record<string, never>;
 export interface operations {
+    health_health_get: {
+        parameters: {
+            query?: never;
+            header?: never;
+            path?: never;
+            cookie?: never;
+        };
+        requestBody?: never;
+        responses: {
+            /** @description Successful Response */
+            200: {
+                headers: {
+                    [name: string]: unknown;
+                };
+                content: {
+                    "application/json": components["schemas"]["HealthOut"];
+                };
+            };
+        };
+    };
     list_libraries_libraries_get: {
         parameters: {
             query?: never;
@@ -232,6 +577,7 @@ export interface operations {
         parameters: {
             query: {
                 name: string;
+                precision?: "float32" | "float16" | "int8";
             };
             header?: never;
             path?: never;
@@ -323,11 +669,43 @@ export interface operations {
             };
         };
     };
+    compact_library_libraries__library_id__compact_post: {
+        parameters: {
+            query?: never;
+            header?: never;
+            path: {
+                library_id: string;
+            };
+            cookie?: never;
+        };
+        requestBody?: never;
+        responses: {
+            /** @description Successful Response */
+            200: {
+                headers: {
+                    [name: string]: unknown;
+                };
+                content: {
+                    "application/json": string;
+                };
+            };
+            /** @description Validation Error */
+            422: {
+                headers: {
+                    [name: string]: unknown;
+                };
+                content: {
+                    "application/json": components["schemas"]["HTTPValidationError"];
+                };
+            };
+        };
+    };
     identify_speaker_libraries__library_id__identify_post: {
         parameters: {
             query?: {
                 threshold?: number | null;
                 limit?: number | null;
+                mode?: "centroid" | "max" | "mean";
             };
             header?: never;
             path: {
@@ -361,6 +739,215 @@ export interface operations {
             };
         };
     };
+    identify_speakers_batch_libraries__library_id__identify_batch_post: {
+        parameters: {
+            query?: {
+                threshold?: number | null;
+                limit?: number | null;
+                mode?: "centroid" | "max" | "mean";
+            };
+            header?: never;
+            path: {
+                library_id: string;
+            };
+            cookie?: never;
+        };
+        requestBody: {
+            content: {
+                "multipart/form-data": components["schemas"]["Body_identify_speakers_batch_libraries__library_id__identify_batch_post"];
+            };
+        };
+        responses: {
+            /** @description Successful Response */
+            200: {
+                headers: {
+                    [name: string]: unknown;
+                };
+                content: {
+                    "application/json": components["schemas"]["SpeakerIdentificationResponse"][];
+                };
+            };
+            /** @description Validation Error */
+            422: {
+                headers: {
+                    [name: string]: unknown;
+                };
+                content: {
+                    "application/json": components["schemas"]["HTTPValidationError"];
+                };
+            };
+        };
+    };
+    identify_timeline_libraries__library_id__identify_timeline_post: {
+        parameters: {
+            query?: {
+                threshold?: number | null;
+                window_seconds?: number;
+                hop_seconds?: number;
+                mode?: "centroid" | "max" | "mean";
+            };
+            header?: never;
+            path: {
+                library_id: string;
+            };
+            cookie?: never;
+        };
+        requestBody: {
+            content: {
+                "multipart/form-data": components["schemas"]["Body_identify_timeline_libraries__library_id__identify_timeline_post"];
+            };
+        };
+        responses: {
+            /** @description Successful Response */
+            200: {
+                headers: {
+                    [name: string]: unknown;
+                };
+                content: {
+                    "application/json": components["schemas"]["SpeakerTimelineResponse"];
+                };
+            };
+            /** @description Validation Error */
+            422: {
+                headers: {
+                    [name: string]: unknown;
+                };
+                content: {
+                    "application/json": components["schemas"]["HTTPValidationError"];
+                };
+            };
+        };
+    };
+    build_index_libraries__library_id__index_post: {
+        parameters: {
+            query?: {
+                n_lists?: number | null;
+                n_probe?: number | null;
+                k?: number;
+            };
+            header?: never;
+            path: {
+                library_id: string;
+            };
+            cookie?: never;
+        };
+        requestBody?: never;
+        responses: {
+            /** @description Successful Response */
+            200: {
+                headers: {
+                    [name: string]: unknown;
+                };
+                content: {
+                    "application/json": components["schemas"]["RecallReport"];
+                };
+            };
+            /** @description Validation Error */
+            422: {
+                headers: {
+                    [name: string]: unknown;
+                };
+                content: {
+                    "application/json": components["schemas"]["HTTPValidationError"];
+                };
+            };
+        };
+    };
+    drop_index_libraries__library_id__index_delete: {
+        parameters: {
+            query?: never;
+            header?: never;
+            path: {
+                library_id: string;
+            };
+            cookie?: never;
+        };
+        requestBody?: never;
+        responses: {
+            /** @description Successful Response */
+            200: {
+                headers: {
+                    [name: string]: unknown;
+                };
+                content: {
+                    "application/json": string;
+                };
+            };
+            /** @description Validation Error */
+            422: {
+                headers: {
+                    [name: string]: unknown;
+                };
+                content: {
+                    "application/json": components["schemas"]["HTTPValidationError"];
+                };
+            };
+        };
+    };
+    evaluate_precision_libraries__library_id__precision_get: {
+        parameters: {
+            query?: never;
+            header?: never;
+            path: {
+                library_id: string;
+            };
+            cookie?: never;
+        };
+        requestBody?: never;
+        responses: {
+            /** @description Successful Response */
+            200: {
+                headers: {
+                    [name: string]: unknown;
+                };
+                content: {
+                    "application/json": components["schemas"]["PrecisionReport"][];
+                };
+            };
+            /** @description Validation Error */
+            422: {
+                headers: {
+                    [name: string]: unknown;
+                };
+                content: {
+                    "application/json": components["schemas"]["HTTPValidationError"];
+                };
+            };
+        };
+    };
+    set_precision_libraries__library_id__precision_put: {
+        parameters: {
+            query: {
+                precision: "float32" | "float16" | "int8";
+            };
+            header?: never;
+            path: {
+                library_id: string;
+            };
+            cookie?: never;
+        };
+        requestBody?: never;
+        responses: {
+            /** @description Successful Response */
+            200: {
+                headers: {
+                    [name: string]: unknown;
+                };
+                content: {
+                    "application/json": string;
+                };
+            };
+            /** @description Validation Error */
+            422: {
+                headers: {
+                    [name: string]: unknown;
+                };
+                content: {
+                    "application/json": components["schemas"]["HTTPValidationError"];
+                };
+            };
+        };
+    };
     enroll_speaker_libraries__library_id__speakers_post: {
         parameters: {
             query: {
@@ -430,4 +1017,40 @@ export interface operations {
             };
         };
     };
+    add_samples_libraries__library_id__speakers__speaker_id__samples_post: {
+        parameters: {
+            query?: never;
+            header?: never;
+            path: {
+                library_id: string;
+                speaker_id: string;
+            };
+            cookie?: never;
+        };
+        requestBody: {
+            content: {
+                "multipart/form-data": components["schemas"]["Body_add_samples_libraries__library_id__speakers__speaker_id__samples_post"];
+            };
+        };
+        responses: {
+            /** @description Successful Response */
+            200: {
+                headers: {
+                    [name: string]: unknown;
+                };
+                content: {
+                    "application/json": components["schemas"]["SpeakerSamplesOut"];
+                };
+            };
+            /** @description Validation Error */
+            422: {
+                headers: {
+                    [name: string]: unknown;
+                };
+                content: {
+                    "application/json": components["schemas"]["HTTPValidationError"];
+                };
+            };
+        };
+    };
 }
@@ -1,11 +1,16 @@
 import argparse
 import asyncio
+from concurrent.futures import ThreadPoolExecutor
 from functools import partial
 import os
 
 from wyoming.server import AsyncServer
 
-from wyoming_voiceprint.handler import WyomingEventHandler
+from wyoming_voiceprint.handler import DEFAULT_MAX_SECONDS, WyomingEventHandler
+from voiceprint.backends import BACKENDS
+from voiceprint.batching import DEFAULT_MAX_BATCH_SIZE
+from voiceprint.library import SCORING_MODES
+from voiceprint.scheduler import DEFAULT_MAX_WAIT_MS
 from voiceprint.voiceprint import Voiceprint
 from utils import get_logger
 
@@ -15,6 +20,58 @@ def parse_arguments():
     parser = argparse.ArgumentParser()
     parser.add_argument("--uri", help="unix:// or tcp://", default="tcp://0.0.0.0:13040")
     parser.add_argument("--library-path", help="Path to library to load", default=None)
+    parser.add_argument(
+        "--inference-backend",
+        help="Model runtime: speechbrain, torchscript or onnx",
+        choices=BACKENDS,
+        default="speechbrain"
+    )
+    parser.add_argument(
+        "--quantize-model",
+        help="Run the embedding model with int8 dynamic quantization",
+        action="store_true"
+    )
+    parser.add_argument(
+        "--batch-max-size",
+        help="Most utterances embedded together in one forward pass",
+        type=int,
+        default=DEFAULT_MAX_BATCH_SIZE
+    )
+    parser.add_argument(
+        "--batch-max-wait-ms",
+        help="How long an utterance may wait for others to share its forward pass",
+        type=float,
+        default=DEFAULT_MAX_WAIT_MS
+    )
+    parser.add_argument(
+        "--scoring-mode",
+        help="Compare utterances with each speaker's centroid, or with each of their samples (max or mean)",
+        choices=SCORING_MODES,
+        default="centroid"
+    )
+    parser.add_argument(
+        "--window-seconds",
+        help="Embed audio in windows of this length while it streams in (default 0: embed whole utterances)",
+        type=float,
+        default=0.0
+    )
+    parser.add_argument(
+        "--max-utterance-seconds",
+        help="Longest stretch of audio kept per utterance",
+        type=float,
+        default=DEFAULT_MAX_SECONDS
+    )
+    parser.add_argument(
+        "--max-concurrent-inferences",
+        help="Most connections identifying a speaker at the same time",
+        type=int,
+        default=DEFAULT_MAX_BATCH_SIZE
+    )
+    parser.add_argument(
+        "--vad",
+        help="Drop silence and pauses before embedding",
+        action="store_true"
+    )
     return parser.parse_args()
 
 async def main() -> None:
@@ -27,7 +84,14 @@ async def main() -> None:
     _LOGGER.info("Loading library %s in folder %s", library_id, library_dir)
 
     # Initialize Voiceprint
-    voiceprint = Voiceprint(libs_path=library_dir)
+    voiceprint = Voiceprint(
+        libs_path=library_dir,
+        inference_backend=args.inference_backend,
+        quantize_model=args.quantize_model,
+        batch_max_size=args.batch_max_size,
+        batch_max_wait_ms=args.batch_max_wait_ms,
+        vad=args.vad
+    )
 
     # Log the loaded library and speakers
     library = voiceprint.load_library(library_id)
@@ -38,12 +102,25 @@ async def main() -> None:
     _LOGGER.info("Starting Wyoming Voiceprint on %s", args.uri)
     server = AsyncServer.from_uri(args.uri)
 
+    # Shared by all connections: decoding and scoring run on the executor, the semaphore caps identifications
+    executor = ThreadPoolExecutor(max_workers=args.max_concurrent_inferences, thread_name_prefix="voiceprint")
+    inference_slots = asyncio.Semaphore(args.max_concurrent_inferences)
+
     try:
-        await server.run(partial(WyomingEventHandler, voiceprint=voiceprint))
+        await server.run(partial(
+            WyomingEventHandler,
+            voiceprint=voiceprint,
+            scoring_mode=args.scoring_mode,
+            window_seconds=args.window_seconds,
+            max_seconds=args.max_utterance_seconds,
+            executor=executor,
+            inference_slots=inference_slots
+        ))
     except KeyboardInterrupt:
         pass
     finally:
         await server.stop()
+        executor.shutdown(wait=False)
 
 if __name__ == "__main__":
     asyncio.run(main())
\ No newline at end of file
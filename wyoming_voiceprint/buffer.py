@@ -0,0 +1,58 @@
+from typing import Optional
+
+import numpy as np
+
+class PcmBuffer:
+    """
+    Growable byte buffer for raw PCM audio, reused across utterances.
+
+    Memory is preallocated and doubled when it runs out; reset() keeps the
+    allocation, so a connection stops allocating once it has seen its
+    longest utterance. Audio past `max_bytes` is dropped.
+    """
+    max_bytes: Optional[int]
+    truncated: bool
+
+    def __init__(self, initial_bytes: int = 64 * 1024, max_bytes: Optional[int] = None):
+        self._data = np.empty(max(1, initial_bytes), dtype=np.uint8)
+        self._size = 0
+        self.max_bytes = max_bytes
+        self.truncated = False
+
+    def __len__(self) -> int:
+        return self._size
+
+    @property
+    def capacity(self) -> int:
+        return len(self._data)
+
+    def extend(self, data: bytes) -> int:
+        """Append bytes, up to the size cap, and return how many were kept."""
+        count = len(data)
+        if self.max_bytes is not None and self._size + count > self.max_bytes:
+            count = max(0, self.max_bytes - self._size)
+            self.truncated = True
+        if count == 0:
+            return 0
+
+        if self._size + count > len(self._data):
+            capacity = max(self._size + count, 2 * len(self._data))
+            if self.max_bytes is not None:
+                capacity = min(capacity, self.max_bytes)
+            grown = np.empty(capacity, dtype=np.uint8)
+            grown[:self._size] = self._data[:self._size]
+            self._data = grown
+
+        self._data[self._size:self._size + count] = np.frombuffer(data, dtype=np.uint8, count=count)
+        self._size += count
+        return count
+
+    def view(self, start: int = 0, end: Optional[int] = None) -> np.ndarray:
+        """Bytes [start, end) of the buffer, without copying. Valid until the next extend or reset."""
+        end = self._size if end is None else min(end, self._size)
+        return self._data[start:end]
+
+    def reset(self) -> None:
+        """Empty the buffer, keeping its memory for the next utterance."""
+        self._size = 0
+        self.truncated = False
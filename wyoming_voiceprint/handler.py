@@ -1,34 +1,84 @@
-import wave
-from typing import Optional
-import os
+import asyncio
+from concurrent.futures import Executor, Future
+from contextlib import nullcontext
+from functools import partial
+from typing import List, Optional, Tuple
 
+import numpy as np
 from wyoming.audio import AudioStart, AudioChunk
 from wyoming.event import Event
 from wyoming.server import AsyncEventHandler
 from wyoming.asr import Transcript
 
+from voiceprint.audio import decode_pcm
+from voiceprint.library import ScoringMode
+from voiceprint.pooling import pool_embeddings
+from voiceprint.scheduler import SchedulerFullError
 from voiceprint.speaker import Speaker
 from voiceprint.voiceprint import IdentifiedSpeaker, Voiceprint
+from wyoming_voiceprint.buffer import PcmBuffer
 from utils import get_logger
 
 _LOGGER = get_logger("handler")
 
+# Utterance tails shorter than this are pooled from the windows already embedded
+DEFAULT_MIN_TAIL_SECONDS = 0.5
+# Audio past this point of an utterance is ignored
+DEFAULT_MAX_SECONDS = 30.0
+
 class WyomingEventHandler(AsyncEventHandler):
-    """Handle Wyoming events for voiceprint speaker identification."""
+    """
+    Handle Wyoming events for voiceprint speaker identification.
+
+    By default every utterance is embedded whole when its transcript comes
+    in. With a positive `window_seconds`, every full window is sent to the
+    Voiceprint scheduler and embedded in the background while audio arrives;
+    on the transcript only the tail after the last window still needs the
+    model, and the window embeddings are pooled, weighted by duration, into
+    the utterance embedding. Pooled scores differ slightly from whole-utterance
+    scores, so the similarity threshold should be checked before enabling it.
+    Utterances shorter than one window are embedded whole.
+
+    Each connection buffers its own audio, capped at `max_seconds`. Decoding
+    and scoring run on `executor` and, when `inference_slots` is given, it
+    bounds how many connections identify speakers at once.
+    """
 
-    def __init__(self, *args, voiceprint: Voiceprint, **kwargs) -> None:
+    def __init__(
+            self,
+            *args,
+            voiceprint: Voiceprint,
+            scoring_mode: ScoringMode = "centroid",
+            window_seconds: float = 0.0,
+            min_tail_seconds: float = DEFAULT_MIN_TAIL_SECONDS,
+            max_seconds: float = DEFAULT_MAX_SECONDS,
+            executor: Optional[Executor] = None,
+            inference_slots: Optional[asyncio.Semaphore] = None,
+            **kwargs
+    ) -> None:
         super().__init__(*args, **kwargs)
         self.voiceprint = voiceprint
+        self.scoring_mode = scoring_mode
+        self.window_seconds = window_seconds
+        self.min_tail_seconds = min_tail_seconds
+        self.max_seconds = max_seconds
+        self._executor = executor
+        self._inference_slots = inference_slots
 
         _LOGGER.info("WyomingEventHandler initialized with Voiceprint instance")
 
-        # Directory to accumulate audio samples
-        self._sample_dir = os.path.join("/tmp", "acc")
-        os.makedirs(self._sample_dir, exist_ok=True)
+        # Raw PCM accumulated from audio chunks, preallocated for a few seconds of 16 kHz 16-bit audio
+        self._audio = PcmBuffer(initial_bytes=5 * 16000 * 2)
+        self._audio_width = 2
+        self._audio_channels = 1
+        self._audio_rate = 16000
 
-        # Audio file for accumulating audio chunks
-        self._sample_path = os.path.join(self._sample_dir, "sample.wav")
-        self._sample_file: Optional[wave.Wave_write] = None
+        # Frames sent for embedding so far, and for each window its frames and the executor job
+        # decoding and queueing it, which resolves to the scheduler's (embedding, timing) future
+        self._streamed_frames = 0
+        self._windows: List[Tuple[int, "asyncio.Future[Future]"]] = []
+        # Set when the scheduler turned a window away; the utterance is then embedded whole
+        self._streaming_failed = False
 
     async def handle_event(self, event: Event) -> bool:
         """Handle all Wyoming events."""
@@ -47,6 +97,7 @@ class WyomingEventHandler(AsyncEventHandler):
     async def _handle_audio_start(self, event: Event) -> None:
         """Initialize audio sample accumulation."""
         _LOGGER.info("Audio start event received, resetting speaker_id")
+        self._reset_audio()
         
         next_event = self._set_speaker_id(event, "unknown")
         await self.write_event(next_event)
@@ -55,18 +106,86 @@ class WyomingEventHandler(AsyncEventHandler):
         """Accumulate audio chunks."""
         chunk = AudioChunk.from_event(event)
 
-        if self._sample_file is None:
-            self._sample_file = wave.open(self._sample_path, "wb")
-            self._sample_file.setframerate(chunk.rate)
-            self._sample_file.setsampwidth(chunk.width)
-            self._sample_file.setnchannels(chunk.channels)
+        if not self._audio:
+            self._audio_width = chunk.width
+            self._audio_channels = chunk.channels
+            self._audio_rate = chunk.rate
+            self._audio.max_bytes = int(self.max_seconds * chunk.rate) * self._frame_bytes()
+
+        truncated = self._audio.truncated
+        self._audio.extend(chunk.audio)
+        if self._audio.truncated and not truncated:
+            _LOGGER.warning("Utterance is longer than %.1fs, ignoring the rest", self.max_seconds)
+
+        self._stream_windows()
+
+    def _frame_bytes(self) -> int:
+        return self._audio_width * self._audio_channels
+
+    def _stream_windows(self) -> None:
+        """Send every newly completed window to the scheduler, decoding it on the executor."""
+        if self.window_seconds <= 0 or self._streaming_failed:
+            return
+
+        loop = asyncio.get_running_loop()
+        window_frames = int(self.window_seconds * self._audio_rate)
+        while len(self._audio) // self._frame_bytes() - self._streamed_frames >= window_frames:
+            start = self._streamed_frames
+            # Copied, as the buffer may grow or be reset before the executor decodes it
+            pcm = self._get_pcm(start, start + window_frames).copy()
+            submission = loop.run_in_executor(
+                self._executor, self._submit_pcm, pcm, self._audio_rate, self._audio_width, self._audio_channels
+            )
+            submission.add_done_callback(self._window_submitted)
+
+            self._windows.append((window_frames, submission))
+            self._streamed_frames += window_frames
+
+    def _window_submitted(self, submission: "asyncio.Future[Future]") -> None:
+        """Stop streaming the utterance once one of its windows could not be queued."""
+        if submission.cancelled() or submission.exception() is None:
+            return
+        if not any(submission is window for _, window in self._windows):
+            # A window of an utterance that has already been answered
+            return
+
+        if not self._streaming_failed:
+            e = submission.exception()
+            if isinstance(e, SchedulerFullError):
+                _LOGGER.warning("Scheduler is full, embedding the utterance once it ends")
+            else:
+                _LOGGER.error("Error embedding audio window: %s", e)
+        self._streaming_failed = True
+
+    @staticmethod
+    def _cancel_window(submission: "asyncio.Future[Future]") -> None:
+        """Cancel a window's embedding, as soon as it is queued if it is still being decoded."""
+        if not submission.done():
+            submission.add_done_callback(WyomingEventHandler._cancel_window)
+        elif not submission.cancelled() and submission.exception() is None:
+            submission.result().cancel()
 
-        self._sample_file.writeframes(chunk.audio)
+    def _submit_pcm(self, pcm: np.ndarray, rate: int, width: int, channels: int) -> Future:
+        """Decode raw PCM and queue it for embedding."""
+        return self.voiceprint.scheduler.submit(decode_pcm(pcm, rate, width, channels))
+
+    def _submit_frames(self, start: int, end: int) -> Future:
+        """Decode frames [start, end) of the buffered audio and queue them for embedding."""
+        return self._submit_pcm(self._get_pcm(start, end), self._audio_rate, self._audio_width, self._audio_channels)
+
+    def _reset_audio(self) -> None:
+        """Forget the buffered utterance and any window embeddings still pending for it."""
+        self._audio.reset()
+        for _, submission in self._windows:
+            self._cancel_window(submission)
+        self._windows = []
+        self._streamed_frames = 0
+        self._streaming_failed = False
 
     async def _handle_transcript(self, event: Event) -> None:
         """Trigger speaker identification on Transcript event."""
         
-        speaker = self._identify_speaker_from_audio()
+        speaker = await self._identify_speaker_from_audio()
         
         if speaker:
             _LOGGER.info("Identified speaker: %s", speaker["name"])
@@ -89,15 +208,66 @@ class WyomingEventHandler(AsyncEventHandler):
 
         return Event(type=event.type, data=next_data, payload=event.payload)
 
-    def _identify_speaker_from_audio(self) -> Optional[IdentifiedSpeaker]:
-        """Identify speaker from audio file."""
+    def _get_pcm(self, start: int = 0, end: Optional[int] = None) -> np.ndarray:
+        """Raw bytes of frames [start, end) of the accumulated PCM audio."""
+        frame_bytes = self._frame_bytes()
+        available = len(self._audio) // frame_bytes
+        end = available if end is None else min(end, available)
+        # A view into the buffer, decode_pcm converts it to a new float signal right away
+        return self._audio.view(start * frame_bytes, end * frame_bytes)
+
+    async def _embed_utterance(self) -> np.ndarray:
+        """Embed the buffered utterance, reusing the windows embedded while it streamed in."""
+        frames = len(self._audio) // self._frame_bytes()
+        windows = []
+        if self._windows and not self._streaming_failed:
+            try:
+                # Waits for windows still being decoded, not for their embeddings
+                futures = await asyncio.gather(*(submission for _, submission in self._windows))
+                windows = [(length, future) for (length, _), future in zip(self._windows, futures)]
+            except Exception:
+                # Logged as the window failed; the utterance is embedded whole instead
+                windows = []
+
+        loop = asyncio.get_running_loop()
+        tail = frames - self._streamed_frames
+        if not windows:
+            windows = [(frames, await loop.run_in_executor(self._executor, self._submit_frames, 0, frames))]
+        elif tail >= self.min_tail_seconds * self._audio_rate:
+            future = await loop.run_in_executor(self._executor, self._submit_frames, self._streamed_frames, frames)
+            windows.append((tail, future))
+
+        results = await asyncio.gather(*(asyncio.wrap_future(future) for _, future in windows))
+        embeddings = np.stack([embedding for embedding, _ in results])
+        return pool_embeddings(embeddings, np.array([length for length, _ in windows]))
+
+    async def _identify_speaker_from_audio(self) -> Optional[IdentifiedSpeaker]:
+        """
+        Identify speaker from the accumulated audio.
+
+        Audio is embedded through the Voiceprint scheduler, batched with
+        other satellites' utterances, while the event loop keeps serving.
+        """
         try:
-            if self._sample_file is not None:
-                _LOGGER.warning("Audio file is still open. Closing it now.")
-                self._sample_file.close()
-                self._sample_file = None
+            if not self._audio:
+                _LOGGER.warning("No audio received before transcript")
+                return None
+
+            async with self._inference_slots or nullcontext():
+                try:
+                    embedding = await self._embed_utterance()
+                finally:
+                    # Start the next utterance from an empty buffer
+                    self._reset_audio()
+
+                res = await asyncio.get_running_loop().run_in_executor(
+                    self._executor,
+                    partial(self.voiceprint.identify_from_embedding, embedding, mode=self.scoring_mode)
+                )
+            if not res["speakers"]:
+                _LOGGER.warning("No speakers enrolled in the loaded library")
+                return None
 
-            res = self.voiceprint.identify_speaker(self._sample_path)
             speaker = res["speakers"][0]
             if speaker["similarity"] < 0.6:
                 _LOGGER.warning("Speaker similarity too low: %s", speaker["similarity"])